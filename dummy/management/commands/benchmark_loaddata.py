@@ -0,0 +1,323 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tarfile
+import tempfile
+from datetime import datetime, timezone
+from io import StringIO
+
+import django
+from django.core import serializers
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import override_settings
+
+from dummy.models import FirstDummy, SecondDummy
+from smart_fixtures.signals import fixtures_profiled
+
+FORMATS = ('json', 'jsonl', 'yaml', 'xml')
+
+
+class Command(BaseCommand):
+    """
+    Benchmarks the smart "loaddata" command on synthetic data.
+
+    Generates fixtures with FirstDummy and SecondDummy objects in each
+    of the given formats and a tree of media files, then loads them with
+    different options and reports the time of each scenario (the median
+    and the minimum of all runs), along with the phases recorded by the
+    "--profile" flag of "loaddata" command.
+
+    Fixtures are loaded in a transaction that is rolled back after each
+    run, so the database is left unchanged.
+
+    Example:
+        python manage.py benchmark_loaddata --objects 10000 \\
+            --output benchmark.json --compare baseline.json
+    """
+
+    help = 'Benchmarks "loaddata" command on synthetic fixtures and media'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--objects',
+            type=int,
+            default=1000,
+            help='Number of objects of each model in the fixtures.',
+        )
+        parser.add_argument(
+            '--media-files',
+            type=int,
+            default=200,
+            help='Number of media files.',
+        )
+        parser.add_argument(
+            '--media-size',
+            type=int,
+            default=64 * 1024,
+            help='Size of each media file in bytes.',
+        )
+        parser.add_argument(
+            '--formats',
+            nargs='+',
+            choices=FORMATS,
+            default=list(FORMATS),
+            help='Fixture formats to benchmark.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Number of runs of each scenario.',
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            choices=tuple(connections),
+            help='Database to load the fixtures into.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Write the results to the given JSON file.',
+        )
+        parser.add_argument(
+            '--compare',
+            help='Compare the results with a JSON file of a previous run.',
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('Number of runs must be a positive integer')
+
+        work_dir = tempfile.mkdtemp(prefix='smart_fixtures_benchmark_')
+        try:
+            self.work_dir = work_dir
+            self.options = options
+            self._generate_fixtures()
+            self._generate_media()
+            results = [
+                self._run_scenario(name, fixtures_settings, args)
+                for name, fixtures_settings, args in self._get_scenarios()
+            ]
+        finally:
+            shutil.rmtree(work_dir)
+
+        report = {'metadata': self._get_metadata(), 'results': results}
+        self.stdout.write(self._create_results_message(results))
+        if options['compare']:
+            with open(options['compare']) as baseline_file:
+                baseline = json.load(baseline_file)
+            self.stdout.write(self._create_comparison_message(results, baseline))
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(report, output_file, indent=2)
+
+    def _get_scenarios(self) -> list[tuple[str, dict, list[str]]]:
+        media_dir = {
+            'src': os.path.join(self.work_dir, 'media_src'),
+            'dest': os.path.join(self.work_dir, 'media_dest'),
+            'recursive': True,
+        }
+        cache_dir = os.path.join(self.work_dir, 'cache')
+        scenarios = [
+            ('media: copy', {'media': [media_dir]}, []),
+            ('media: copy, 4 workers', {'media': [media_dir]}, [
+                '--media-workers', '4',
+            ]),
+            ('media: hardlink', {
+                'media': [dict(media_dir, strategy='hardlink')],
+            }, []),
+            ('media: tar archive', {
+                'media': [dict(
+                    media_dir, src=os.path.join(self.work_dir, 'media.tar')
+                )],
+            }, []),
+            ('media: mtime sync, unchanged', {
+                'media': [media_dir],
+                'media_sync': 'mtime',
+                'cache_dir': cache_dir,
+            }, []),
+        ]
+        for ser_fmt in self.options['formats']:
+            labels = [f'first_dummies.{ser_fmt}', f'second_dummies.{ser_fmt}']
+            scenarios += [
+                (f'load: {ser_fmt}', {'labels': labels}, []),
+                (f'load: {ser_fmt}, bulk', {'labels': labels}, ['--bulk']),
+            ]
+        return scenarios
+
+    def _run_scenario(
+        self,
+        name: str,
+        fixtures_settings: dict,
+        args: list[str],
+    ) -> dict:
+        fixtures_settings = {'labels': [], **fixtures_settings}
+        keep_media = 'media_sync' in fixtures_settings
+        if keep_media:
+            # The first run installs the files, the others find them unchanged
+            self._call_loaddata(fixtures_settings, args)
+
+        profiles = []
+        for _ in range(self.options['repeat']):
+            if not keep_media:
+                shutil.rmtree(
+                    os.path.join(self.work_dir, 'media_dest'), ignore_errors=True
+                )
+            profiles.append(self._call_loaddata(fixtures_settings, args))
+
+        times = [profile['total_time'] for profile in profiles]
+        phases = {
+            phase: statistics.median(
+                profile['phases'][phase]['time'] for profile in profiles
+            )
+            for phase in profiles[0]['phases']
+        }
+        objects = sum(
+            record.get('objects', 0) for record in profiles[0]['models'].values()
+        )
+        median_time = statistics.median(times)
+        self.stderr.write(f'{name}: {median_time:.3f} s')
+        return {
+            'name': name,
+            'runs': times,
+            'min': min(times),
+            'median': median_time,
+            'objects': objects,
+            'objects_per_second': objects / median_time if objects else None,
+            'media_bytes': profiles[0]['phases'].get('media', {}).get('bytes', 0),
+            'phases': phases,
+        }
+
+    def _call_loaddata(self, fixtures_settings: dict, args: list[str]) -> dict:
+        profiles = []
+
+        def receive_profile(sender, profile, **kwargs):
+            profiles.append(profile)
+
+        database = self.options['database']
+        fixtures_profiled.connect(receive_profile)
+        try:
+            with override_settings(
+                FIXTURES=fixtures_settings,
+                FIXTURE_DIRS=[os.path.join(self.work_dir, 'fixtures')],
+            ):
+                with transaction.atomic(using=database):
+                    call_command(
+                        'loaddata',
+                        '--all',
+                        '--profile',
+                        '--database', database,
+                        *args,
+                        stdout=StringIO(),
+                    )
+                    transaction.set_rollback(True, using=database)
+        finally:
+            fixtures_profiled.disconnect(receive_profile)
+        return profiles[0]
+
+    def _generate_fixtures(self):
+        fixtures_dir = os.path.join(self.work_dir, 'fixtures')
+        os.makedirs(fixtures_dir)
+        count = self.options['objects']
+        for ser_fmt in self.options['formats']:
+            for name, create_object in [
+                ('first_dummies', _create_first_dummy),
+                ('second_dummies', _create_second_dummy),
+            ]:
+                path = os.path.join(fixtures_dir, f'{name}.{ser_fmt}')
+                with open(path, 'w') as fixture:
+                    serializers.serialize(
+                        ser_fmt,
+                        (create_object(pk) for pk in range(1, count + 1)),
+                        stream=fixture,
+                    )
+
+    def _generate_media(self):
+        src_dir = os.path.join(self.work_dir, 'media_src')
+        content = bytes(range(256)) * (self.options['media_size'] // 256 + 1)
+        content = content[:self.options['media_size']]
+        for index in range(self.options['media_files']):
+            # Files are spread over nested directories
+            directory = os.path.join(src_dir, f'dir{index % 10}', f'dir{index % 3}')
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f'file{index}.bin'), 'wb') as file:
+                file.write(content)
+        with tarfile.open(os.path.join(self.work_dir, 'media.tar'), 'w') as archive:
+            archive.add(src_dir, arcname='')
+
+    def _get_metadata(self) -> dict:
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            'commit': commit,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connections[self.options['database']].vendor,
+            'parameters': {
+                key: self.options[key]
+                for key in [
+                    'objects', 'media_files', 'media_size', 'formats', 'repeat',
+                ]
+            },
+        }
+
+    @staticmethod
+    def _create_results_message(results: list[dict]) -> str:
+        message = (
+            f'{"Scenario":<32} {"Median (s)":>11} {"Min (s)":>9} '
+            f'{"Objects/s":>11}\n'
+        )
+        for result in results:
+            objects_per_second = result['objects_per_second']
+            message += (
+                f'{result["name"]:<32} {result["median"]:>11.3f} '
+                f'{result["min"]:>9.3f} '
+                f'{f"{objects_per_second:.1f}" if objects_per_second else "-":>11}\n'
+            )
+        return message
+
+    @staticmethod
+    def _create_comparison_message(results: list[dict], baseline: dict) -> str:
+        baseline_results = {
+            result['name']: result for result in baseline['results']
+        }
+        commit = baseline['metadata'].get('commit') or 'unknown commit'
+        message = f'Compared to {commit[:12]}:\n'
+        for result in results:
+            baseline_result = baseline_results.get(result['name'])
+            if not baseline_result or not baseline_result['median']:
+                continue
+            change = result['median'] / baseline_result['median'] - 1
+            message += f'{result["name"]:<32} {change:>+8.1%}\n'
+        return message
+
+
+def _create_first_dummy(pk: int) -> FirstDummy:
+    return FirstDummy(
+        pk=pk,
+        name=f'First Dummy {pk}',
+        description='Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 3,
+        image=f'dummy/images/{pk}.png',
+    )
+
+
+def _create_second_dummy(pk: int) -> SecondDummy:
+    return SecondDummy(
+        pk=pk,
+        name=f'Second Dummy {pk}',
+        description='Lorem ipsum dolor sit amet, consectetur adipiscing elit. ' * 3,
+        file=f'dummy/files/{pk}.pdf',
+    )
@@ -0,0 +1,90 @@
+import argparse
+import copy
+import os
+from collections.abc import Callable
+
+from django.core.management import CommandError
+
+from smart_fixtures.config import get_fixtures_config, get_positive_int_error
+from smart_fixtures.management.commands.loaddata import Command
+from smart_fixtures.media import MediaFile, MediaInstaller, MediaInstallResult
+from smart_fixtures.utils import get_cache_dir
+
+
+def load_fixtures(*fixture_labels, stdout=None, stderr=None, **options) -> int:
+    """
+    Loads fixtures like "loaddata" command does, without parsing command
+    line arguments, e.g. from tests or scripts:
+
+        load_fixtures('fixtures1', database='other', chunk_size=1000)
+
+    Without labels, loads the labels and copies the media files from
+    "FIXTURES" settings variable, like "--all" flag does. Options are named
+    like the destinations of the command's arguments (e.g. `app_label`,
+    `ignore`, `bulk`, `chunk_size`) and default to the same values.
+    Output is written to `stdout` and `stderr` (the standard streams by
+    default).
+
+    Returns the number of objects loaded by the command itself, which
+    does not include objects restored from snapshots or loaded by parallel
+    worker processes.
+    """
+    command = Command(stdout=stdout, stderr=stderr)
+    defaults = {
+        action.dest: copy.copy(action.default)
+        for action in command.create_parser('', 'loaddata')._actions
+        if action.default != argparse.SUPPRESS and action.dest != 'args'
+    }
+    unknown_options = sorted(set(options) - set(defaults))
+    if unknown_options:
+        raise TypeError(
+            f'Unknown option(s) for load_fixtures(): {", ".join(unknown_options)}'
+        )
+    if not fixture_labels:
+        if not command._has_valid_settings():
+            raise CommandError(
+                'Pass fixture labels or set FIXTURES settings variable '
+                'to a valid dictionary with "labels" list or tuple'
+            )
+        options['all'] = True
+
+    command.handle(*fixture_labels, **{**defaults, **options})
+    return getattr(command, 'loaded_object_count', 0)
+
+
+async def install_media_files(
+    media_dirs: list[dict] | None = None,
+    *,
+    sync_mode: str | None = None,
+    workers: int | None = None,
+    referenced_files: set[str] | None = None,
+    on_copied: Callable[[MediaFile], None] | None = None,
+) -> MediaInstallResult:
+    """
+    Installs the files of "media" entries (from "FIXTURES" settings variable
+    by default) without blocking the event loop, e.g. from async deployment
+    scripts (see `MediaInstaller.install_async`):
+
+        result = await install_media_files(on_copied=print)
+
+    The sync mode and the number of workers default to "media_sync" and
+    "media_workers" from "FIXTURES" settings variable, and ValueError is
+    raised if `workers` is not a positive integer. Entries with
+    "referenced_only" install only the files in `referenced_files`.
+    `on_copied` is called on the event loop with each copied file, and
+    files that failed to install are listed in the result.
+    """
+    if workers is not None:
+        error = get_positive_int_error(workers, 'number of media workers')
+        if error:
+            raise ValueError(error)
+    config = get_fixtures_config()
+    installer = MediaInstaller(
+        media_dirs=list(config.media) if media_dirs is None else media_dirs,
+        sync_mode=sync_mode or config.media_sync,
+        manifest_path=os.path.join(get_cache_dir(), 'media_manifest.json'),
+        workers=config.media_workers if workers is None else workers,
+        referenced_files=referenced_files,
+        on_copied=on_copied,
+    )
+    return await installer.install_async()
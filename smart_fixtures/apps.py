@@ -1,6 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core import serializers
 
 
 class DjangoSmartFixturesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'smart_fixtures'
+
+    def ready(self):
+        # JSON fixtures are deserialized incrementally, unless the project
+        # configured its own JSON serializer
+        if 'json' not in getattr(settings, 'SERIALIZATION_MODULES', {}):
+            serializers.register_serializer(
+                'json', 'smart_fixtures.json_stream'
+            )
+        serializers.register_serializer(
+            'compiled', 'smart_fixtures.compiled'
+        )
@@ -0,0 +1,116 @@
+import lzma
+import os
+import tarfile
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import BinaryIO
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover (optional dependency)
+    zstandard = None
+
+TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+TAR_ZSTD_SUFFIXES = ('.tar.zst', '.tar.zstd')
+ZIP_SUFFIXES = ('.zip',)
+ARCHIVE_SUFFIXES = TAR_SUFFIXES + TAR_ZSTD_SUFFIXES + ZIP_SUFFIXES
+
+# Errors of reading a corrupted or truncated archive
+ARCHIVE_ERRORS = (
+    OSError,
+    EOFError,
+    tarfile.TarError,
+    zipfile.BadZipFile,
+    zlib.error,
+    lzma.LZMAError,
+)
+
+
+@dataclass
+class ArchiveMember:
+    name: str
+    size: int
+    mtime_ns: int
+    # Permission bits, or None if the archive does not store them
+    mode: int | None
+    file: BinaryIO
+
+
+def is_archive(path: str) -> bool:
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES) and os.path.isfile(path)
+
+
+def iter_archive_members(path: str):
+    """
+    Yields regular files of the archive at `path` in the order in which
+    they are stored. The archive is read sequentially (compressed tar
+    archives are decompressed as a stream), so the content of each member
+    must be read from its `file` before the next member is requested.
+    """
+    path = str(path)
+    lower_path = path.lower()
+    if lower_path.endswith(ZIP_SUFFIXES):
+        yield from _iter_zip_members(path)
+    elif lower_path.endswith(TAR_ZSTD_SUFFIXES):
+        if zstandard is None:
+            raise OSError(
+                f'Install "zstandard" package (e.g. "django-smart-fixtures[zstd]") '
+                f'to extract "{os.path.basename(path)}"'
+            )
+        with open(path, 'rb') as compressed:
+            with zstandard.ZstdDecompressor().stream_reader(compressed) as stream:
+                yield from _iter_tar_members(fileobj=stream, mode='r|')
+    else:
+        yield from _iter_tar_members(name=path, mode='r|*')
+
+
+def _iter_tar_members(**kwargs):
+    with tarfile.open(**kwargs) as archive:
+        for info in archive:
+            if not info.isreg():
+                continue
+            yield ArchiveMember(
+                name=_normalize_name(info.name),
+                size=info.size,
+                mtime_ns=int(info.mtime * 1_000_000_000),
+                mode=info.mode & 0o777,
+                file=archive.extractfile(info),
+            )
+
+
+def _iter_zip_members(path: str):
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            mode = (info.external_attr >> 16) & 0o777
+            with archive.open(info) as member_file:
+                yield ArchiveMember(
+                    name=_normalize_name(info.filename),
+                    size=info.file_size,
+                    # Zip archives store the local time with 2 second precision
+                    mtime_ns=int(time.mktime(info.date_time + (0, 0, -1)))
+                    * 1_000_000_000,
+                    mode=mode or None,
+                    file=member_file,
+                )
+
+
+def _normalize_name(name: str) -> str:
+    name = name.replace('\\', '/')
+    while name.startswith('./'):
+        name = name[2:]
+    return name
+
+
+def is_safe_member_name(name: str) -> bool:
+    """
+    Returns False for member names that would be extracted outside
+    of the destination directory.
+    """
+    parts = name.split('/')
+    return bool(name) and not name.startswith('/') and '..' not in parts and (
+        not os.path.splitdrive(name)[0]
+    )
@@ -0,0 +1,188 @@
+import time
+from typing import TYPE_CHECKING
+
+from django.core.serializers.base import DeserializedObject
+from django.db import DatabaseError, IntegrityError, connections, models
+
+if TYPE_CHECKING:
+    from smart_fixtures.profiling import LoadProfile
+
+DEFAULT_BULK_BATCH_SIZE = 1000
+
+
+class BulkObjectWriter:
+    """
+    Saves deserialized fixture objects with `bulk_create` instead of
+    one query per object.
+
+    Objects are grouped by model and written once `batch_size` objects of
+    the same model are pending, or when `flush` is called. Existing rows are
+    overwritten with an upsert on databases that support conflict targets,
+    otherwise they are found with a single query per batch and saved one by
+    one. Many-to-many data is set after the batch is written.
+
+    Unlike `DeserializedObject.save`, `bulk_create` doesn't send pre_save
+    and post_save signals.
+
+    If `upsert_changed` is True, existing rows are fetched by primary key
+    for each batch instead, and only new objects and objects whose field
+    values differ from their rows are written (with `bulk_create` and
+    `bulk_update`). Numbers of inserted, updated and unchanged objects of
+    each model are counted in `upsert_counts`, and unchanged objects that
+    were not written yet reported in `unchanged_count`.
+
+    If `profile` is given, the time spent writing each batch is added to
+    the model of the batch.
+    """
+
+    def __init__(
+        self,
+        using: str,
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+        profile: 'LoadProfile | None' = None,
+        upsert_changed: bool = False,
+    ):
+        self.using = using
+        self.batch_size = batch_size
+        self.profile = profile
+        self.upsert_changed = upsert_changed
+        self.upsert_counts = {}
+        self.unchanged_count = 0
+        self._pending = {}
+
+    @staticmethod
+    def can_write(obj: DeserializedObject) -> bool:
+        """
+        Returns False for objects that must be saved one by one: objects
+        without a primary key, objects of multi-table inherited models
+        (not supported by `bulk_create`) and objects of models with
+        "auto_now" or "auto_now_add" fields (`bulk_create` would overwrite
+        their values from the fixture).
+        """
+        opts = obj.object._meta
+        return obj.object.pk is not None and not opts.parents and not any(
+            getattr(field, 'auto_now', False)
+            or getattr(field, 'auto_now_add', False)
+            for field in opts.concrete_fields
+        )
+
+    def add(self, obj: DeserializedObject):
+        model = obj.object.__class__
+        # A later object with the same primary key overwrites the earlier
+        # one, as it would if the objects were saved one by one
+        pending = self._pending.setdefault(model, {})
+        pending[obj.object.pk] = obj
+        if len(pending) >= self.batch_size:
+            self._write(model, list(self._pending.pop(model).values()))
+
+    def flush(self):
+        pending, self._pending = self._pending, {}
+        for model, objs in pending.items():
+            self._write(model, list(objs.values()))
+
+    def _write(self, model, objs: list[DeserializedObject]):
+        start = time.perf_counter()
+        unchanged_count = self.unchanged_count
+        self._write_batch(model, objs)
+        if self.profile:
+            self.profile.add_model(
+                model._meta.label,
+                time.perf_counter() - start,
+                objects=len(objs) - self.unchanged_count + unchanged_count,
+            )
+
+    def _write_batch(self, model, objs: list[DeserializedObject]):
+        opts = model._meta
+        manager = model._base_manager.using(self.using)
+        features = connections[self.using].features
+        update_fields = [
+            field.name for field in opts.concrete_fields if not field.primary_key
+        ]
+        instances = [obj.object for obj in objs]
+        try:
+            if self.upsert_changed:
+                self._write_changed(model, instances)
+            elif update_fields and getattr(
+                features, 'supports_update_conflicts_with_target', False
+            ):
+                manager.bulk_create(
+                    instances,
+                    batch_size=self.batch_size,
+                    update_conflicts=True,
+                    unique_fields=[opts.pk.name],
+                    update_fields=update_fields,
+                )
+            else:
+                existing_pks = set(manager.filter(
+                    pk__in=[instance.pk for instance in instances]
+                ).values_list('pk', flat=True))
+                new_instances = []
+                for instance in instances:
+                    if instance.pk in existing_pks:
+                        # Same as DeserializedObject.save without m2m data
+                        models.Model.save_base(
+                            instance, using=self.using, raw=True
+                        )
+                    else:
+                        new_instances.append(instance)
+                manager.bulk_create(new_instances, batch_size=self.batch_size)
+        # psycopg raises ValueError if data contains NUL chars.
+        except (DatabaseError, IntegrityError, ValueError) as e:
+            e.args = (f'Could not load {opts.label} objects: {e}',)
+            raise
+
+        for obj in objs:
+            if obj.m2m_data:
+                for accessor_name, object_list in obj.m2m_data.items():
+                    getattr(obj.object, accessor_name).set(object_list)
+            obj.m2m_data = None
+
+    def _write_changed(self, model, instances: list[models.Model]):
+        opts = model._meta
+        manager = model._base_manager.using(self.using)
+        fields = [field for field in opts.concrete_fields if not field.primary_key]
+        existing_instances = manager.in_bulk(
+            [instance.pk for instance in instances]
+        )
+        new_instances = []
+        changed_instances = []
+        changed_field_names = set()
+        for instance in instances:
+            existing_instance = existing_instances.get(instance.pk)
+            if existing_instance is None:
+                new_instances.append(instance)
+                continue
+            instance_changed_field_names = {
+                field.name for field in fields
+                if _get_prep_value(field, instance)
+                != _get_prep_value(field, existing_instance)
+            }
+            if instance_changed_field_names:
+                changed_instances.append(instance)
+                changed_field_names |= instance_changed_field_names
+
+        manager.bulk_create(new_instances, batch_size=self.batch_size)
+        if changed_instances:
+            # Only fields that changed in any of the objects are written
+            manager.bulk_update(
+                changed_instances,
+                [field.name for field in fields if field.name in changed_field_names],
+                batch_size=self.batch_size,
+            )
+
+        counts = self.upsert_counts.setdefault(
+            opts.label, {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        )
+        counts['inserted'] += len(new_instances)
+        counts['updated'] += len(changed_instances)
+        unchanged_count = (
+            len(instances) - len(new_instances) - len(changed_instances)
+        )
+        counts['unchanged'] += unchanged_count
+        self.unchanged_count += unchanged_count
+
+
+def _get_prep_value(field, instance: models.Model):
+    # Values are compared as they would be written, e.g. naive datetimes
+    # of fixtures are made aware as their stored values are
+    return field.get_prep_value(field.value_from_object(instance))
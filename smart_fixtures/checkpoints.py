@@ -0,0 +1,92 @@
+import hashlib
+import json
+import os
+
+from smart_fixtures.utils import get_cache_dir, load_json_state, save_json_state
+
+CHECKPOINTS_VERSION = 1
+
+
+class LoadCheckpoints:
+    """
+    Progress of a chunked load (see `Command._load_in_chunks`), which lets
+    an interrupted load resume after its last committed chunk.
+
+    For every fixture file, the checkpoints store the number of objects
+    that were committed, the positions of the committed objects that had
+    deferred fields (which are saved again after all labels are loaded),
+    and the size and modification time of the file. Checkpoints of a file
+    that changed since they were recorded are ignored. Each load of
+    a different database or list of labels has its own checkpoints file
+    (see `get_checkpoints_path`), which is removed once the load finishes.
+    """
+
+    def __init__(self, path: str | None = None, files: dict | None = None):
+        self.path = str(path) if path is not None else None
+        self.files = files if files is not None else {}
+
+    @classmethod
+    def load(cls, path: str) -> 'LoadCheckpoints':
+        return cls(path, load_json_state(path, CHECKPOINTS_VERSION).get('files'))
+
+    def save(self):
+        if self.path is None:
+            return
+        save_json_state(self.path, CHECKPOINTS_VERSION, {'files': self.files})
+
+    def delete(self):
+        self.files = {}
+        if self.path is not None and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def get_committed(self, fixture_file: str) -> tuple[int, list[int]]:
+        """
+        Returns the number of committed objects of `fixture_file` and the
+        positions of the committed objects with deferred fields, or nothing
+        committed if the file changed since the checkpoint was recorded.
+        """
+        checkpoint = self.files.get(os.path.abspath(fixture_file))
+        if not checkpoint or checkpoint['stat'] != _get_stat(fixture_file):
+            return 0, []
+        return checkpoint['objects'], checkpoint['deferred']
+
+    def record(self, fixture_file: str, objects: int, deferred: list[int]):
+        """
+        Records that the first `objects` objects of `fixture_file` are
+        committed, and saves the checkpoints.
+        """
+        self.files[os.path.abspath(fixture_file)] = {
+            'stat': _get_stat(fixture_file),
+            'objects': objects,
+            'deferred': deferred,
+        }
+        self.save()
+
+
+def get_checkpoints_path(database: str, fixture_labels) -> str:
+    key = hashlib.sha256(
+        json.dumps([database, list(fixture_labels)]).encode()
+    ).hexdigest()
+    return os.path.join(get_cache_dir(), 'checkpoints', f'{key}.json')
+
+
+def iter_chunks(objects, chunk_size: int):
+    """
+    Yields lists of at most `chunk_size` consecutive objects.
+    """
+    chunk = []
+    for obj in objects:
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _get_stat(fixture_file: str) -> list[int] | None:
+    try:
+        fixture_stat = os.stat(fixture_file)
+    except OSError:
+        return None
+    return [fixture_stat.st_size, fixture_stat.st_mtime_ns]
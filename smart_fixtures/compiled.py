@@ -0,0 +1,160 @@
+"""
+Serializer of compiled fixtures, i.e. fixtures converted into pickles of
+the objects in Django's "python" serialization format.
+
+Parsing YAML (or large JSON) fixtures can take much longer than loading
+the objects. Compiled fixtures are created by "compilefixtures" command
+in the cache directory (see `get_cache_dir`), and "loaddata" command
+loads them instead of their sources as long as the sources did not
+change since they were compiled. Model labels and field names are
+interned, so each of them is stored only once per compiled fixture.
+
+Compiled fixtures are loaded with pickle, so the cache directory must
+not be writable by anyone who is not trusted to run code.
+"""
+import hashlib
+import io
+import json
+import os
+import pickle
+import sys
+
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.python import Deserializer as PythonDeserializer
+from django.core.serializers.python import Serializer as PythonSerializer
+
+from smart_fixtures.utils import get_cache_dir
+
+COMPILED_FORMAT = 'compiled'
+COMPILED_VERSION = 1
+PICKLE_PROTOCOL = 5
+
+
+class Serializer(PythonSerializer):
+    """
+    Writes objects as a compiled fixture to a binary stream.
+    """
+
+    internal_use_only = True
+    stream_class = io.BytesIO
+
+    def end_serialization(self):
+        _dump(self.stream, {'version': COMPILED_VERSION}, self.objects)
+
+    def getvalue(self):
+        return self.stream.getvalue()
+
+
+def Deserializer(stream_or_string, **options):
+    if isinstance(stream_or_string, bytes):
+        stream_or_string = io.BytesIO(stream_or_string)
+    try:
+        yield from PythonDeserializer(
+            load_compiled_objects(stream_or_string), **options
+        )
+    except (GeneratorExit, DeserializationError):
+        raise
+    except Exception as exc:
+        raise DeserializationError() from exc
+
+
+def load_compiled_objects(stream) -> list[dict]:
+    header = pickle.load(stream)
+    if header.get('version') != COMPILED_VERSION:
+        raise ValueError(
+            'The fixture was compiled by another version of '
+            'django-smart-fixtures, run "compilefixtures" command again'
+        )
+    return pickle.load(stream)
+
+
+def get_compiled_path(fixture_file: str) -> str:
+    key = hashlib.sha256(os.path.abspath(fixture_file).encode()).hexdigest()
+    return os.path.join(get_cache_dir(), 'compiled', f'{key}.{COMPILED_FORMAT}')
+
+
+def get_compiled_fixture(fixture_file: str) -> str | None:
+    """
+    Returns the path of the compiled fixture of `fixture_file`, or None if
+    the fixture was not compiled since it last changed.
+    """
+    compiled_path = get_compiled_path(fixture_file)
+    try:
+        fixture_stat = os.stat(fixture_file)
+        with open(compiled_path, 'rb') as compiled:
+            header = pickle.load(compiled)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if header != _get_header(fixture_file, fixture_stat):
+        return None
+    return compiled_path
+
+
+def compile_fixture(fixture_file: str, fixture, ser_fmt: str) -> str:
+    """
+    Compiles `fixture_file` from the opened `fixture` stream in `ser_fmt`
+    format (one of `COMPILABLE_FORMATS`) and returns the compiled path.
+    """
+    fixture_stat = os.stat(fixture_file)
+    objects = _intern_objects(_SOURCE_READERS[ser_fmt](fixture))
+
+    compiled_path = get_compiled_path(fixture_file)
+    os.makedirs(os.path.dirname(compiled_path), exist_ok=True)
+    tmp_path = f'{compiled_path}.tmp'
+    with open(tmp_path, 'wb') as compiled:
+        _dump(compiled, _get_header(fixture_file, fixture_stat), objects)
+    os.replace(tmp_path, compiled_path)
+    return compiled_path
+
+
+def _get_header(fixture_file: str, fixture_stat) -> dict:
+    return {
+        'version': COMPILED_VERSION,
+        'source': os.path.abspath(fixture_file),
+        'size': fixture_stat.st_size,
+        'mtime_ns': fixture_stat.st_mtime_ns,
+    }
+
+
+def _dump(stream, header: dict, objects: list[dict]):
+    pickle.dump(header, stream, protocol=PICKLE_PROTOCOL)
+    pickle.dump(objects, stream, protocol=PICKLE_PROTOCOL)
+
+
+def _intern_objects(objects) -> list[dict]:
+    # Pickle stores equal strings once only if they are the same object
+    interned_objects = []
+    for obj in objects:
+        obj = {sys.intern(key): value for key, value in obj.items()}
+        obj['model'] = sys.intern(obj['model'])
+        if obj.get('fields'):
+            obj['fields'] = {
+                sys.intern(name): value for name, value in obj['fields'].items()
+            }
+        interned_objects.append(obj)
+    return interned_objects
+
+
+def _read_json(fixture) -> list[dict]:
+    return json.load(fixture)
+
+
+def _read_jsonl(fixture) -> list[dict]:
+    return [json.loads(line) for line in fixture if line.strip()]
+
+
+def _read_yaml(fixture) -> list[dict]:
+    import yaml
+    from django.core.serializers.pyyaml import SafeLoader
+
+    return yaml.load(fixture, Loader=SafeLoader) or []
+
+
+# Formats whose parsed content is the input of Django's "python" deserializer
+_SOURCE_READERS = {
+    'json': _read_json,
+    'jsonl': _read_jsonl,
+    'yaml': _read_yaml,
+}
+
+COMPILABLE_FORMATS = tuple(_SOURCE_READERS)
@@ -0,0 +1,229 @@
+import functools
+import os
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.management import CommandError
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from smart_fixtures.bulk import DEFAULT_BULK_BATCH_SIZE
+from smart_fixtures.media import COPY, MEDIA_STRATEGIES, MEDIA_SYNC_MODES
+from smart_fixtures.storage import get_storage
+
+# Keys of FIXTURES settings variable
+FIXTURES_KEYS = (
+    'labels',
+    'media',
+    'media_sync',
+    'media_workers',
+    'media_report',
+    'background_media',
+    'async_media',
+    'fixtures_cache',
+    'fixtures_index',
+    'bulk',
+    'bulk_batch_size',
+    'upsert_changed',
+    'chunk_size',
+    'parallel',
+    'snapshot',
+    'fast_load',
+    'deduplicate',
+    'cache_dir',
+)
+
+# Keys of "media" entries in FIXTURES settings variable
+MEDIA_KEYS = (
+    'src',
+    'dest',
+    'recursive',
+    'include',
+    'exclude',
+    'strategy',
+    'referenced_only',
+    'storage',
+)
+
+
+@dataclass(frozen=True)
+class FixturesConfig:
+    """
+    Validated FIXTURES settings variable (see `get_fixtures_config`).
+    """
+
+    labels: tuple[str, ...] = ()
+    media: tuple[dict, ...] = ()
+    media_sync: str | None = None
+    media_workers: int = 1
+    media_report: str | None = None
+    background_media: bool = False
+    async_media: bool = False
+    fixtures_cache: bool = False
+    fixtures_index: bool = False
+    bulk: bool = False
+    bulk_batch_size: int = DEFAULT_BULK_BATCH_SIZE
+    upsert_changed: bool = False
+    chunk_size: int | None = None
+    parallel: int = 1
+    snapshot: bool = False
+    fast_load: bool = False
+    deduplicate: bool = False
+
+    @classmethod
+    def from_settings(cls, fixtures_settings: dict) -> 'FixturesConfig':
+        """
+        Returns the config of `fixtures_settings`, or raises CommandError
+        listing all invalid values.
+        """
+        errors = [
+            f'Unknown key "{key}" in FIXTURES settings variable, expected '
+            f'one of: {", ".join(FIXTURES_KEYS)}'
+            for key in fixtures_settings if key not in FIXTURES_KEYS
+        ]
+        for key in ('media_report', 'cache_dir'):
+            value = fixtures_settings.get(key)
+            if value is not None and not isinstance(value, (str, os.PathLike)):
+                errors.append(f'Invalid "{key}" value {value!r}, expected a path')
+
+        labels = fixtures_settings.get('labels', ())
+        if not isinstance(labels, (list, tuple)):
+            # Reported when labels are loaded (see `Command._handle`)
+            labels = ()
+        for label in labels:
+            if not isinstance(label, str):
+                errors.append(f'Invalid fixture label "{label}", expected a string')
+
+        media = fixtures_settings.get('media', [])
+        if not isinstance(media, (list, tuple)):
+            errors.append('Invalid "media" value, expected a list of dictionaries')
+            media = []
+        for media_dir in media:
+            errors.extend(_get_media_errors(media_dir))
+
+        media_sync = fixtures_settings.get('media_sync')
+        if media_sync and media_sync not in MEDIA_SYNC_MODES:
+            errors.append(
+                f'Invalid "media_sync" value "{media_sync}" in FIXTURES settings '
+                f'variable, expected one of: {", ".join(MEDIA_SYNC_MODES)}'
+            )
+
+        positive_ints = {}
+        for key, description, default in [
+            ('media_workers', 'number of media workers', 1),
+            ('bulk_batch_size', 'bulk batch size', DEFAULT_BULK_BATCH_SIZE),
+            ('parallel', 'number of parallel workers', 1),
+        ]:
+            value = fixtures_settings.get(key, default)
+            error = get_positive_int_error(value, description)
+            if error:
+                errors.append(error)
+            positive_ints[key] = value
+
+        chunk_size = fixtures_settings.get('chunk_size')
+        if chunk_size is not None:
+            error = get_positive_int_error(chunk_size, 'chunk size')
+            if error:
+                errors.append(error)
+
+        if errors:
+            raise CommandError(
+                'Invalid FIXTURES settings variable:\n'
+                + '\n'.join(f'- {error}' for error in errors)
+            )
+        return cls(
+            labels=tuple(labels),
+            media=tuple(media),
+            media_sync=media_sync or None,
+            media_report=fixtures_settings.get('media_report'),
+            background_media=bool(fixtures_settings.get('background_media')),
+            async_media=bool(fixtures_settings.get('async_media')),
+            fixtures_cache=bool(fixtures_settings.get('fixtures_cache')),
+            fixtures_index=bool(fixtures_settings.get('fixtures_index')),
+            bulk=bool(fixtures_settings.get('bulk')),
+            upsert_changed=bool(fixtures_settings.get('upsert_changed')),
+            chunk_size=chunk_size,
+            snapshot=bool(fixtures_settings.get('snapshot')),
+            fast_load=bool(fixtures_settings.get('fast_load')),
+            deduplicate=bool(fixtures_settings.get('deduplicate')),
+            **positive_ints,
+        )
+
+    def get_missing_media_sources(self) -> list[str]:
+        return [
+            str(media_dir['src']) for media_dir in self.media
+            if not os.path.exists(media_dir['src'])
+        ]
+
+
+@functools.cache
+def get_fixtures_config() -> FixturesConfig:
+    """
+    Returns the config of FIXTURES settings variable, which is validated
+    once and cached until the settings change. A missing (or not a
+    dictionary) FIXTURES settings variable has the default config.
+    """
+    fixtures_settings = getattr(settings, 'FIXTURES', None)
+    if not isinstance(fixtures_settings, dict):
+        return FixturesConfig()
+    return FixturesConfig.from_settings(fixtures_settings)
+
+
+def get_fixtures_setting(name: str):
+    """
+    Returns a single value of FIXTURES settings variable, validated like
+    `get_fixtures_config` does, without validating the other values. Used
+    when labels are passed to the "loaddata" command, so that e.g. an
+    invalid media entry doesn't prevent loading them.
+    """
+    fixtures_settings = getattr(settings, 'FIXTURES', None)
+    if not isinstance(fixtures_settings, dict) or name not in fixtures_settings:
+        return getattr(FixturesConfig(), name)
+    config = FixturesConfig.from_settings({name: fixtures_settings[name]})
+    return getattr(config, name)
+
+
+@receiver(setting_changed)
+def _clear_fixtures_config(setting, **kwargs):
+    if setting == 'FIXTURES':
+        get_fixtures_config.cache_clear()
+
+
+def get_positive_int_error(value, description: str) -> str | None:
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 1:
+        return None
+    return f'Invalid {description} "{value}", expected a positive integer'
+
+
+def _get_media_errors(media_dir) -> list[str]:
+    if not isinstance(media_dir, dict):
+        return [f'Invalid media entry {media_dir!r}, expected a dictionary']
+    missing_keys = [key for key in ('src', 'dest') if key not in media_dir]
+    if missing_keys:
+        return [
+            f'Media entry {media_dir!r} is missing '
+            f'{", ".join(f"{key!r}" for key in missing_keys)}'
+        ]
+
+    src = media_dir['src']
+    errors = [
+        f'Unknown key "{key}" in media entry for "{src}", '
+        f'expected one of: {", ".join(MEDIA_KEYS)}'
+        for key in media_dir if key not in MEDIA_KEYS
+    ]
+    strategy = media_dir.get('strategy', COPY)
+    if strategy not in MEDIA_STRATEGIES:
+        errors.append(
+            f'Invalid media strategy "{strategy}" for "{src}" '
+            f'in FIXTURES settings variable, expected one of: '
+            f'{", ".join(MEDIA_STRATEGIES)}'
+        )
+    if media_dir.get('storage') is not None:
+        try:
+            get_storage(media_dir['storage'])
+        except ValueError as error:
+            errors.append(
+                f'Invalid media storage for "{src}" in '
+                f'FIXTURES settings variable: {error}'
+            )
+    return errors
@@ -0,0 +1,178 @@
+import itertools
+from array import array
+
+from django.apps import apps
+from django.core.exceptions import ValidationError
+
+# Range of primary keys stored in arrays of signed 64-bit integers
+MIN_INT_PK = -2 ** 63
+MAX_INT_PK = 2 ** 63 - 1
+
+
+class ObjectDeduplicator:
+    """
+    Finds objects that are defined more than once in the loaded fixtures
+    (e.g. base fixtures overridden by environment specific ones), so that
+    only their last definition is saved instead of every one of them.
+
+    All objects are read with `add_objects` before the fixtures are loaded,
+    in the order they are loaded in. JSON, JSON Lines, YAML and XML
+    fixtures are read one object at a time, compiled fixtures as a whole
+    (see `read_fixture_objects`). Each model gets a compact index of its
+    primary keys (see `PrimaryKeyIndex`), and `finish` keeps only the
+    primary keys defined more than once, with a bit mask of the definitions
+    that must be saved. While the fixtures are loaded, `is_superseded`
+    counts the definitions of each object and tells which ones to skip.
+
+    Saving an object overwrites all of its fields, but not its many-to-many
+    relations missing from the fixture, so the last definition that sets
+    each many-to-many field is saved as well. Models with objects without
+    a primary key (e.g. with natural keys) are never deduplicated, because
+    their primary keys are only known once the objects are deserialized.
+    """
+
+    def __init__(self):
+        self.redundant_count = 0
+        self.skipped_count = 0
+        self._indexes = {}
+        self._ignored_models = set()
+        # Bit masks of the definitions to save of objects defined more
+        # than once, and numbers of definitions deserialized so far
+        self._saved_definitions = {}
+        self._definition_counts = {}
+
+    def add_objects(self, objects):
+        """
+        Adds serialized objects (see `read_fixture_objects`) in the order
+        they are loaded in.
+        """
+        for obj in objects:
+            self._add_object(obj)
+
+    def _add_object(self, obj: dict):
+        try:
+            model = apps.get_model(obj.get('model'))
+        except (AttributeError, LookupError, ValueError):
+            return
+        model = model._meta.concrete_model
+        if model in self._ignored_models:
+            return
+        try:
+            pk = model._meta.pk.to_python(obj['pk'])
+        except (KeyError, TypeError, ValidationError):
+            pk = None
+        if pk is None:
+            self._ignored_models.add(model)
+            self._indexes.pop(model, None)
+            return
+
+        index = self._indexes.get(model)
+        if index is None:
+            index = self._indexes[model] = PrimaryKeyIndex(
+                {field.name for field in model._meta.many_to_many}
+            )
+        index.add(pk, obj.get('fields') or {})
+
+    def finish(self):
+        """
+        Builds the index of objects defined more than once, after all
+        objects were added, and frees the primary key indexes.
+        """
+        for model, index in self._indexes.items():
+            m2m_definitions = index.get_m2m_definitions()
+            for pk, count in index.get_duplicate_counts().items():
+                saved = 1 << (count - 1)
+                for definition in m2m_definitions.get(pk, {}).values():
+                    saved |= 1 << definition
+                self._saved_definitions[model, pk] = saved
+                self.redundant_count += count - saved.bit_count()
+        self._indexes = {}
+
+    def is_superseded(self, instance) -> bool:
+        """
+        Returns whether the deserialized `instance` is redefined later and
+        doesn't have to be saved. Must be called once for each deserialized
+        object, in the order they are loaded in.
+        """
+        key = (instance._meta.concrete_model, instance.pk)
+        saved = self._saved_definitions.get(key)
+        if saved is None:
+            return False
+        definition = self._definition_counts.get(key, 0)
+        self._definition_counts[key] = definition + 1
+        if saved >> definition & 1:
+            return False
+        self.skipped_count += 1
+        return True
+
+
+class PrimaryKeyIndex:
+    """
+    Primary keys of the objects of a model, in the order they are defined.
+
+    Integer primary keys are appended to an array of 8 bytes per key, which
+    is sorted to count them once all objects are added. Other primary keys
+    (e.g. strings or UUIDs) are kept in a set, and counted as they are added
+    only if they are defined more than once. Objects that set many-to-many
+    fields are recorded with the names of the fields.
+    """
+
+    def __init__(self, m2m_names: set[str]):
+        self.m2m_names = m2m_names
+        self.int_pks = array('q')
+        self.other_pks = set()
+        self.other_counts = {}
+        # Positions of integer primary keys that set many-to-many fields
+        self.int_m2m_positions = {}
+        # Definitions of other primary keys that set many-to-many fields
+        self.other_m2m_definitions = {}
+
+    def add(self, pk, fields: dict):
+        m2m_names = [name for name in fields if name in self.m2m_names]
+        if type(pk) is int and MIN_INT_PK <= pk <= MAX_INT_PK:
+            if m2m_names:
+                self.int_m2m_positions[len(self.int_pks)] = m2m_names
+            self.int_pks.append(pk)
+            return
+
+        definition = 0
+        if pk in self.other_pks:
+            definition = self.other_counts.get(pk, 1)
+            self.other_counts[pk] = definition + 1
+        else:
+            self.other_pks.add(pk)
+        for name in m2m_names:
+            self.other_m2m_definitions.setdefault(pk, {})[name] = definition
+
+    def get_duplicate_counts(self) -> dict:
+        """
+        Returns the numbers of definitions of primary keys defined more
+        than once.
+        """
+        counts = dict(self.other_counts)
+        for pk, pks in itertools.groupby(sorted(self.int_pks)):
+            count = sum(1 for _ in pks)
+            if count > 1:
+                counts[pk] = count
+        return counts
+
+    def get_m2m_definitions(self) -> dict:
+        """
+        Returns the last definition that sets each many-to-many field of
+        the objects, by primary key.
+        """
+        m2m_definitions = dict(self.other_m2m_definitions)
+        if not self.int_m2m_positions:
+            return m2m_definitions
+        m2m_pks = {
+            self.int_pks[position] for position in self.int_m2m_positions
+        }
+        definition_counts = {}
+        for position, pk in enumerate(self.int_pks):
+            if pk not in m2m_pks:
+                continue
+            definition = definition_counts.get(pk, 0)
+            definition_counts[pk] = definition + 1
+            for name in self.int_m2m_positions.get(position, ()):
+                m2m_definitions.setdefault(pk, {})[name] = definition
+        return m2m_definitions
@@ -0,0 +1,224 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+from django.db import transaction
+
+from smart_fixtures.utils import load_json_state, save_json_state
+
+if TYPE_CHECKING:
+    from smart_fixtures.profiling import LoadProfile
+
+DROPPED_INDEXES_VERSION = 1
+
+# PRAGMAs applied to SQLite databases while fixtures are being loaded
+SQLITE_BULK_LOAD_PRAGMAS = {
+    'journal_mode': 'MEMORY',
+    'synchronous': 'OFF',
+    'temp_store': 'MEMORY',
+}
+
+
+@contextmanager
+def fast_load(
+    connection,
+    tables: list[str] | None,
+    profile: 'LoadProfile | None' = None,
+    state_path: str | None = None,
+    atomic: bool = True,
+):
+    """
+    Prepares the database for loading a lot of rows into `tables`.
+
+    Non-unique secondary indexes of the tables are dropped, and created
+    again after the load (even if it fails), so they are built once
+    instead of being updated for every row. Indexes are managed only on
+    SQLite and PostgreSQL, and not at all if `tables` is None.
+
+    On PostgreSQL, where DDL is transactional, the indexes are dropped,
+    the rows loaded and the indexes created in a single transaction if
+    `atomic` is True, so killing the process rolls the drop back. Otherwise
+    (and on SQLite), the definitions of the dropped indexes are saved to
+    `state_path` before they are dropped, so that the indexes of a killed
+    load can be created by `restore_dropped_indexes`.
+
+    On SQLite, `SQLITE_BULK_LOAD_PRAGMAS` are applied for the duration of
+    the load and the previous values are restored afterward. PRAGMAs are
+    not changed in a transaction, where SQLite does not allow it.
+
+    Yields the number of dropped indexes.
+    """
+    pragmas = _set_sqlite_pragmas(connection)
+    try:
+        if atomic and connection.vendor == 'postgresql':
+            with transaction.atomic(using=connection.alias):
+                with _dropped_indexes(connection, tables, profile) as count:
+                    yield count
+        else:
+            with _dropped_indexes(
+                connection, tables, profile, state_path
+            ) as count:
+                yield count
+    finally:
+        _restore_sqlite_pragmas(connection, pragmas)
+
+
+def restore_dropped_indexes(connection, state_path: str) -> int:
+    """
+    Creates the indexes that `fast_load` dropped and did not create again,
+    because its process was killed. Returns the number of created indexes.
+    """
+    indexes = _get_dropped_indexes(state_path, connection.alias)
+    if not indexes:
+        return 0
+    get_indexes = _INDEX_READERS.get(connection.vendor)
+    missing_indexes = []
+    if get_indexes is not None:
+        with connection.cursor() as cursor:
+            existing_names = {
+                name
+                for table in {table for table, _, _ in indexes}
+                for name, _ in get_indexes(cursor, table)
+            }
+        missing_indexes = [
+            index for index in indexes if index[1] not in existing_names
+        ]
+        _create_indexes(connection, missing_indexes)
+    _save_dropped_indexes(state_path, connection.alias, [])
+    return len(missing_indexes)
+
+
+@contextmanager
+def _dropped_indexes(
+    connection,
+    tables: list[str] | None,
+    profile: 'LoadProfile | None',
+    state_path: str | None = None,
+):
+    indexes = _get_indexes(connection, tables or [])
+    if state_path and indexes:
+        _save_dropped_indexes(state_path, connection.alias, indexes)
+    _drop_indexes(connection, indexes)
+    try:
+        yield len(indexes)
+    finally:
+        start = time.perf_counter()
+        _create_indexes(connection, indexes)
+        if state_path and indexes:
+            _save_dropped_indexes(state_path, connection.alias, [])
+        if profile and indexes:
+            profile.add_phase(
+                'index_rebuild',
+                time.perf_counter() - start,
+                objects=len(indexes),
+            )
+
+
+def _set_sqlite_pragmas(connection) -> dict[str, str]:
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        return {}
+    previous_values = {}
+    with connection.cursor() as cursor:
+        for pragma, value in SQLITE_BULK_LOAD_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma}')
+            previous_values[pragma] = cursor.fetchone()[0]
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+    return previous_values
+
+
+def _restore_sqlite_pragmas(connection, previous_values: dict[str, str]):
+    if not previous_values:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in previous_values.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
+
+
+def _get_indexes(connection, tables: list[str]) -> list[list[str]]:
+    """
+    Returns the tables, names and definitions (SQL statements that create
+    them) of non-unique secondary indexes of the tables.
+    """
+    get_indexes = _INDEX_READERS.get(connection.vendor)
+    if get_indexes is None:
+        return []
+    with connection.cursor() as cursor:
+        return [
+            [table, name, definition]
+            for table in tables
+            for name, definition in get_indexes(cursor, table)
+        ]
+
+
+def _drop_indexes(connection, indexes: list[list[str]]):
+    if not indexes:
+        return
+    with connection.cursor() as cursor:
+        for _, name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+
+def _create_indexes(connection, indexes: list[list[str]]):
+    if not indexes:
+        return
+    with connection.cursor() as cursor:
+        for _, _, definition in indexes:
+            cursor.execute(definition)
+
+
+def _get_dropped_indexes(state_path: str, alias: str) -> list[list[str]]:
+    state = load_json_state(state_path, DROPPED_INDEXES_VERSION)
+    return state.get('databases', {}).get(alias, [])
+
+
+def _save_dropped_indexes(state_path: str, alias: str, indexes: list[list[str]]):
+    state = load_json_state(state_path, DROPPED_INDEXES_VERSION)
+    databases = state.get('databases', {})
+    if indexes:
+        databases[alias] = indexes
+    else:
+        databases.pop(alias, None)
+    if databases:
+        save_json_state(
+            state_path, DROPPED_INDEXES_VERSION, {'databases': databases}
+        )
+    elif os.path.exists(state_path):
+        os.remove(state_path)
+
+
+def _get_sqlite_indexes(cursor, table: str) -> list[tuple[str, str]]:
+    # Indexes of primary keys and unique constraints have no SQL
+    cursor.execute(
+        'SELECT name, sql FROM sqlite_master '
+        'WHERE type = %s AND tbl_name = %s AND sql IS NOT NULL',
+        ['index', table],
+    )
+    return [
+        (name, sql) for name, sql in cursor.fetchall()
+        if not sql.upper().startswith('CREATE UNIQUE')
+    ]
+
+
+def _get_postgresql_indexes(cursor, table: str) -> list[tuple[str, str]]:
+    cursor.execute(
+        'SELECT index_class.relname, pg_get_indexdef(pg_index.indexrelid) '
+        'FROM pg_index '
+        'JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid '
+        'JOIN pg_class table_class ON table_class.oid = pg_index.indrelid '
+        'WHERE table_class.relname = %s '
+        'AND pg_table_is_visible(table_class.oid) '
+        'AND NOT pg_index.indisunique AND NOT pg_index.indisprimary '
+        'AND NOT EXISTS ('
+        'SELECT 1 FROM pg_constraint '
+        'WHERE pg_constraint.conindid = pg_index.indexrelid'
+        ')',
+        [table],
+    )
+    return list(cursor.fetchall())
+
+
+_INDEX_READERS = {
+    'sqlite': _get_sqlite_indexes,
+    'postgresql': _get_postgresql_indexes,
+}
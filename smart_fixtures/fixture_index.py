@@ -0,0 +1,76 @@
+import os
+import time
+
+from smart_fixtures.utils import load_json_state, save_json_state
+
+INDEX_VERSION = 1
+
+# Listings of directories modified more recently than this are not stored,
+# because a file added within the same timestamp tick would not change the
+# modification time of the directory
+MTIME_GRANULARITY_NS = 2_000_000_000
+
+
+class FixtureIndex:
+    """
+    Index of the files in fixture directories, which lets the "loaddata"
+    command resolve fixture labels with set lookups instead of globbing
+    every fixture directory for every label.
+
+    Each directory is listed once per index. When the index is persisted
+    (see `load` and `save`), listings are reused by later runs as long as
+    the modification time of the directory did not change, which happens
+    whenever a file is added to, removed from or renamed in it.
+    """
+
+    def __init__(self, path: str | None = None, entries: dict | None = None):
+        self.path = str(path) if path is not None else None
+        self.entries = entries if entries is not None else {}
+        self.changed = False
+        self._file_names = {}
+
+    @classmethod
+    def load(cls, path: str) -> 'FixtureIndex':
+        return cls(path, load_json_state(path, INDEX_VERSION).get('entries'))
+
+    def save(self):
+        if self.path is None or not self.changed:
+            return
+        save_json_state(self.path, INDEX_VERSION, {'entries': self.entries})
+        self.changed = False
+
+    def get_file_names(self, directory: str) -> frozenset[str]:
+        """
+        Returns names of the files in `directory`, which is empty if the
+        directory does not exist.
+        """
+        file_names = self._file_names.get(directory)
+        if file_names is None:
+            file_names = self._file_names[directory] = self._list(directory)
+        return file_names
+
+    def _list(self, directory: str) -> frozenset[str]:
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return frozenset()
+        entry = self.entries.get(directory)
+        if entry and entry['mtime_ns'] == mtime_ns:
+            return frozenset(entry['files'])
+
+        try:
+            with os.scandir(directory) as dir_entries:
+                file_names = [
+                    dir_entry.name
+                    for dir_entry in dir_entries
+                    if dir_entry.is_file()
+                ]
+        except OSError:
+            return frozenset()
+        if time.time_ns() - mtime_ns > MTIME_GRANULARITY_NS:
+            self.entries[directory] = {
+                'mtime_ns': mtime_ns,
+                'files': sorted(file_names),
+            }
+            self.changed = True
+        return frozenset(file_names)
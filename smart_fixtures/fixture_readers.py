@@ -0,0 +1,85 @@
+import json
+import zipfile
+
+from smart_fixtures.compiled import load_compiled_objects
+from smart_fixtures.json_stream import iter_json_array
+
+
+def read_fixture_objects(fixture, ser_fmt: str):
+    """
+    Returns an iterator of serialized objects in the `fixture` stream as
+    dictionaries with "model", "fields" and (if the object has one) "pk"
+    keys (without building model instances), or None if objects can't be
+    read from fixtures in `ser_fmt` format. Objects of JSON, JSON Lines,
+    YAML and XML fixtures are read one at a time, compiled fixtures are
+    read as a whole.
+    """
+    read_objects = _OBJECT_READERS.get(ser_fmt)
+    if read_objects is None:
+        return None
+    if isinstance(fixture, zipfile.ZipFile):
+        return _read_zip_objects(fixture, read_objects)
+    return read_objects(fixture)
+
+
+def _read_zip_objects(fixture, read_objects):
+    # Django's reader of zip fixtures reads its only member as a whole
+    with fixture.open(fixture.namelist()[0]) as member:
+        yield from read_objects(member)
+
+
+def _read_json_objects(fixture):
+    yield from iter_json_array(fixture)
+
+
+def _read_jsonl_objects(fixture):
+    for line in fixture:
+        if line.strip():
+            yield json.loads(line)
+
+
+def _read_yaml_objects(fixture):
+    import yaml
+
+    # Objects of the top-level list are composed one at a time, instead of
+    # composing the whole document like `yaml.safe_load`
+    loader = yaml.SafeLoader(fixture)
+    try:
+        loader.get_event()
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()
+        if not loader.check_event(yaml.SequenceStartEvent):
+            yield from loader.construct_document(loader.compose_node(None, None)) or []
+            return
+        loader.get_event()
+        while not loader.check_event(yaml.SequenceEndEvent):
+            yield loader.construct_document(loader.compose_node(None, None))
+    finally:
+        loader.dispose()
+
+
+def _read_xml_objects(fixture):
+    from xml.etree import ElementTree
+
+    fields = {}
+    for _, element in ElementTree.iterparse(fixture):
+        if element.tag == 'field':
+            fields[element.get('name')] = element.text
+        # Objects nested in many-to-many fields don't have a model
+        elif element.tag == 'object' and element.get('model'):
+            obj = {'model': element.get('model'), 'fields': fields}
+            if element.get('pk') is not None:
+                obj['pk'] = element.get('pk')
+            yield obj
+            fields = {}
+            element.clear()
+
+
+_OBJECT_READERS = {
+    'compiled': load_compiled_objects,
+    'json': _read_json_objects,
+    'jsonl': _read_jsonl_objects,
+    'yaml': _read_yaml_objects,
+    'xml': _read_xml_objects,
+}
@@ -0,0 +1,105 @@
+import hashlib
+import os
+
+from django.db.migrations.recorder import MigrationRecorder
+
+from smart_fixtures.media import get_file_hash
+from smart_fixtures.utils import load_json_state, save_json_state
+
+CACHE_VERSION = 2
+
+
+class FixturesCache:
+    """
+    Keeps track of fixture labels loaded by the "loaddata" command so that
+    labels which did not change since the previous run can be skipped.
+
+    For every loaded label, the cache stores the size, modification time and
+    content hash of each fixture file it resolved to, together with the state
+    of the database (its name and the applied migrations) and the options
+    that change which objects are loaded (e.g. "--exclude"). The cache is
+    grouped by database alias, so loading into one database does not affect
+    the others.
+    """
+
+    def __init__(self, path: str, entries: dict | None = None):
+        self.path = str(path)
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path: str) -> 'FixturesCache':
+        return cls(path, load_json_state(path, CACHE_VERSION).get('entries'))
+
+    def save(self):
+        save_json_state(self.path, CACHE_VERSION, {'entries': self.entries})
+
+    def get_fingerprint(
+        self,
+        database: str,
+        label: str,
+        fixture_files: list[str],
+        database_state: str,
+        load_options: dict,
+    ) -> dict:
+        """
+        Returns the fingerprint of `label` for its current `fixture_files`
+        and the `load_options` it's loaded with.
+        Content hashes are reused from the cache for files whose size and
+        modification time did not change, so unchanged files are not read.
+        """
+        record = self.entries.get(database, {}).get(label) or {}
+        recorded_files = record.get('files', {})
+        files = {}
+        for fixture_file in fixture_files:
+            file_stat = os.stat(fixture_file)
+            recorded_file = recorded_files.get(fixture_file)
+            if (
+                recorded_file
+                and recorded_file['size'] == file_stat.st_size
+                and recorded_file['mtime_ns'] == file_stat.st_mtime_ns
+            ):
+                sha256 = recorded_file['sha256']
+            else:
+                sha256 = get_file_hash(fixture_file)
+            files[fixture_file] = {
+                'size': file_stat.st_size,
+                'mtime_ns': file_stat.st_mtime_ns,
+                'sha256': sha256,
+            }
+        return {
+            'database_state': database_state,
+            'load_options': load_options,
+            'files': files,
+        }
+
+    def is_unchanged(self, database: str, label: str, fingerprint: dict) -> bool:
+        """
+        Returns True if `label` was loaded into `database` with the same
+        fixture file contents, database state and load options.
+        """
+        record = self.entries.get(database, {}).get(label)
+        if (
+            not record
+            or record['database_state'] != fingerprint['database_state']
+            or record['load_options'] != fingerprint['load_options']
+        ):
+            return False
+        return _get_hashes(record['files']) == _get_hashes(fingerprint['files'])
+
+    def record(self, database: str, label: str, fingerprint: dict):
+        self.entries.setdefault(database, {})[label] = fingerprint
+
+
+def get_database_state(connection) -> str:
+    """
+    Returns a hash of the database name and the migrations applied to it.
+    """
+    state_hash = hashlib.sha256(str(connection.settings_dict['NAME']).encode())
+    applied_migrations = MigrationRecorder(connection).applied_migrations()
+    for app_label, migration_name in sorted(applied_migrations):
+        state_hash.update(f'\n{app_label}.{migration_name}'.encode())
+    return state_hash.hexdigest()
+
+
+def _get_hashes(files: dict) -> dict:
+    return {path: file_record['sha256'] for path, file_record in files.items()}
@@ -0,0 +1,135 @@
+"""
+JSON serializer that deserializes fixture files incrementally.
+
+Django's JSON deserializer reads the whole file and parses it at once,
+so memory usage grows with the size of the fixture. This deserializer
+reads the file in chunks and yields objects of the top-level array one
+by one. Strings and bytes are deserialized by Django's deserializer,
+and serialization is left to Django's serializer.
+"""
+import codecs
+import json
+import re
+import zipfile
+
+from django.core.serializers.base import DeserializationError
+from django.core.serializers.json import Deserializer as JSONDeserializer
+from django.core.serializers.json import Serializer  # noqa: F401
+from django.core.serializers.python import Deserializer as PythonDeserializer
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Characters that may continue a number, e.g. "." of "1.5" or "e" of "1e5"
+NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+def Deserializer(stream_or_string, **options):
+    if isinstance(stream_or_string, (bytes, str)):
+        yield from JSONDeserializer(stream_or_string, **options)
+        return
+
+    try:
+        yield from PythonDeserializer(
+            iter_json_array(stream_or_string), **options
+        )
+    except (GeneratorExit, DeserializationError):
+        raise
+    except Exception as exc:
+        raise DeserializationError() from exc
+
+
+def iter_json_array(stream, chunk_size: int = READ_CHUNK_SIZE):
+    """
+    Yields elements of the JSON array read from `stream` one by one.
+
+    Only the unparsed part of the last `chunk_size` characters and the
+    element being parsed are kept in memory.
+    """
+    if isinstance(stream, zipfile.ZipFile):
+        # Django's reader of zip fixtures reads its only member as a whole
+        with stream.open(stream.namelist()[0]) as member:
+            yield from iter_json_array(member, chunk_size)
+        return
+
+    decoder = json.JSONDecoder()
+    reader = _StreamReader(stream, chunk_size)
+
+    pos = reader.skip_whitespace(0)
+    if reader.buffer.startswith('\ufeff', pos):
+        pos = reader.skip_whitespace(pos + 1)
+    if not reader.buffer.startswith('[', pos):
+        raise ValueError('Expected a JSON array')
+    pos = reader.skip_whitespace(pos + 1)
+    if reader.buffer.startswith(']', pos):
+        reader.expect_end(pos + 1)
+        return
+
+    while True:
+        while True:
+            try:
+                element, end = decoder.raw_decode(reader.buffer, pos)
+            except json.JSONDecodeError:
+                if reader.eof:
+                    raise
+            else:
+                if reader.eof or _is_complete(element, reader.buffer, end):
+                    break
+            pos = reader.read_chunk(pos)
+        yield element
+
+        pos = reader.skip_whitespace(end)
+        if reader.buffer.startswith(']', pos):
+            reader.expect_end(pos + 1)
+            return
+        if not reader.buffer.startswith(',', pos):
+            raise ValueError(f'Expected "," or "]" at position {pos}')
+        pos = reader.skip_whitespace(pos + 1)
+
+
+def _is_complete(element, buffer: str, end: int) -> bool:
+    # An element that ends with the buffer (e.g. a number) may continue in
+    # the next chunk, and so may a number decoded from the integer part of
+    # a number split by the end of the buffer (e.g. "1" of "1." of "1.5")
+    if end == len(buffer):
+        return False
+    return (
+        not isinstance(element, (int, float))
+        or isinstance(element, bool)
+        or buffer[end] not in NUMBER_CHARS
+    )
+
+
+class _StreamReader:
+
+    def __init__(self, stream, chunk_size: int):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.eof = False
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+
+    def read_chunk(self, pos: int) -> int:
+        """
+        Discards the buffer before `pos` and appends the next chunk of the
+        stream to it. Returns the position of `pos` in the new buffer.
+        """
+        chunk = self.stream.read(self.chunk_size)
+        self.eof = not chunk
+        if isinstance(chunk, bytes):
+            # A multibyte character may be split between chunks
+            chunk = self._decoder.decode(chunk, final=self.eof)
+        self.buffer = self.buffer[pos:] + chunk
+        return 0
+
+    def skip_whitespace(self, pos: int) -> int:
+        while True:
+            pos = WHITESPACE.match(self.buffer, pos).end()
+            if pos < len(self.buffer) or self.eof:
+                return pos
+            pos = self.read_chunk(pos)
+
+    def expect_end(self, pos: int):
+        if self.skip_whitespace(pos) < len(self.buffer):
+            raise ValueError('Extra data after the JSON array')
@@ -0,0 +1,96 @@
+import os
+from functools import partial
+
+from django.core.management import CommandError
+from django.core.management.commands.loaddata import READ_STDIN
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from smart_fixtures.compiled import (
+    COMPILABLE_FORMATS,
+    compile_fixture,
+    get_compiled_fixture,
+)
+from smart_fixtures.config import get_fixtures_config
+from smart_fixtures.management.commands.loaddata import Command as LoadDataCommand
+
+
+class Command(LoadDataCommand):
+    """
+    Compiles fixture files of the labels from "FIXTURES" settings variable
+    (or the given labels) into the cache directory, so "loaddata" command
+    loads them without parsing their sources. Fixtures that did not change
+    since they were compiled are skipped unless "--force" flag is used.
+
+    Only JSON, JSONL and YAML fixtures can be compiled.
+    """
+
+    help = (
+        'Compiles fixtures into a binary format that "loaddata" '
+        'command loads faster'
+    )
+
+    # Labels default to the labels from "FIXTURES" settings variable
+    missing_args_message = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'args',
+            metavar='fixture',
+            nargs='*',
+            help=(
+                'Fixture labels. Defaults to the labels from "FIXTURES" '
+                'settings variable.'
+            ),
+        )
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            choices=tuple(connections),
+            help='Nominates a specific database to look for fixtures of.',
+        )
+        parser.add_argument(
+            '--app',
+            dest='app_label',
+            help='Only look for fixtures in the specified app.',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Compile fixtures even if they did not change.',
+        )
+
+    def handle(self, *fixture_labels, **options):
+        self.profile = None
+        if not fixture_labels:
+            if not self._has_valid_settings():
+                raise CommandError(
+                    'Pass fixture labels or set FIXTURES settings variable '
+                    'to a valid dictionary with "labels" list or tuple'
+                )
+            fixture_labels = get_fixtures_config().labels
+        if READ_STDIN in fixture_labels:
+            raise CommandError('Fixtures cannot be compiled from stdin')
+
+        compiled_count = 0
+        unchanged_count = 0
+        for fixture_label in fixture_labels:
+            for fixture_file in self._find_fixture_files(fixture_label, options):
+                _, ser_fmt, _ = self.parse_name(os.path.basename(fixture_file))
+                if ser_fmt not in COMPILABLE_FORMATS:
+                    self.stdout.write(self.style.WARNING(
+                        f'Skipped "{fixture_file}", {ser_fmt} fixtures '
+                        f'cannot be compiled'
+                    ))
+                elif not options['force'] and get_compiled_fixture(fixture_file):
+                    unchanged_count += 1
+                else:
+                    self._read_fixture_file(
+                        fixture_file, partial(compile_fixture, fixture_file)
+                    )
+                    compiled_count += 1
+
+        self.fixture_index.save()
+        self.stdout.write(
+            f'Compiled {compiled_count} fixture file(s), '
+            f'{unchanged_count} up to date'
+        )
@@ -1,11 +1,52 @@
+import itertools
+import json
 import os
-import shutil
+import time
+import warnings
+from contextlib import ExitStack
+from typing import TYPE_CHECKING
 
 from django.conf import settings
+from django.core import serializers
+from django.core.management import CommandError
+from django.core.management.commands.loaddata import READ_STDIN, humanize
 from django.core.management.commands.loaddata import Command as LoadDataCommand
-from django.db import DEFAULT_DB_ALIAS, connections
+from django.core.management.utils import parse_apps_and_model_labels
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.utils.functional import cached_property
 
-from smart_fixtures.utils import create_copied_files_message
+from smart_fixtures.bulk import BulkObjectWriter
+from smart_fixtures.checkpoints import (
+    LoadCheckpoints,
+    get_checkpoints_path,
+    iter_chunks,
+)
+from smart_fixtures.compiled import COMPILED_FORMAT, get_compiled_fixture
+from smart_fixtures.config import (
+    FixturesConfig,
+    get_fixtures_config,
+    get_fixtures_setting,
+    get_positive_int_error,
+)
+from smart_fixtures.fixture_index import FixtureIndex
+from smart_fixtures.fixture_readers import read_fixture_objects
+from smart_fixtures.fixtures_cache import FixturesCache, get_database_state
+from smart_fixtures.media import MEDIA_SYNC_MODES, MediaInstaller
+from smart_fixtures.media_report import CopiedFilesReport
+from smart_fixtures.references import get_file_references
+from smart_fixtures.signals import fixtures_profiled
+from smart_fixtures.utils import (
+    create_copied_files_summary,
+    create_failed_files_message,
+    create_media_sync_message,
+    create_missing_files_message,
+    create_profile_message,
+    get_cache_dir,
+)
+
+if TYPE_CHECKING:
+    from smart_fixtures.deduplication import ObjectDeduplicator
+    from smart_fixtures.profiling import LoadProfile
 
 
 class Command(LoadDataCommand):
@@ -19,29 +60,35 @@ class Command(LoadDataCommand):
 
     Minimal settings example:
         FIXTURES = {
-            'labels': [ 'fixtures1', 'fixtures2' ]
+            'labels': ['fixtures1', 'fixtures2']
         }
 
-    Settings example with image directories:
-        FIXTURES = {
-            'labels': ['fixtures1', 'fixtures2'],
-            'media': [
-                {
-                    'src': BASE_DIR / 'my_app' / 'fixtures' / 'images',
-                    'dest': MEDIA_ROOT / 'my_app' / 'images',
-                },
-                {
-                    'src': BASE_DIR / 'my_other_app' / 'fixtures' / 'files',
-                    'dest': MEDIA_ROOT / 'my_other_app' / 'files',
-                },
-            ],
-        }
+    The other settings and flags (media entries, caching, bulk, chunked
+    and parallel loading, ...) are described in the README.
     """
 
     help = (
         'Overrides loaddata command to add '
         '--all flag for loading all fixtures'
     )
+    # Passed to the command in parallel worker processes
+    stealth_options = ('parallel_worker',)
+
+    # Options passed to "loaddata" command in parallel worker processes
+    PARALLEL_WORKER_OPTIONS = (
+        'database',
+        'app_label',
+        'ignore',
+        'exclude',
+        'format',
+        'verbosity',
+        'bulk',
+        'bulk_batch_size',
+        'upsert_changed',
+        'chunk_size',
+        'deduplicate',
+        'force',
+    )
 
     def add_arguments(self, parser):
         self._add_base_class_arguments(parser)
@@ -53,6 +100,149 @@ class Command(LoadDataCommand):
                 '"FIXTURES" settings variable'
             ),
         )
+        parser.add_argument(
+            '--media-sync',
+            choices=MEDIA_SYNC_MODES,
+            help=(
+                'Skip media files that did not change since the last run. '
+                'Overrides "media_sync" from "FIXTURES" settings variable.'
+            ),
+        )
+        parser.add_argument(
+            '--media-workers',
+            type=int,
+            help=(
+                'Number of threads used for copying media files. '
+                'Overrides "media_workers" from "FIXTURES" settings variable.'
+            ),
+        )
+        parser.add_argument(
+            '--media-report',
+            help=(
+                'Write copied media files to the given JSON Lines file. '
+                'Overrides "media_report" from "FIXTURES" settings variable.'
+            ),
+        )
+        parser.add_argument(
+            '--async-media',
+            action='store_true',
+            help=(
+                'Copy media files with an asyncio event loop, in at most '
+                '"media_workers" threads at once.'
+            ),
+        )
+        parser.add_argument(
+            '--referenced-media',
+            action='store_true',
+            help=(
+                'Install the media files that fixtures of the given labels '
+                'refer to, from media entries with "referenced_only" in '
+                '"FIXTURES" settings variable.'
+            ),
+        )
+        parser.add_argument(
+            '--background-media',
+            action='store_true',
+            help=(
+                'Copy media files in the background while fixtures '
+                'are being loaded.'
+            ),
+        )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help=(
+                'Write objects in batches with bulk inserts instead of '
+                'saving them one by one.'
+            ),
+        )
+        parser.add_argument(
+            '--bulk-batch-size',
+            type=int,
+            help=(
+                'Number of objects per model written in a single batch. '
+                'Overrides "bulk_batch_size" from "FIXTURES" settings variable.'
+            ),
+        )
+        parser.add_argument(
+            '--upsert-changed',
+            action='store_true',
+            help=(
+                'Write only new objects and objects that differ from their '
+                'existing rows, in batches (implies --bulk).'
+            ),
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            help=(
+                'Commit objects in transactions of the given number of objects '
+                'instead of a single transaction, and resume an interrupted '
+                'load after its last committed chunk. Overrides "chunk_size" '
+                'from "FIXTURES" settings variable.'
+            ),
+        )
+        parser.add_argument(
+            '--deduplicate',
+            action='store_true',
+            help=(
+                'Save only the last definition of objects that are defined '
+                'more than once in the loaded fixtures.'
+            ),
+        )
+        parser.add_argument(
+            '--parallel',
+            type=int,
+            help=(
+                'Number of worker processes loading independent fixture '
+                'labels in parallel. Overrides "parallel" from "FIXTURES" '
+                'settings variable.'
+            ),
+        )
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help=(
+                'Print how long each phase, fixture label and model took '
+                'to load.'
+            ),
+        )
+        parser.add_argument(
+            '--profile-output',
+            help='Write the profile to the given JSON file (implies --profile).',
+        )
+        parser.add_argument(
+            '--snapshot',
+            action='store_true',
+            help=(
+                'Restore the database snapshot captured after the fixtures '
+                'were last loaded, or capture it if the fixtures changed.'
+            ),
+        )
+        parser.add_argument(
+            '--fast-load',
+            action='store_true',
+            help=(
+                'Drop secondary indexes of the loaded tables and rebuild them '
+                'after the load, and apply bulk loading PRAGMAs on SQLite.'
+            ),
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help=(
+                'Load all fixtures even if they did not change since '
+                'the last run.'
+            ),
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help=(
+                'Validate "FIXTURES" settings variable and find the fixture '
+                'files of all labels without loading them.'
+            ),
+        )
 
     @staticmethod
     def _add_base_class_arguments(parser):
@@ -103,14 +293,867 @@ class Command(LoadDataCommand):
         )
 
     def handle(self, *fixture_labels, **options):
+        self.profile = None
+        if options.get('profile') or options.get('profile_output'):
+            from smart_fixtures.profiling import LoadProfile
+
+            self.profile = LoadProfile()
+        self.bulk_writer = self._get_bulk_writer(options, self.profile)
+        self.deduplicator = None
+        self.media_future = None
+
+        start = time.perf_counter()
+        self._handle(*fixture_labels, **options)
+        self.fixture_index.save()
+        if self.bulk_writer and self.bulk_writer.upsert_counts:
+            self._report_upsert_counts()
+        if self.profile:
+            self.profile.total_time = time.perf_counter() - start
+            self._report_profile(options)
+
+    def _handle(self, *fixture_labels, **options):
+        if options.get('check'):
+            self._check_settings(options)
+            return
         if options['all']:
             if not self._has_valid_settings():
                 self._print_invalid_settings_error()
             else:
+                config = get_fixtures_config()
+                self._check_media_sources(config)
+                self._find_labels_fixture_files(config.labels, options)
+                self._restore_dropped_indexes(options)
+                fixture_labels = config.labels
+                self._set_media_options(list(config.media), fixture_labels, options)
+                if options.get('background_media') or config.background_media:
+                    self._handle_with_background_media(fixture_labels, options)
+                    return
                 self._upload_media_files()
-                fixture_labels = settings.FIXTURES['labels']
+                self._load_fixtures(fixture_labels, options)
+                return
+
+        if options.get('referenced_media'):
+            self._install_referenced_media(fixture_labels, options)
+        elif (
+            options['verbosity'] >= 1
+            and not options.get('parallel_worker')
+            and self._has_referenced_only_media()
+            and self._get_referenced_media_files(
+                fixture_labels, options, report_undetected=False
+            )
+        ):
+            self.stdout.write(self.style.WARNING(
+                'Media files referenced by the fixtures are not installed, use '
+                '"--referenced-media" flag to install them from media entries '
+                'with "referenced_only"'
+            ))
+        self._load(fixture_labels, options)
+
+    def _set_media_options(self, media_dirs: list[dict], fixture_labels, options):
+        self.media_dirs = media_dirs
+        self.media_sync = (
+            options.get('media_sync') or get_fixtures_setting('media_sync')
+        )
+        self.media_workers = self._get_media_workers(options)
+        self.media_report_path = (
+            options.get('media_report') or get_fixtures_setting('media_report')
+        )
+        self.async_media = bool(
+            options.get('async_media') or get_fixtures_setting('async_media')
+        )
+        self.verbosity = options['verbosity']
+        self.referenced_media_files = None
+        if any(media_dir.get('referenced_only') for media_dir in media_dirs):
+            self.referenced_media_files = self._get_referenced_media_files(
+                fixture_labels, options
+            )
+
+    def _install_referenced_media(self, fixture_labels, options):
+        """
+        Installs the media files that fixtures with the given labels refer
+        to, from the media entries with "referenced_only" set to True (other
+        media entries are installed only with "--all" flag).
+        """
+        media_dirs = [
+            media_dir for media_dir in get_fixtures_setting('media')
+            if media_dir.get('referenced_only')
+        ]
+        if not media_dirs:
+            raise CommandError(
+                '"--referenced-media" flag requires media entries with '
+                '"referenced_only" set to True in FIXTURES settings variable'
+            )
+        self._check_media_sources(FixturesConfig(media=tuple(media_dirs)))
+        self._find_labels_fixture_files(fixture_labels, options)
+        self._set_media_options(media_dirs, fixture_labels, options)
+        self._upload_media_files()
+
+    @staticmethod
+    def _has_referenced_only_media() -> bool:
+        try:
+            media = get_fixtures_setting('media')
+        except CommandError:
+            # Invalid media entries are reported with "--all" flag
+            return False
+        return any(media_dir.get('referenced_only') for media_dir in media)
+
+    def _handle_with_background_media(self, fixture_labels, options):
+        """
+        Loads fixtures while media files are being copied in a background
+        thread. If loading fixtures fails, the error of the media files
+        installation (if any) is printed before the loading error is raised.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            media_future = self.media_future = executor.submit(
+                self._upload_media_files
+            )
+            try:
+                self._load_fixtures(fixture_labels, options)
+            except Exception:
+                media_error = media_future.exception()
+                if media_error:
+                    self.stderr.write(self.style.ERROR(
+                        f'Media files installation failed: {media_error}'
+                    ))
+                raise
+            media_future.result()
+
+    def _load_fixtures(self, fixture_labels, options):
+        """
+        Loads fixtures with the given labels. When "fixtures_cache" is
+        enabled, labels that did not change since they were last loaded
+        into the database with the same load options are skipped (unless
+        "--force" flag is used), and the loaded labels are recorded in the
+        cache. Later labels may overwrite objects of earlier ones, so all
+        labels after the first changed one are loaded again.
+        """
+        config = get_fixtures_config()
+        if options.get('snapshot') or config.snapshot:
+            self._load_fixtures_with_snapshot(fixture_labels, options)
+            return
+        if not config.fixtures_cache:
+            self._load_labels(fixture_labels, options)
+            return
+
+        database = options['database']
+        fixtures_cache = FixturesCache.load(
+            os.path.join(get_cache_dir(), 'fixtures_cache.json')
+        )
+        database_state = get_database_state(connections[database])
+        load_options = self._get_load_options(options)
+        fingerprints = {
+            label: fixtures_cache.get_fingerprint(
+                database,
+                label,
+                self._find_fixture_files(label, options),
+                database_state,
+                load_options,
+            )
+            for label in fixture_labels
+        }
+        changed_index = next(
+            (
+                index for index, label in enumerate(fixture_labels)
+                if options.get('force')
+                or not fixtures_cache.is_unchanged(
+                    database, label, fingerprints[label]
+                )
+            ),
+            len(fixture_labels),
+        )
+        labels_to_load = list(fixture_labels[changed_index:])
+
+        skipped_count = len(fixture_labels) - len(labels_to_load)
+        if skipped_count:
+            self.stdout.write(
+                f'Skipped {skipped_count} unchanged fixture label(s), '
+                f'use --force flag to load them anyway'
+            )
+        if not labels_to_load:
+            return
+
+        self._load_labels(labels_to_load, options)
+        for label in labels_to_load:
+            fixtures_cache.record(database, label, fingerprints[label])
+        fixtures_cache.save()
+
+    def _load_fixtures_with_snapshot(self, fixture_labels, options):
+        """
+        Restores the database snapshot of the given labels if the fixture
+        files and the database state did not change since it was captured.
+        Otherwise, loads the fixtures and captures a new snapshot.
+        """
+        from smart_fixtures.snapshots import DatabaseSnapshots, get_snapshot_key
+
+        connection = connections[options['database']]
+        snapshots = DatabaseSnapshots(
+            os.path.join(get_cache_dir(), 'snapshots'), connection
+        )
+        key = get_snapshot_key(
+            {
+                label: self._find_fixture_files(label, options)
+                for label in fixture_labels
+            },
+            get_database_state(connection),
+            self._get_load_options(options),
+        )
+        if not options.get('force') and snapshots.restore(key):
+            self.stdout.write(
+                f'Restored the database snapshot of {len(fixture_labels)} '
+                f'fixture label(s)'
+            )
+            return
+
+        self._load_labels(fixture_labels, options)
+        model_labels = self._get_labels_models(fixture_labels, options)
+        if snapshots.capture(key, model_labels):
+            self.stdout.write('Captured a database snapshot of the fixtures')
+        else:
+            self.stdout.write(self.style.WARNING(
+                'Database snapshot was not captured because models '
+                'of some fixtures are unknown'
+            ))
+
+    def _load_labels(self, fixture_labels, options):
+        """
+        Loads fixtures with the given labels, with secondary indexes of
+        the loaded tables dropped (and SQLite PRAGMAs for bulk loading
+        applied) if "--fast-load" flag is used.
+        """
+        if not (options.get('fast_load') or get_fixtures_config().fast_load):
+            self._load_label_groups(fixture_labels, options)
+            return
+
+        from smart_fixtures.fast_load import fast_load
+        from smart_fixtures.snapshots import get_table_models, get_tables
+
+        tables = None
+        model_labels = self._get_labels_models(fixture_labels, options)
+        if model_labels is not None:
+            try:
+                tables = get_tables(get_table_models(model_labels))
+            except LookupError:
+                pass
+        connection = connections[options['database']]
+        # Chunks and parallel workers commit their own transactions
+        atomic = (
+            self._get_chunk_size(options) is None
+            and self._get_parallel_workers(options) == 1
+        )
+        with fast_load(
+            connection,
+            tables,
+            self.profile,
+            self._get_dropped_indexes_path(),
+            atomic,
+        ) as index_count:
+            self._load_label_groups(fixture_labels, options)
+        if index_count:
+            self.stdout.write(
+                f'Rebuilt {index_count} secondary index(es) dropped for the load'
+            )
+
+    def _restore_dropped_indexes(self, options):
+        from smart_fixtures.fast_load import restore_dropped_indexes
+
+        index_count = restore_dropped_indexes(
+            connections[options['database']], self._get_dropped_indexes_path()
+        )
+        if index_count:
+            self.stdout.write(self.style.WARNING(
+                f'Recreated {index_count} secondary index(es) dropped by '
+                f'an interrupted load'
+            ))
+
+    @staticmethod
+    def _get_dropped_indexes_path() -> str:
+        return os.path.join(get_cache_dir(), 'dropped_indexes.json')
+
+    def _load_label_groups(self, fixture_labels, options):
+        """
+        Loads fixtures with the given labels, in parallel if "--parallel"
+        option is used and the labels can be split into independent groups.
+        """
+        workers = self._get_parallel_workers(options)
+        if workers > 1:
+            if connections[options['database']].vendor == 'sqlite':
+                self.stdout.write(self.style.WARNING(
+                    'Parallel loading is not supported on SQLite, '
+                    'fixtures are loaded sequentially'
+                ))
+            else:
+                from smart_fixtures.parallel import (
+                    group_labels,
+                    load_groups_in_parallel,
+                )
+
+                groups = group_labels({
+                    label: self._get_label_models(label, options)
+                    for label in fixture_labels
+                })
+                if len(groups) > 1:
+                    self.stdout.write(
+                        f'Loading {len(groups)} independent groups of '
+                        f'fixture labels in parallel'
+                    )
+                    # Processes must not be forked while another thread is
+                    # copying media files
+                    if self.media_future:
+                        from concurrent.futures import wait
+
+                        wait([self.media_future])
+                    group_times = load_groups_in_parallel(
+                        groups,
+                        workers,
+                        parallel_worker=True,
+                        **{
+                            key: options.get(key)
+                            for key in self.PARALLEL_WORKER_OPTIONS
+                        },
+                    )
+                    if self.profile:
+                        for group, seconds in zip(groups, group_times):
+                            self.profile.add_label(', '.join(group), seconds)
+                    return
+
+        self._load(fixture_labels, options)
+
+    def _load(self, fixture_labels, options):
+        if options.get('deduplicate') or get_fixtures_setting('deduplicate'):
+            self.deduplicator = self._get_deduplicator(fixture_labels, options)
+        chunk_size = self._get_chunk_size(options)
+        if chunk_size is None:
+            super().handle(*fixture_labels, **options)
+        else:
+            self._load_in_chunks(fixture_labels, options, chunk_size)
+        if (
+            self.deduplicator
+            and self.deduplicator.skipped_count
+            and options['verbosity'] >= 1
+        ):
+            self.stdout.write(
+                f'Skipped {self.deduplicator.skipped_count} redundant write(s) '
+                f'of objects redefined by later fixtures'
+            )
+
+    def _get_deduplicator(
+        self,
+        fixture_labels,
+        options,
+    ) -> 'ObjectDeduplicator | None':
+        """
+        Reads all objects of fixtures with the given labels, in the order
+        they are loaded in, to find the objects defined more than once (see
+        `ObjectDeduplicator`). Returns None if objects of some fixture file
+        can't be read, e.g. from stdin.
+        """
+        from smart_fixtures.deduplication import ObjectDeduplicator
+
+        deduplicator = ObjectDeduplicator()
+
+        def read_objects(fixture, ser_fmt) -> bool:
+            objects = read_fixture_objects(fixture, ser_fmt)
+            if objects is None:
+                return False
+            deduplicator.add_objects(objects)
+            return True
+
+        start = time.perf_counter()
+        for fixture_label in fixture_labels:
+            for fixture_file in self._find_fixture_files(fixture_label, options):
+                if fixture_file == READ_STDIN or not self._read_fixture_file(
+                    get_compiled_fixture(fixture_file) or fixture_file,
+                    read_objects,
+                ):
+                    self.stdout.write(self.style.WARNING(
+                        f'Objects are not deduplicated, because objects of '
+                        f'"{fixture_file}" cannot be read in advance'
+                    ))
+                    return None
+        deduplicator.finish()
+        if self.profile:
+            self.profile.add_phase(
+                'deduplication',
+                time.perf_counter() - start,
+                redundant_objects=deduplicator.redundant_count,
+            )
+        return deduplicator
+
+    def _load_in_chunks(self, fixture_labels, options, chunk_size: int):
+        """
+        Loads fixtures with the given labels like the base class, but commits
+        every `chunk_size` objects of a fixture file in their own transaction
+        instead of loading all labels in a single transaction.
+
+        Committed chunks are recorded in checkpoints (see `LoadCheckpoints`),
+        so running the command again with the same labels after it was
+        interrupted skips the committed objects (unless "--force" flag is
+        used). Objects with deferred fields are saved again after all labels
+        are loaded, including the committed ones. Checkpoints are not kept
+        when the command runs in a transaction, which nothing is committed by.
+        """
+        self.ignore = options['ignore']
+        self.using = options['database']
+        self.app_label = options['app_label']
+        self.verbosity = options['verbosity']
+        self.excluded_models, self.excluded_apps = parse_apps_and_model_labels(
+            options['exclude']
+        )
+        self.format = options['format']
+        self.fixture_count = 0
+        self.loaded_object_count = 0
+        self.fixture_object_count = 0
+        self.skipped_object_count = 0
+        self.models = set()
+        self.serialization_formats = serializers.get_public_serializer_formats()
+        self.objs_with_deferred_fields = []
+
+        connection = connections[self.using]
+        checkpoints = LoadCheckpoints()
+        if not connection.in_atomic_block:
+            checkpoints = LoadCheckpoints.load(
+                get_checkpoints_path(self.using, fixture_labels)
+            )
+            if options.get('force'):
+                checkpoints.delete()
+
+        for fixture_label in fixture_labels:
+            self._load_label_in_chunks(fixture_label, chunk_size, checkpoints)
+        if self.objs_with_deferred_fields:
+            with transaction.atomic(using=self.using):
+                for obj in self.objs_with_deferred_fields:
+                    if obj.deferred_fields:
+                        obj.save_deferred_fields(using=self.using)
+                    else:
+                        # A skipped object whose references exist by now
+                        obj.save(using=self.using)
+                self._check_constraints(connection, self.models)
+        # Models of the skipped objects are included, because the load that
+        # committed them did not finish
+        if self.models:
+            self.reset_sequences(connection, self.models)
+        checkpoints.delete()
+
+        if self.verbosity >= 1:
+            if self.skipped_object_count:
+                self.stdout.write(
+                    f'Resumed an interrupted load, skipped '
+                    f'{self.skipped_object_count} committed object(s)'
+                )
+            object_count = self.fixture_object_count - self.skipped_object_count
+            if object_count == self.loaded_object_count:
+                self.stdout.write(
+                    f'Installed {self.loaded_object_count} object(s) from '
+                    f'{self.fixture_count} fixture(s)'
+                )
+            else:
+                self.stdout.write(
+                    f'Installed {self.loaded_object_count} object(s) '
+                    f'(of {object_count}) from {self.fixture_count} fixture(s)'
+                )
+        if transaction.get_autocommit(self.using):
+            connection.close()
+
+    def _load_label_in_chunks(
+        self,
+        fixture_label,
+        chunk_size: int,
+        checkpoints: LoadCheckpoints,
+    ):
+        start = time.perf_counter()
+        loaded_object_count = self.loaded_object_count
+        for fixture_file, fixture_dir, fixture_name in self.find_fixtures(
+            fixture_label
+        ):
+            _, ser_fmt, cmp_fmt = self.parse_name(os.path.basename(fixture_file))
+            open_method, mode = self.compression_formats[cmp_fmt]
+            fixture = open_method(fixture_file, mode)
+            self.fixture_count += 1
+            committed, deferred = 0, []
+            if fixture_file != READ_STDIN:
+                committed, deferred = checkpoints.get_committed(fixture_file)
+            if self.verbosity >= 2:
+                self.stdout.write(
+                    f"Installing {ser_fmt} fixture '{fixture_name}' "
+                    f'from {humanize(fixture_dir)}.'
+                )
+            objects_in_fixture = 0
+            try:
+                objects = iter(serializers.deserialize(
+                    ser_fmt,
+                    fixture,
+                    using=self.using,
+                    ignorenonexistent=self.ignore,
+                    handle_forward_references=True,
+                ))
+                deferred_positions = set(deferred)
+                for obj in itertools.islice(objects, committed):
+                    self._skip_committed_obj(
+                        obj, objects_in_fixture in deferred_positions
+                    )
+                    objects_in_fixture += 1
+                for chunk in iter_chunks(objects, chunk_size):
+                    for position, obj in enumerate(chunk, objects_in_fixture):
+                        if obj.deferred_fields:
+                            deferred.append(position)
+                    self._save_chunk(chunk)
+                    objects_in_fixture += len(chunk)
+                    if fixture_file != READ_STDIN:
+                        checkpoints.record(
+                            fixture_file, objects_in_fixture, deferred
+                        )
+            except Exception as e:
+                if not isinstance(e, CommandError):
+                    e.args = (
+                        f"Problem installing fixture '{fixture_file}': {e}",
+                    )
+                raise
+            finally:
+                fixture.close()
+            self.fixture_object_count += objects_in_fixture
+            if objects_in_fixture == 0:
+                warnings.warn(
+                    f"No fixture data found for '{fixture_name}'. "
+                    f'(File format may be invalid.)',
+                    RuntimeWarning,
+                )
+
+        if self.profile:
+            self.profile.add_label(
+                fixture_label,
+                time.perf_counter() - start,
+                objects=self.loaded_object_count - loaded_object_count,
+                bytes=self._get_label_bytes(fixture_label),
+            )
+
+    def _skip_committed_obj(self, obj, has_deferred_fields: bool):
+        """
+        Tracks an object committed by an interrupted load, without saving
+        it again. If it had deferred fields when it
+        was saved, it's saved again after all labels are loaded (even if
+        the objects it references exist by now).
+        """
+        self.skipped_object_count += 1
+        # Superseded objects were not saved, but must be counted
+        if self.deduplicator and self.deduplicator.is_superseded(obj.object):
+            return
+        if (
+            obj.object._meta.app_config in self.excluded_apps
+            or type(obj.object) in self.excluded_models
+        ):
+            return
+        if router.allow_migrate_model(self.using, obj.object.__class__):
+            self.models.add(obj.object.__class__)
+        if has_deferred_fields:
+            self.objs_with_deferred_fields.append(obj)
+
+    def _save_chunk(self, chunk: list):
+        connection = connections[self.using]
+        models = set()
+        with transaction.atomic(using=self.using):
+            with connection.constraint_checks_disabled():
+                for obj in chunk:
+                    if self.save_obj(obj):
+                        self.loaded_object_count += 1
+                        models.add(obj.object.__class__)
+                if self.bulk_writer:
+                    self._flush_bulk_writer()
+            self._check_constraints(connection, models)
+
+    def _check_constraints(self, connection, models: set):
+        table_names = [model._meta.db_table for model in models]
+        try:
+            if not self.profile:
+                connection.check_constraints(table_names=table_names)
+                return
+            with self.profile.measure('constraint_checks'):
+                connection.check_constraints(table_names=table_names)
+        except Exception as e:
+            e.args = (f'Problem installing fixtures: {e}',)
+            raise
+
+    def _get_labels_models(self, fixture_labels, options) -> set[str] | None:
+        model_labels = set()
+        for fixture_label in fixture_labels:
+            label_models = self._get_label_models(fixture_label, options)
+            if label_models is None:
+                return None
+            model_labels |= label_models
+        return model_labels
+
+    def _get_label_models(self, fixture_label, options) -> set[str] | None:
+        from smart_fixtures.parallel import get_fixture_models
+
+        label_models = set()
+        for fixture_file in self._find_fixture_files(fixture_label, options):
+            if fixture_file == READ_STDIN:
+                return None
+            fixture_models = self._read_fixture_file(
+                fixture_file, get_fixture_models
+            )
+            if fixture_models is None:
+                return None
+            label_models |= fixture_models
+        return label_models
+
+    def _get_referenced_media_files(
+        self,
+        fixture_labels,
+        options,
+        report_undetected: bool = True,
+    ) -> set[str]:
+        """
+        Returns absolute paths of the media files that objects in fixtures
+        with the given labels refer to with their file fields. Objects of
+        models excluded with "--exclude" option are ignored. Fixtures whose
+        references can't be read are reported if `report_undetected` is True.
+        """
+        excluded_models, excluded_apps = parse_apps_and_model_labels(
+            options['exclude']
+        )
+
+        def read_references(fixture, ser_fmt) -> set[str] | None:
+            objects = read_fixture_objects(fixture, ser_fmt)
+            if objects is None:
+                return None
+            return get_file_references(objects, excluded_models, excluded_apps)
+
+        referenced_files = set()
+        for fixture_label in fixture_labels:
+            for fixture_file in self._find_fixture_files(fixture_label, options):
+                references = None
+                if fixture_file != READ_STDIN:
+                    references = self._read_fixture_file(
+                        fixture_file, read_references
+                    )
+                if references is None:
+                    if report_undetected:
+                        self.stdout.write(self.style.WARNING(
+                            f'Media files referenced by "{fixture_file}" '
+                            f'cannot be detected'
+                        ))
+                    continue
+                referenced_files |= references
+        return referenced_files
+
+    def _read_fixture_file(self, fixture_file: str, read):
+        """
+        Returns the result of calling `read` with the opened fixture file
+        and its serialization format.
+        """
+        _, ser_fmt, cmp_fmt = self.parse_name(os.path.basename(fixture_file))
+        open_method, mode = self.compression_formats[cmp_fmt]
+        fixture = open_method(fixture_file, mode)
+        try:
+            return read(fixture, ser_fmt)
+        finally:
+            fixture.close()
+
+    def _find_fixture_files(self, fixture_label, options) -> list[str]:
+        # The base class resolves fixture files with attributes that are
+        # set only when fixtures are being loaded
+        self.using = options['database']
+        self.app_label = options['app_label']
+        self.verbosity = options['verbosity']
+        self.serialization_formats = serializers.get_public_serializer_formats()
+        return [
+            fixture_file
+            for fixture_file, _, _ in self._find_source_fixtures(fixture_label)
+        ]
+
+    def loaddata(self, fixture_labels):
+        if not self.profile:
+            super().loaddata(fixture_labels)
+            return
+
+        # The base class checks constraints of all loaded tables at once,
+        # after all labels are loaded
+        connection = connections[self.using]
+        check_constraints = connection.check_constraints
+
+        def measured_check_constraints(*args, **kwargs):
+            with self.profile.measure('constraint_checks'):
+                return check_constraints(*args, **kwargs)
+
+        connection.check_constraints = measured_check_constraints
+        try:
+            super().loaddata(fixture_labels)
+        finally:
+            del connection.check_constraints
+
+    def find_fixtures(self, fixture_label):
+        """
+        Finds fixture files of the label, replacing the files that were
+        compiled since they last changed with their compiled fixtures.
+        """
+        return [
+            (
+                (get_compiled_fixture(fixture_file) or fixture_file)
+                if fixture_file != READ_STDIN else fixture_file,
+                fixture_dir,
+                fixture_name,
+            )
+            for fixture_file, fixture_dir, fixture_name
+            in self._find_source_fixtures(fixture_label)
+        ]
+
+    def _find_source_fixtures(self, fixture_label):
+        if not self.profile:
+            return super().find_fixtures(fixture_label)
+        with self.profile.measure('discovery'):
+            return super().find_fixtures(fixture_label)
+
+    def find_fixture_files_in_dir(self, fixture_dir, fixture_name, targets):
+        # The base class globs the directory for every label
+        file_names = self.fixture_index.get_file_names(fixture_dir)
+        return [
+            (os.path.join(fixture_dir, file_name), fixture_dir, fixture_name)
+            for file_name in sorted(targets & file_names)
+        ]
+
+    @cached_property
+    def fixture_index(self) -> FixtureIndex:
+        if get_fixtures_setting('fixtures_index'):
+            return FixtureIndex.load(
+                os.path.join(get_cache_dir(), 'fixtures_index.json')
+            )
+        return FixtureIndex()
+
+    def parse_name(self, fixture_name):
+        # The compiled format is not public, so the base class rejects it
+        name, extension = os.path.splitext(fixture_name)
+        if extension == f'.{COMPILED_FORMAT}':
+            return name, COMPILED_FORMAT, None
+        return super().parse_name(fixture_name)
+
+    def load_label(self, fixture_label):
+        start = time.perf_counter()
+        loaded_object_count = self.loaded_object_count
+        super().load_label(fixture_label)
+        # Objects with deferred fields are saved after all labels are
+        # loaded, so they must be able to reference the pending objects
+        if self.bulk_writer:
+            self._flush_bulk_writer()
 
-        super().handle(*fixture_labels, **options)
+        if self.profile:
+            self.profile.add_label(
+                fixture_label,
+                time.perf_counter() - start,
+                objects=self.loaded_object_count - loaded_object_count,
+                bytes=self._get_label_bytes(fixture_label),
+            )
+
+    def _get_label_bytes(self, fixture_label) -> int:
+        return sum(
+            os.path.getsize(fixture_file)
+            for fixture_file, _, _ in self.find_fixtures(fixture_label)
+            if fixture_file != READ_STDIN
+        )
+
+    def save_obj(self, obj):
+        """
+        Adds the object to the pending bulk inserts if "--bulk" flag is
+        used. Otherwise (or if the object can't be bulk inserted), the
+        object is saved by the base class. Objects redefined by later
+        fixtures are skipped if "--deduplicate" flag is used.
+        """
+        if self.deduplicator and self.deduplicator.is_superseded(obj.object):
+            return False
+        if not self.bulk_writer or not self.bulk_writer.can_write(obj):
+            if not self.profile:
+                return super().save_obj(obj)
+            start = time.perf_counter()
+            saved = super().save_obj(obj)
+            self.profile.add_model(
+                obj.object._meta.label,
+                time.perf_counter() - start,
+                objects=int(saved),
+            )
+            return saved
+
+        if (
+            obj.object._meta.app_config in self.excluded_apps
+            or type(obj.object) in self.excluded_models
+        ):
+            return False
+        saved = False
+        if router.allow_migrate_model(self.using, obj.object.__class__):
+            saved = True
+            self.models.add(obj.object.__class__)
+            self.bulk_writer.add(obj)
+            self._discount_unchanged_objects()
+        if obj.deferred_fields:
+            self.objs_with_deferred_fields.append(obj)
+        return saved
+
+    def _flush_bulk_writer(self):
+        self.bulk_writer.flush()
+        self._discount_unchanged_objects()
+
+    def _discount_unchanged_objects(self):
+        # Pending objects are counted as installed when they are added, but
+        # unchanged ones are not written by "--upsert-changed"
+        self.loaded_object_count -= self.bulk_writer.unchanged_count
+        self.bulk_writer.unchanged_count = 0
+
+    @staticmethod
+    def _get_load_options(options) -> dict:
+        """
+        Returns the options that change which objects of the fixtures are
+        loaded, which cached labels and snapshots are recorded with.
+        """
+        return {
+            'app_label': options.get('app_label'),
+            'exclude': sorted(options.get('exclude') or []),
+            'ignore': bool(options.get('ignore')),
+        }
+
+    @staticmethod
+    def _get_parallel_workers(options) -> int:
+        workers = options.get('parallel')
+        if workers is None:
+            return get_fixtures_config().parallel
+        error = get_positive_int_error(workers, 'number of parallel workers')
+        if error:
+            raise CommandError(error)
+        return workers
+
+    @staticmethod
+    def _get_chunk_size(options) -> int | None:
+        chunk_size = options.get('chunk_size')
+        if chunk_size is None:
+            return get_fixtures_setting('chunk_size')
+        error = get_positive_int_error(chunk_size, 'chunk size')
+        if error:
+            raise CommandError(error)
+        return chunk_size
+
+    @staticmethod
+    def _get_bulk_writer(
+        options,
+        profile: 'LoadProfile | None' = None,
+    ) -> BulkObjectWriter | None:
+        upsert_changed = bool(
+            options.get('upsert_changed') or get_fixtures_setting('upsert_changed')
+        )
+        if (
+            not options.get('bulk')
+            and not get_fixtures_setting('bulk')
+            and not upsert_changed
+        ):
+            return None
+
+        batch_size = options.get('bulk_batch_size')
+        if batch_size is None:
+            batch_size = get_fixtures_setting('bulk_batch_size')
+        error = get_positive_int_error(batch_size, 'bulk batch size')
+        if error:
+            raise CommandError(error)
+        return BulkObjectWriter(
+            options['database'], batch_size, profile, upsert_changed
+        )
 
     @staticmethod
     def _has_valid_settings() -> bool:
@@ -128,20 +1171,153 @@ class Command(LoadDataCommand):
             'valid dictionary with "labels" list or tuple'
         ))
 
+    def _check_settings(self, options):
+        """
+        Validates FIXTURES settings variable, checks that media sources
+        exist and finds the fixture files of all labels, without copying
+        media files or connecting to the database. Raises CommandError
+        listing all problems.
+        """
+        if not self._has_valid_settings():
+            raise CommandError(
+                'FIXTURES settings variable must be a valid dictionary '
+                'with "labels" list or tuple'
+            )
+        config = get_fixtures_config()
+        self._check_media_sources(config)
+        fixture_files = self._find_labels_fixture_files(config.labels, options)
+        self.stdout.write(self.style.SUCCESS(
+            f'FIXTURES settings variable is valid: {len(config.labels)} '
+            f'label(s) with {len(fixture_files)} fixture file(s), '
+            f'{len(config.media)} media source(s)'
+        ))
+
+    def _find_labels_fixture_files(self, fixture_labels, options) -> list[str]:
+        """
+        Returns the fixture files of all given labels, or raises CommandError
+        listing all labels whose fixtures were not found. Missing fixtures
+        are reported with it before media files are copied.
+        """
+        errors = []
+        fixture_files = []
+        for fixture_label in fixture_labels:
+            try:
+                fixture_files += self._find_fixture_files(fixture_label, options)
+            except CommandError as error:
+                errors.append(f'- {error}')
+        if errors:
+            raise CommandError(
+                'Fixtures of some labels were not found:\n' + '\n'.join(errors)
+            )
+        return fixture_files
+
+    @staticmethod
+    def _check_media_sources(config: FixturesConfig):
+        missing_sources = config.get_missing_media_sources()
+        if missing_sources:
+            raise CommandError(
+                'Media sources in FIXTURES settings variable do not exist: '
+                + ', '.join(f'"{src}"' for src in missing_sources)
+            )
+
+    @staticmethod
+    def _get_media_workers(options) -> int:
+        media_workers = options.get('media_workers')
+        if media_workers is None:
+            return get_fixtures_setting('media_workers')
+        error = get_positive_int_error(media_workers, 'number of media workers')
+        if error:
+            raise CommandError(error)
+        return media_workers
+
+    @staticmethod
+    def _is_event_loop_running() -> bool:
+        import asyncio
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
     def _upload_media_files(self):
-        copied_files = []
-        for images_dir in settings.FIXTURES.get('media', []):
-            src_dir = images_dir['src']
-            dest_dir = images_dir['dest']
-            # Ensure the destination directory exists
-            os.makedirs(dest_dir, exist_ok=True)
-
-            # Copy all files from src_dir to dest_dir
-            for filename in os.listdir(src_dir):
-                src_file = os.path.join(src_dir, filename)
-                dest_file = os.path.join(dest_dir, filename)
-                if os.path.isfile(src_file):
-                    shutil.copy(src_file, dest_file)
-                    copied_files.append((src_file, dest_file))
-
-        self.stdout.write(create_copied_files_message(copied_files))
+        with ExitStack() as stack:
+            report_file = None
+            if self.media_report_path:
+                report_file = stack.enter_context(
+                    open(self.media_report_path, 'w')
+                )
+            report = CopiedFilesReport(
+                self.stdout if self.verbosity >= 2 else None, report_file
+            )
+            installer = MediaInstaller(
+                media_dirs=self.media_dirs,
+                sync_mode=self.media_sync,
+                manifest_path=os.path.join(get_cache_dir(), 'media_manifest.json'),
+                workers=self.media_workers,
+                referenced_files=self.referenced_media_files,
+                on_copied=report.add,
+            )
+            start = time.perf_counter()
+            if self.async_media and not self._is_event_loop_running():
+                import asyncio
+
+                result = asyncio.run(installer.install_async())
+            else:
+                # `asyncio.run` can't be called from a running event loop
+                # (e.g. `load_fixtures` called by async code), so files are
+                # copied by the worker threads of `install` instead
+                result = installer.install()
+        if self.profile:
+            self.profile.add_phase(
+                'media',
+                time.perf_counter() - start,
+                objects=report.copied_count,
+                bytes=report.copied_bytes,
+            )
+
+        if self.verbosity >= 1:
+            self.stdout.write(create_copied_files_summary(
+                report.copied_count, report.copied_bytes
+            ))
+        if result.fallback_count:
+            self.stdout.write(self.style.WARNING(
+                f'{result.fallback_count} media file(s) were copied because '
+                f'the configured strategy is not supported'
+            ))
+        if result.missing_files:
+            self.stdout.write(self.style.WARNING(
+                create_missing_files_message(result.missing_files)
+            ))
+        if self.media_sync:
+            self.stdout.write(create_media_sync_message(
+                len(result.copied_files),
+                result.skipped_count,
+                result.removed_files,
+            ))
+        if result.failed_files:
+            self.stderr.write(self.style.ERROR(
+                create_failed_files_message(result.failed_files)
+            ))
+            raise CommandError(
+                f'Failed to copy {len(result.failed_files)} media file(s)'
+            )
+
+    def _report_upsert_counts(self):
+        for model_label, counts in self.bulk_writer.upsert_counts.items():
+            self.stdout.write(
+                f'{model_label}: {counts["inserted"]} inserted, '
+                f'{counts["updated"]} updated, {counts["unchanged"]} unchanged'
+            )
+
+    def _report_profile(self, options):
+        profile = self.profile.to_dict()
+        self.stdout.write(create_profile_message(profile))
+        if options.get('profile_output'):
+            with open(options['profile_output'], 'w') as profile_file:
+                json.dump(profile, profile_file, indent=2)
+        fixtures_profiled.send(
+            sender=self.__class__,
+            profile=profile,
+            database=options['database'],
+        )
@@ -0,0 +1,841 @@
+import errno
+import fnmatch
+import hashlib
+import os
+import re
+import shutil
+import stat
+import threading
+from collections import deque
+from collections.abc import Callable
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING
+
+from smart_fixtures.storage import StorageUploader, get_storage, get_storage_path
+from smart_fixtures.utils import load_json_state, save_json_state
+
+if TYPE_CHECKING:
+    from smart_fixtures.archives import ArchiveMember
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover (not available on Windows)
+    fcntl = None
+
+MEDIA_SYNC_MODES = ('mtime', 'hash')
+
+COPY = 'copy'
+HARDLINK = 'hardlink'
+REFLINK = 'reflink'
+SYMLINK = 'symlink'
+MEDIA_STRATEGIES = (COPY, HARDLINK, REFLINK, SYMLINK)
+
+# Linux ioctl request for cloning a file (see ioctl_ficlone(2))
+FICLONE = 0x40049409
+
+COPIED = 'copied'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+FALLBACK = 'fallback'
+
+MANIFEST_VERSION = 1
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class MediaManifest:
+    """
+    Sizes and modification times of installed media files, by destination directory.
+    """
+
+    def __init__(self, path: str, entries: dict | None = None):
+        self.path = str(path)
+        self.entries = entries if entries is not None else {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> 'MediaManifest':
+        return cls(path, load_json_state(path, MANIFEST_VERSION).get('entries'))
+
+    def save(self):
+        save_json_state(self.path, MANIFEST_VERSION, {'entries': self.entries})
+
+    def is_unchanged(
+        self,
+        dest_dir: str,
+        name: str,
+        src_file: str,
+        dest_file: str,
+        mode: str,
+    ) -> bool:
+        """
+        Returns True if `dest_file` already holds the content of `src_file`.
+        """
+        try:
+            src_stat = os.stat(src_file)
+            dest_stat = os.stat(dest_file)
+        except FileNotFoundError:
+            return False
+
+        if src_stat.st_size != dest_stat.st_size:
+            return False
+
+        record = self.entries.get(str(dest_dir), {}).get(name)
+        if record and _matches_record(record, src_stat, dest_stat):
+            return True
+
+        if mode != 'hash':
+            return False
+
+        src_hash = get_file_hash(src_file)
+        dest_unchanged = record and (
+            record['dest_size'] == dest_stat.st_size
+            and record['dest_mtime_ns'] == dest_stat.st_mtime_ns
+        )
+        if dest_unchanged and record.get('sha256') == src_hash:
+            unchanged = True
+        else:
+            unchanged = get_file_hash(dest_file) == src_hash
+
+        if unchanged:
+            self.record(dest_dir, name, src_file, dest_file, src_hash)
+        return unchanged
+
+    def record(
+        self,
+        dest_dir: str,
+        name: str,
+        src_file: str,
+        dest_file: str,
+        sha256: str | None = None,
+    ):
+        src_stat = os.stat(src_file)
+        self._record(
+            dest_dir, name, src_stat.st_size, src_stat.st_mtime_ns, dest_file, sha256
+        )
+
+    def record_archive_member(
+        self,
+        dest_dir: str,
+        name: str,
+        member: 'ArchiveMember',
+        dest_file: str,
+    ):
+        self._record(dest_dir, name, member.size, member.mtime_ns, dest_file)
+
+    def _record(
+        self,
+        dest_dir: str,
+        name: str,
+        size: int,
+        mtime_ns: int,
+        dest_file: str,
+        sha256: str | None = None,
+    ):
+        dest_stat = os.stat(dest_file)
+        record = {
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'dest_size': dest_stat.st_size,
+            'dest_mtime_ns': dest_stat.st_mtime_ns,
+        }
+        if sha256:
+            record['sha256'] = sha256
+        with self._lock:
+            self.entries.setdefault(str(dest_dir), {})[name] = record
+
+    def prune(self, dest_dir: str, names: set[str]) -> list[str]:
+        """
+        Removes files installed into `dest_dir` whose names are not in `names`.
+        """
+        entry = self.entries.get(str(dest_dir), {})
+        removed_files = []
+        for name in sorted(set(entry) - names):
+            del entry[name]
+            dest_file = os.path.join(dest_dir, name)
+            try:
+                os.remove(dest_file)
+            except FileNotFoundError:
+                continue
+            removed_files.append(dest_file)
+        return removed_files
+
+
+@dataclass
+class MediaFile:
+    dest_dir: str
+    # None for an archive that could not be read
+    name: str | None
+    src_file: str
+    dest_file: str
+    strategy: str = COPY
+    size: int | None = None
+
+
+@dataclass
+class MediaInstallResult:
+    copied_files: list[tuple[str, str]] = field(default_factory=list)
+    skipped_count: int = 0
+    fallback_count: int = 0
+    removed_files: list[str] = field(default_factory=list)
+    failed_files: list[tuple[str, str]] = field(default_factory=list)
+    # Referenced files that were not found in media sources
+    missing_files: list[str] = field(default_factory=list)
+
+
+class MediaInstaller:
+    """
+    Installs files of the "media" entries of FIXTURES settings variable.
+    """
+
+    def __init__(
+        self,
+        media_dirs: list[dict],
+        sync_mode: str | None = None,
+        manifest_path: str | None = None,
+        workers: int = 1,
+        referenced_files: set[str] | None = None,
+        on_copied: Callable[[MediaFile], None] | None = None,
+    ):
+        self.media_dirs = media_dirs
+        self.sync_mode = sync_mode
+        self.manifest_path = manifest_path
+        self.workers = workers
+        self.referenced_files = referenced_files or set()
+        self.on_copied = on_copied
+        self._unsupported_strategies = set()
+
+    def install(self) -> MediaInstallResult:
+        manifest, tasks, names_by_dest_dir, referenced_dest_files = self._prepare()
+
+        result = MediaInstallResult()
+        with ExitStack() as stack:
+            if self.workers > 1:
+                from concurrent.futures import ThreadPoolExecutor
+
+                executor = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=self.workers)
+                )
+                # Outcomes are processed as soon as their tasks are done
+                outcomes = executor.map(_run_task, tasks)
+            else:
+                outcomes = map(_run_task, tasks)
+            for task_outcomes in outcomes:
+                self._collect_outcomes(
+                    task_outcomes, result, names_by_dest_dir, referenced_dest_files
+                )
+
+        self._finish(manifest, result, names_by_dest_dir, referenced_dest_files)
+        return result
+
+    async def install_async(self) -> MediaInstallResult:
+        """
+        Installs the files like `install` without blocking the event loop.
+        """
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            manifest, tasks, names_by_dest_dir, referenced_dest_files = (
+                await loop.run_in_executor(executor, self._prepare)
+            )
+
+            result = MediaInstallResult()
+            pending = deque()
+            for task in tasks:
+                pending.append(loop.run_in_executor(executor, task))
+                if len(pending) < 2 * self.workers:
+                    continue
+                self._collect_outcomes(
+                    await pending.popleft(),
+                    result,
+                    names_by_dest_dir,
+                    referenced_dest_files,
+                )
+            while pending:
+                self._collect_outcomes(
+                    await pending.popleft(),
+                    result,
+                    names_by_dest_dir,
+                    referenced_dest_files,
+                )
+
+            await loop.run_in_executor(executor, partial(
+                self._finish,
+                manifest,
+                result,
+                names_by_dest_dir,
+                referenced_dest_files,
+            ))
+        finally:
+            # Waiting for the threads on the event loop would block it, and
+            # files that were not copied yet are not copied after an error
+            await asyncio.to_thread(executor.shutdown, cancel_futures=True)
+        return result
+
+    def _prepare(self) -> tuple:
+        """
+        Lists the sources and returns the manifest, the tasks and the installed files.
+        """
+        from smart_fixtures.archives import is_archive
+
+        manifest = None
+        if self.sync_mode:
+            manifest = MediaManifest.load(self.manifest_path)
+
+        # Each task installs one file, or all members of one archive
+        tasks = []
+        names_by_dest_dir = {}
+        referenced_dest_files = set()
+        for media_dir in self.media_dirs:
+            src_dir = media_dir['src']
+            dest_dir = media_dir['dest']
+            strategy = media_dir.get('strategy', COPY)
+            names_by_dest_dir.setdefault(dest_dir, set())
+            uploader = None
+            if media_dir.get('storage') is not None:
+                uploader = StorageUploader(
+                    get_storage(media_dir['storage']), dest_dir
+                )
+                names_by_dest_dir[dest_dir] = None
+            else:
+                # Ensure the destination directory exists
+                os.makedirs(dest_dir, exist_ok=True)
+            get_dest_file = partial(_get_dest_file, dest_dir, uploader)
+
+            referenced_names = None
+            if media_dir.get('referenced_only'):
+                referenced_names = self._get_referenced_names(media_dir, uploader)
+                referenced_dest_files.update(map(get_dest_file, referenced_names))
+                names_by_dest_dir[dest_dir] = None
+
+            if is_archive(src_dir):
+                tasks.append(partial(
+                    self._install_archive,
+                    manifest,
+                    media_dir,
+                    referenced_names,
+                    uploader,
+                ))
+                continue
+
+            if referenced_names is None:
+                names = iter_media_files(
+                    src_dir,
+                    recursive=media_dir.get('recursive', False),
+                    include=media_dir.get('include'),
+                    exclude=media_dir.get('exclude'),
+                )
+            else:
+                names = (
+                    name for name in sorted(referenced_names)
+                    if os.path.isfile(os.path.join(src_dir, name))
+                )
+
+            subdirectories = set()
+            for name in names:
+                media_file = MediaFile(
+                    dest_dir=dest_dir,
+                    name=name,
+                    src_file=os.path.join(src_dir, name),
+                    dest_file=get_dest_file(name),
+                    strategy=strategy,
+                )
+                if uploader:
+                    tasks.append(partial(self._upload_file, uploader, media_file))
+                else:
+                    subdirectories.add(os.path.dirname(name))
+                    tasks.append(partial(self._install_file, manifest, media_file))
+
+            # Each nested destination directory is created only once
+            for subdirectory in sorted(subdirectories - {''}):
+                os.makedirs(os.path.join(dest_dir, subdirectory), exist_ok=True)
+
+        return manifest, tasks, names_by_dest_dir, referenced_dest_files
+
+    @staticmethod
+    def _finish(
+        manifest: MediaManifest | None,
+        result: MediaInstallResult,
+        names_by_dest_dir: dict[str, set[str] | None],
+        referenced_dest_files: set[str],
+    ):
+        result.missing_files = sorted(referenced_dest_files)
+
+        if manifest:
+            for dest_dir, names in names_by_dest_dir.items():
+                if names is not None:
+                    result.removed_files.extend(manifest.prune(dest_dir, names))
+            manifest.save()
+
+    def _collect_outcomes(
+        self,
+        task_outcomes: list[tuple[MediaFile, tuple[str, str | None]]],
+        result: MediaInstallResult,
+        names_by_dest_dir: dict[str, set[str] | None],
+        referenced_dest_files: set[str],
+    ):
+        for media_file, (status, error) in task_outcomes:
+            referenced_dest_files.discard(media_file.dest_file)
+            if media_file.name is None:
+                # The archive could not be read to the end, so files
+                # that were not reached must not be removed
+                names_by_dest_dir[media_file.dest_dir] = None
+            elif names_by_dest_dir[media_file.dest_dir] is not None:
+                names_by_dest_dir[media_file.dest_dir].add(media_file.name)
+
+            if status == FALLBACK:
+                result.fallback_count += 1
+                status = COPIED
+            if status == COPIED:
+                result.copied_files.append(
+                    (media_file.src_file, media_file.dest_file)
+                )
+                if self.on_copied:
+                    self.on_copied(media_file)
+            elif status == SKIPPED:
+                result.skipped_count += 1
+            else:
+                result.failed_files.append((media_file.src_file, error))
+
+    def _get_referenced_names(
+        self,
+        media_dir: dict,
+        uploader: StorageUploader | None = None,
+    ) -> set[str]:
+        """
+        Returns the referenced paths in the destination directory of `media_dir`.
+        """
+        if uploader:
+            dest_dir = get_storage_path(uploader.storage, uploader.prefix)
+        else:
+            dest_dir = os.path.normpath(os.path.abspath(media_dir['dest']))
+        recursive = media_dir.get('recursive', False)
+        include_re = _compile_patterns(media_dir.get('include'))
+        exclude_re = _compile_patterns(media_dir.get('exclude'))
+        names = set()
+        for path in self.referenced_files:
+            if not path.startswith(os.path.join(dest_dir, '')):
+                continue
+            name = os.path.relpath(path, dest_dir).replace(os.sep, '/')
+            if _is_member_selected(name, recursive, include_re, exclude_re):
+                names.add(name)
+        return names
+
+    def _install_archive(
+        self,
+        manifest: MediaManifest | None,
+        media_dir: dict,
+        referenced_names: set[str] | None = None,
+        uploader: StorageUploader | None = None,
+    ) -> list[tuple[MediaFile, tuple[str, str | None]]]:
+        from smart_fixtures.archives import ARCHIVE_ERRORS, iter_archive_members
+
+        archive_path = str(media_dir['src'])
+        dest_dir = media_dir['dest']
+        recursive = media_dir.get('recursive', False)
+        include_re = _compile_patterns(media_dir.get('include'))
+        exclude_re = _compile_patterns(media_dir.get('exclude'))
+
+        outcomes = []
+        try:
+            for member in iter_archive_members(archive_path):
+                if referenced_names is not None:
+                    if member.name not in referenced_names:
+                        continue
+                elif not _is_member_selected(
+                    member.name, recursive, include_re, exclude_re
+                ):
+                    continue
+                media_file = MediaFile(
+                    dest_dir=dest_dir,
+                    name=member.name,
+                    src_file=os.path.join(archive_path, member.name),
+                    dest_file=_get_dest_file(dest_dir, uploader, member.name),
+                    size=member.size,
+                )
+                if uploader:
+                    outcome = self._upload_archive_member(
+                        uploader, member, media_file
+                    )
+                else:
+                    outcome = self._install_archive_member(
+                        manifest, member, media_file
+                    )
+                outcomes.append((media_file, outcome))
+        except ARCHIVE_ERRORS as error:
+            outcomes.append((
+                MediaFile(
+                    dest_dir=dest_dir,
+                    name=None,
+                    src_file=archive_path,
+                    dest_file=dest_dir,
+                ),
+                (FAILED, str(error)),
+            ))
+        return outcomes
+
+    @staticmethod
+    def _install_archive_member(
+        manifest: MediaManifest | None,
+        member: 'ArchiveMember',
+        media_file: MediaFile,
+    ) -> tuple[str, str | None]:
+        from smart_fixtures.archives import ARCHIVE_ERRORS, is_safe_member_name
+
+        if not is_safe_member_name(member.name):
+            return FAILED, 'Archive member is outside of the destination directory'
+
+        try:
+            dest_stat = os.stat(media_file.dest_file)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(media_file.dest_file), exist_ok=True)
+        else:
+            if (
+                dest_stat.st_size == member.size
+                and dest_stat.st_mtime_ns == member.mtime_ns
+            ):
+                return SKIPPED, None
+
+        try:
+            _replace_file(media_file.dest_file, partial(_extract_member, member))
+            if manifest:
+                manifest.record_archive_member(
+                    media_file.dest_dir, member.name, member, media_file.dest_file
+                )
+        except ARCHIVE_ERRORS as error:
+            return FAILED, str(error)
+        return COPIED, None
+
+    @staticmethod
+    def _upload_archive_member(
+        uploader: StorageUploader,
+        member: 'ArchiveMember',
+        media_file: MediaFile,
+    ) -> tuple[str, str | None]:
+        from smart_fixtures.archives import is_safe_member_name
+
+        if not is_safe_member_name(member.name):
+            return FAILED, 'Archive member is outside of the destination directory'
+        # Storages may raise any kind of error (e.g. from a client library)
+        try:
+            if uploader.is_unchanged(media_file.dest_file, member.size):
+                return SKIPPED, None
+            uploader.upload(media_file.dest_file, member.file)
+        except Exception as error:
+            return FAILED, str(error)
+        return COPIED, None
+
+    @staticmethod
+    def _upload_file(
+        uploader: StorageUploader,
+        media_file: MediaFile,
+    ) -> list[tuple[MediaFile, tuple[str, str | None]]]:
+        try:
+            media_file.size = os.path.getsize(media_file.src_file)
+            if uploader.is_unchanged(media_file.dest_file, media_file.size):
+                return [(media_file, (SKIPPED, None))]
+            with open(media_file.src_file, 'rb') as src:
+                uploader.upload(media_file.dest_file, src)
+        except Exception as error:
+            return [(media_file, (FAILED, str(error)))]
+        return [(media_file, (COPIED, None))]
+
+    def _install_file(
+        self,
+        manifest: MediaManifest | None,
+        media_file: MediaFile,
+    ) -> list[tuple[MediaFile, tuple[str, str | None]]]:
+        return [(media_file, self._install_media_file(manifest, media_file))]
+
+    def _install_media_file(
+        self,
+        manifest: MediaManifest | None,
+        media_file: MediaFile,
+    ) -> tuple[str, str | None]:
+        try:
+            if manifest and manifest.is_unchanged(
+                media_file.dest_dir,
+                media_file.name,
+                media_file.src_file,
+                media_file.dest_file,
+                self.sync_mode,
+            ):
+                return SKIPPED, None
+
+            status = self._install_with_strategy(media_file)
+            if manifest:
+                sha256 = None
+                if self.sync_mode == 'hash':
+                    sha256 = get_file_hash(media_file.src_file)
+                manifest.record(
+                    media_file.dest_dir,
+                    media_file.name,
+                    media_file.src_file,
+                    media_file.dest_file,
+                    sha256,
+                )
+        except OSError as error:
+            return FAILED, str(error)
+        return status, None
+
+    def _install_with_strategy(self, media_file: MediaFile) -> str:
+        strategy = media_file.strategy
+        unsupported_key = (strategy, media_file.dest_dir)
+        if unsupported_key in self._unsupported_strategies:
+            strategy = COPY
+
+        used_strategy = install_file(
+            media_file.src_file, media_file.dest_file, strategy
+        )
+        if used_strategy == media_file.strategy:
+            return COPIED
+
+        self._unsupported_strategies.add(unsupported_key)
+        return FALLBACK
+
+
+def _run_task(task):
+    return task()
+
+
+def _get_dest_file(
+    dest_dir: str,
+    uploader: StorageUploader | None,
+    name: str,
+) -> str:
+    if uploader:
+        return uploader.get_name(name)
+    return os.path.join(dest_dir, name)
+
+
+def _extract_member(member: 'ArchiveMember', dest_file: str):
+    with open(dest_file, 'wb') as dest:
+        shutil.copyfileobj(member.file, dest, HASH_CHUNK_SIZE)
+    if member.mode is not None:
+        os.chmod(dest_file, member.mode)
+    os.utime(dest_file, ns=(member.mtime_ns, member.mtime_ns))
+
+
+def _is_member_selected(
+    name: str,
+    recursive: bool,
+    include_re: re.Pattern | None,
+    exclude_re: re.Pattern | None,
+) -> bool:
+    """
+    Applies the rules of `iter_media_files` to a path of an archive member.
+    """
+    parts = name.split('/')
+    if not recursive and len(parts) > 1:
+        return False
+    if exclude_re and any(
+        _matches(exclude_re, '/'.join(parts[:index + 1]), part)
+        for index, part in enumerate(parts)
+    ):
+        return False
+    return not include_re or _matches(include_re, name, parts[-1])
+
+
+def iter_media_files(
+    src_dir: str,
+    recursive: bool = False,
+    include: list[str] | None = None,
+    exclude: list[str] | None = None,
+):
+    """
+    Yields paths of the selected files in `src_dir`, relative to it.
+    """
+    yield from _scan_dir(
+        str(src_dir),
+        '',
+        recursive,
+        _compile_patterns(include),
+        _compile_patterns(exclude),
+    )
+
+
+def _scan_dir(directory, prefix, recursive, include_re, exclude_re):
+    subdirectories = []
+    # Entries of os.scandir know their type without an additional stat call
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            relative_path = f'{prefix}{entry.name}'
+            if exclude_re and _matches(exclude_re, relative_path, entry.name):
+                continue
+            if entry.is_file():
+                if not include_re or _matches(
+                    include_re, relative_path, entry.name
+                ):
+                    yield relative_path
+            elif recursive and entry.is_dir():
+                subdirectories.append((entry.path, f'{relative_path}/'))
+
+    for subdirectory, subdirectory_prefix in subdirectories:
+        yield from _scan_dir(
+            subdirectory, subdirectory_prefix, recursive, include_re, exclude_re
+        )
+
+
+def _compile_patterns(patterns: list[str] | None) -> re.Pattern | None:
+    if not patterns:
+        return None
+    return re.compile('|'.join(
+        fnmatch.translate(pattern) for pattern in patterns
+    ))
+
+
+def _matches(patterns_re: re.Pattern, relative_path: str, name: str) -> bool:
+    return bool(patterns_re.match(relative_path) or patterns_re.match(name))
+
+
+def install_file(src_file: str, dest_file: str, strategy: str = COPY) -> str:
+    """
+    Installs `src_file` as `dest_file` and returns the strategy that was used.
+    """
+    if strategy != COPY:
+        try:
+            _replace_file(dest_file, partial(
+                _INSTALLERS[strategy], os.path.abspath(src_file)
+            ))
+            return strategy
+        except OSError:
+            pass
+
+    _copy_file(src_file, dest_file)
+    return COPY
+
+
+def _copy_file(src_file: str, dest_file: str):
+    # Links from previous runs must not be written through, because that
+    # would modify the source file (or other files sharing the same inode).
+    try:
+        dest_stat = os.lstat(dest_file)
+    except FileNotFoundError:
+        pass
+    else:
+        if stat.S_ISLNK(dest_stat.st_mode) or dest_stat.st_nlink > 1:
+            os.unlink(dest_file)
+    copy_file(src_file, dest_file)
+
+
+def copy_file(src_file: str, dest_file: str):
+    """
+    Copies the content and permission bits of `src_file` to `dest_file`.
+    """
+    with open(src_file, 'rb') as src, open(dest_file, 'wb') as dest:
+        src_stat = os.fstat(src.fileno())
+        if not _copy_in_kernel(src.fileno(), dest.fileno(), src_stat.st_size):
+            shutil.copyfileobj(src, dest, HASH_CHUNK_SIZE)
+    os.chmod(dest_file, stat.S_IMODE(src_stat.st_mode))
+
+
+def _copy_in_kernel(src_fd: int, dest_fd: int, size: int) -> bool:
+    """
+    Copies `size` bytes with the first kernel copy that works for the files.
+    """
+    for kernel_copy in _KERNEL_COPIES:
+        copied = 0
+        try:
+            while copied < size:
+                count = kernel_copy(src_fd, dest_fd, size - copied, copied)
+                if count == 0:
+                    # The file was truncated while it was being copied
+                    break
+                copied += count
+        except OSError as error:
+            if copied or error.errno not in _UNSUPPORTED_COPY_ERRNOS:
+                raise
+            continue
+        return True
+    return False
+
+
+def _copy_file_range(src_fd: int, dest_fd: int, count: int, offset: int) -> int:
+    return os.copy_file_range(src_fd, dest_fd, count, offset, offset)
+
+
+def _sendfile(src_fd: int, dest_fd: int, count: int, offset: int) -> int:
+    return os.sendfile(dest_fd, src_fd, offset, count)
+
+
+# Kernel copies available on this platform, from the most efficient one
+_KERNEL_COPIES = [
+    kernel_copy
+    for name, kernel_copy in [
+        ('copy_file_range', _copy_file_range),
+        ('sendfile', _sendfile),
+    ]
+    if hasattr(os, name)
+]
+
+# Errors of kernel copies that are not supported for the given files
+_UNSUPPORTED_COPY_ERRNOS = {
+    errno.EXDEV,
+    errno.ENOSYS,
+    errno.EINVAL,
+    errno.ENOTSUP,
+    errno.EOPNOTSUPP,
+    errno.ENOTSOCK,
+    errno.EBADF,
+}
+
+
+def _replace_file(dest_file: str, create):
+    """
+    Creates a file with `create` and atomically moves it to `dest_file`.
+    """
+    tmp_file = f'{dest_file}.smart_fixtures.tmp'
+    if os.path.lexists(tmp_file):
+        os.unlink(tmp_file)
+    try:
+        create(tmp_file)
+        os.replace(tmp_file, dest_file)
+    except Exception:
+        if os.path.lexists(tmp_file):
+            os.unlink(tmp_file)
+        raise
+
+
+def _hardlink(src_file: str, dest_file: str):
+    os.link(src_file, dest_file)
+
+
+def _symlink(src_file: str, dest_file: str):
+    os.symlink(src_file, dest_file)
+
+
+def _reflink(src_file: str, dest_file: str):
+    if fcntl is None:
+        raise OSError('Reflinks are not supported on this platform')
+    with open(src_file, 'rb') as src, open(dest_file, 'wb') as dest:
+        fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+    shutil.copymode(src_file, dest_file)
+
+
+_INSTALLERS = {
+    HARDLINK: _hardlink,
+    REFLINK: _reflink,
+    SYMLINK: _symlink,
+}
+
+
+def get_file_hash(path: str) -> str:
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _matches_record(record: dict, src_stat, dest_stat) -> bool:
+    return (
+        record['size'] == src_stat.st_size
+        and record['mtime_ns'] == src_stat.st_mtime_ns
+        and record['dest_size'] == dest_stat.st_size
+        and record['dest_mtime_ns'] == dest_stat.st_mtime_ns
+    )
@@ -0,0 +1,42 @@
+import json
+import os
+
+from smart_fixtures.media import MediaFile
+from smart_fixtures.utils import create_copied_file_line
+
+
+class CopiedFilesReport:
+    """
+    Reports media files as they are copied (see `MediaInstaller.on_copied`)
+    instead of building the whole report after the installation.
+
+    Copied files are counted together with their bytes, listed one per line
+    on `stdout` (if given), and written to `report_file` (if given) as JSON
+    lines with "src", "dest" and "size" keys.
+    """
+
+    def __init__(self, stdout=None, report_file=None):
+        self.stdout = stdout
+        self.report_file = report_file
+        self.copied_count = 0
+        self.copied_bytes = 0
+
+    def add(self, media_file: MediaFile):
+        size = media_file.size
+        if size is None:
+            size = os.path.getsize(media_file.src_file)
+        self.copied_count += 1
+        self.copied_bytes += size
+
+        if self.stdout:
+            if self.copied_count == 1:
+                self.stdout.write('Copied files:')
+            self.stdout.write(create_copied_file_line(
+                self.copied_count, media_file.src_file, media_file.dest_file
+            ))
+        if self.report_file:
+            self.report_file.write(json.dumps({
+                'src': media_file.src_file,
+                'dest': media_file.dest_file,
+                'size': size,
+            }) + '\n')
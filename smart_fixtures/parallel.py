@@ -0,0 +1,128 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connections
+
+from smart_fixtures.fixture_readers import read_fixture_objects
+
+
+def get_fixture_models(fixture, ser_fmt: str) -> set[str] | None:
+    """
+    Returns labels of the models of objects in the `fixture` stream, or
+    None if models can't be read from fixtures in `ser_fmt` format.
+    """
+    objects = read_fixture_objects(fixture, ser_fmt)
+    if objects is None:
+        return None
+    return {obj['model'].lower() for obj in objects}
+
+
+def group_labels(label_models: dict[str, set[str] | None]) -> list[list[str]]:
+    """
+    Splits fixture labels into groups that can be loaded independently.
+
+    Two labels end up in the same group if they contain objects of the
+    same model, or of models that are related to each other (e.g. with a
+    foreign key). Labels keep their order inside a group, and groups are
+    ordered by their first label. If models of any label are unknown,
+    all labels are returned as a single group.
+    """
+    labels = list(label_models)
+    if any(models is None for models in label_models.values()):
+        return [labels]
+
+    label_models = {
+        label: _get_concrete_models(models)
+        for label, models in label_models.items()
+    }
+    related_models = {
+        label: models | _get_related_models(models)
+        for label, models in label_models.items()
+    }
+    group_indexes = list(range(len(labels)))
+
+    def find(index: int) -> int:
+        while group_indexes[index] != index:
+            index = group_indexes[index]
+        return index
+
+    for index, label in enumerate(labels):
+        for other_index in range(index):
+            if label_models[label] & related_models[labels[other_index]]:
+                group_indexes[find(index)] = find(other_index)
+
+    groups = {}
+    for index, label in enumerate(labels):
+        groups.setdefault(find(index), []).append(label)
+    return list(groups.values())
+
+
+def load_groups_in_parallel(
+    groups: list[list[str]],
+    workers: int,
+    **options,
+) -> list[float]:
+    """
+    Loads each group of labels with "loaddata" command in a worker
+    process with its own database connections. Raises the first error
+    after all groups are loaded or failed, otherwise returns the time
+    it took to load each group.
+    """
+    # Connections must not be shared with the worker processes
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=django.setup
+    ) as executor:
+        futures = [
+            executor.submit(_load_group, group, options) for group in groups
+        ]
+    errors = [future.exception() for future in futures]
+    for error in errors:
+        if error:
+            raise error
+    return [future.result() for future in futures]
+
+
+def _load_group(labels: list[str], options: dict) -> float:
+    start = time.perf_counter()
+    try:
+        call_command('loaddata', *labels, **options)
+    finally:
+        connections.close_all()
+    return time.perf_counter() - start
+
+
+def _get_concrete_models(models: set[str]) -> set[str]:
+    # Proxy models share the table of their concrete model
+    concrete_models = set()
+    for model_label in models:
+        model = _get_model(model_label)
+        concrete_models.add(
+            model._meta.concrete_model._meta.label_lower if model else model_label
+        )
+    return concrete_models
+
+
+def _get_related_models(models: set[str]) -> set[str]:
+    related_models = set()
+    for model_label in models:
+        model = _get_model(model_label)
+        if model is None:
+            continue
+        for field in model._meta.get_fields(include_hidden=True):
+            if field.is_relation and field.related_model:
+                related_models.add(
+                    field.related_model._meta.concrete_model._meta.label_lower
+                )
+    return related_models
+
+
+def _get_model(model_label: str):
+    # Unknown models are reported when the fixtures are loaded
+    try:
+        return apps.get_model(model_label)
+    except (LookupError, ValueError):
+        return None
@@ -0,0 +1,83 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LoadProfile:
+    """
+    Collects wall times, object counts and sizes of the phases of the
+    "loaddata" command, and of each loaded fixture label and model.
+
+    Phases are "media" (installing media files), "discovery" (finding
+    fixture files), "deduplication" (reading fixtures to find objects
+    defined more than once), "saving" (saving objects), "parsing" (time
+    spent in labels outside of saving objects) and "constraint_checks".
+    """
+
+    def __init__(self):
+        self.total_time = 0.0
+        self.phases = {}
+        self.labels = {}
+        self.models = {}
+        # Media files may be installed in a background thread
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase(phase, time.perf_counter() - start)
+
+    def add_phase(self, phase: str, seconds: float, **counts):
+        self._add(self.phases, phase, seconds, counts)
+
+    def add_label(self, label: str, seconds: float, **counts):
+        self._add(self.labels, label, seconds, counts)
+
+    def add_model(self, model_label: str, seconds: float, **counts):
+        self._add(self.models, model_label, seconds, counts)
+
+    def to_dict(self) -> dict:
+        saving_time = sum(record['time'] for record in self.models.values())
+        labels_time = sum(record['time'] for record in self.labels.values())
+        phases = {phase: dict(record) for phase, record in self.phases.items()}
+        if self.models:
+            phases['saving'] = {
+                'time': saving_time,
+                'objects': sum(
+                    record['objects'] for record in self.models.values()
+                ),
+            }
+        if self.labels:
+            phases['parsing'] = {'time': max(labels_time - saving_time, 0.0)}
+        return {
+            'total_time': self.total_time,
+            'phases': {
+                phase: _with_rate(record) for phase, record in phases.items()
+            },
+            'labels': {
+                label: _with_rate(record) for label, record in self.labels.items()
+            },
+            'models': {
+                model_label: _with_rate(record)
+                for model_label, record in self.models.items()
+            },
+        }
+
+    def _add(self, records: dict, key: str, seconds: float, counts: dict):
+        with self._lock:
+            record = records.setdefault(key, {'time': 0.0})
+            record['time'] += seconds
+            for name, count in counts.items():
+                record[name] = record.get(name, 0) + count
+
+
+def _with_rate(record: dict) -> dict:
+    record = dict(record)
+    if 'objects' in record:
+        record['objects_per_second'] = (
+            record['objects'] / record['time'] if record['time'] else None
+        )
+    return record
@@ -0,0 +1,50 @@
+from django.apps import apps
+from django.db.models import FileField
+
+from smart_fixtures.storage import get_storage_path
+
+
+def get_file_references(
+    objects,
+    excluded_models: set | None = None,
+    excluded_apps: set | None = None,
+) -> set[str]:
+    """
+    Returns absolute paths of the files referenced by `FileField` (and
+    `ImageField`) values of serialized `objects` (see
+    `read_fixture_objects`). Objects of unknown, excluded models or
+    models of excluded apps are ignored.
+    """
+    excluded_models = excluded_models or set()
+    excluded_apps = excluded_apps or set()
+    file_fields_by_model = {}
+    paths = set()
+    for obj in objects:
+        model_label = obj['model'].lower()
+        if model_label not in file_fields_by_model:
+            file_fields_by_model[model_label] = _get_file_fields(
+                model_label, excluded_models, excluded_apps
+            )
+        fields = obj.get('fields') or {}
+        for field in file_fields_by_model[model_label]:
+            name = fields.get(field.name)
+            path = get_storage_path(field.storage, name) if name else None
+            if path:
+                paths.add(path)
+    return paths
+
+
+def _get_file_fields(
+    model_label: str,
+    excluded_models: set,
+    excluded_apps: set,
+) -> list[FileField]:
+    try:
+        model = apps.get_model(model_label)
+    except (LookupError, ValueError):
+        return []
+    if model in excluded_models or model._meta.app_config in excluded_apps:
+        return []
+    return [
+        field for field in model._meta.fields if isinstance(field, FileField)
+    ]
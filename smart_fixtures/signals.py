@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by "loaddata" command with "--profile" flag after fixtures are
+# loaded, with `profile` (see `LoadProfile.to_dict`) and `database`
+# keyword arguments
+fixtures_profiled = Signal()
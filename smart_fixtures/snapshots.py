@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import transaction
+
+from smart_fixtures.media import get_file_hash
+
+SNAPSHOT_VERSION = 1
+
+SQLITE_BACKUP = 'sqlite3'
+TABLE_IMAGE = 'tables'
+
+SNAPSHOT_CHUNK_SIZE = 1000
+
+
+def get_snapshot_key(
+    label_files: dict[str, list[str]],
+    database_state: str,
+    load_options: dict,
+) -> str:
+    """
+    Returns a key that identifies the result of loading fixture labels
+    with the given fixture files into a database in the given state, with
+    the given options that change which objects are loaded.
+    """
+    return hashlib.sha256(json.dumps({
+        'version': SNAPSHOT_VERSION,
+        'database_state': database_state,
+        'load_options': load_options,
+        'labels': [
+            [label, [get_file_hash(fixture_file) for fixture_file in files]]
+            for label, files in label_files.items()
+        ],
+    }).encode()).hexdigest()
+
+
+class DatabaseSnapshots:
+    """
+    Captures the state of a database after fixtures are loaded into it,
+    and restores it on later runs instead of loading the fixtures again.
+
+    SQLite databases are captured as a whole with the backup API. Other
+    databases (and SQLite databases in a transaction, where the backup
+    API can't be used) are captured as a "table image", i.e. the rows of
+    the tables of the loaded models, which replace the rows of those
+    tables on restore.
+
+    Only the latest snapshot of each database is kept, in a directory of
+    its alias inside `snapshot_dir`.
+    """
+
+    def __init__(self, snapshot_dir: str, connection):
+        self.snapshot_dir = os.path.join(str(snapshot_dir), connection.alias)
+        self.connection = connection
+
+    def restore(self, key: str) -> bool:
+        """
+        Restores the snapshot with the given key. Returns False if there is
+        no such snapshot or if it can't be restored.
+        """
+        if self._can_use_sqlite_backup():
+            path = self._get_path(key, SQLITE_BACKUP)
+            if os.path.exists(path):
+                _restore_sqlite_backup(self.connection, path)
+                return True
+
+        path = self._get_path(key, TABLE_IMAGE)
+        if os.path.exists(path):
+            _restore_table_image(self.connection, path)
+            return True
+        return False
+
+    def capture(self, key: str, model_labels: set[str] | None) -> bool:
+        """
+        Captures the current state of the database as the snapshot with the
+        given key. Labels of the loaded models are required unless SQLite
+        backup API is used, and the snapshot is not captured without them.
+        Returns True if the snapshot was captured.
+        """
+        if self._can_use_sqlite_backup():
+            kind = SQLITE_BACKUP
+        elif model_labels is not None:
+            kind = TABLE_IMAGE
+        else:
+            return False
+
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        for file_name in os.listdir(self.snapshot_dir):
+            os.remove(os.path.join(self.snapshot_dir, file_name))
+
+        path = self._get_path(key, kind)
+        tmp_path = f'{path}.tmp'
+        if kind == SQLITE_BACKUP:
+            _capture_sqlite_backup(self.connection, tmp_path)
+        else:
+            _capture_table_image(self.connection, model_labels, tmp_path)
+        os.replace(tmp_path, path)
+        return True
+
+    def _get_path(self, key: str, kind: str) -> str:
+        return os.path.join(self.snapshot_dir, f'{key}.{kind}')
+
+    def _can_use_sqlite_backup(self) -> bool:
+        return (
+            self.connection.vendor == 'sqlite'
+            and not self.connection.in_atomic_block
+        )
+
+
+def _capture_sqlite_backup(connection, path: str):
+    connection.ensure_connection()
+    snapshot = sqlite3.connect(path)
+    try:
+        connection.connection.backup(snapshot)
+    finally:
+        snapshot.close()
+
+
+def _restore_sqlite_backup(connection, path: str):
+    connection.ensure_connection()
+    snapshot = sqlite3.connect(path)
+    try:
+        snapshot.backup(connection.connection)
+    finally:
+        snapshot.close()
+
+
+def _capture_table_image(connection, model_labels: set[str], path: str):
+    """
+    Writes the rows of the tables of the given models (including their
+    parent and many-to-many tables) to `path` as a stream of pickles:
+    the header, then for each table its name and columns followed by
+    chunks of rows and None, and finally None.
+    """
+    models = get_table_models(model_labels)
+    quote_name = connection.ops.quote_name
+    with open(path, 'wb') as snapshot, connection.cursor() as cursor:
+        pickle.dump({
+            'version': SNAPSHOT_VERSION,
+            'models': sorted(model._meta.label for model in models),
+        }, snapshot)
+        for table in get_tables(models):
+            cursor.execute(f'SELECT * FROM {quote_name(table)}')
+            columns = [column[0] for column in cursor.description]
+            pickle.dump((table, columns), snapshot)
+            while rows := cursor.fetchmany(SNAPSHOT_CHUNK_SIZE):
+                pickle.dump([tuple(row) for row in rows], snapshot)
+            pickle.dump(None, snapshot)
+        pickle.dump(None, snapshot)
+
+
+def _restore_table_image(connection, path: str):
+    quote_name = connection.ops.quote_name
+    with (
+        open(path, 'rb') as snapshot,
+        transaction.atomic(using=connection.alias),
+        connection.constraint_checks_disabled(),
+        connection.cursor() as cursor,
+    ):
+        header = pickle.load(snapshot)
+        while table_columns := pickle.load(snapshot):
+            table, columns = table_columns
+            cursor.execute(f'DELETE FROM {quote_name(table)}')
+            insert_sql = (
+                f'INSERT INTO {quote_name(table)} '
+                f'({", ".join(quote_name(column) for column in columns)}) '
+                f'VALUES ({", ".join(["%s"] * len(columns))})'
+            )
+            while (rows := pickle.load(snapshot)) is not None:
+                cursor.executemany(insert_sql, rows)
+
+        models = [apps.get_model(label) for label in header['models']]
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def get_table_models(model_labels: set[str]) -> list:
+    """
+    Returns concrete models with the given labels and their parents, i.e.
+    the models whose tables store the rows of the models.
+    """
+    models = []
+    for model_label in sorted(model_labels):
+        model = apps.get_model(model_label)._meta.concrete_model
+        # Rows of multi-table inherited models are stored in parent tables too
+        for table_model in [model, *model._meta.get_parent_list()]:
+            if table_model not in models:
+                models.append(table_model)
+    return models
+
+
+def get_tables(models: list) -> list[str]:
+    """
+    Returns tables of the given models, including their auto-created
+    many-to-many tables.
+    """
+    tables = []
+    for model in models:
+        tables.append(model._meta.db_table)
+        for field in model._meta.local_many_to_many:
+            through = field.remote_field.through
+            if through._meta.auto_created:
+                tables.append(through._meta.db_table)
+    return list(dict.fromkeys(tables))
@@ -0,0 +1,114 @@
+import os
+import posixpath
+import threading
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import Storage, default_storage
+from django.utils.module_loading import import_string
+
+try:
+    from django.core.files.storage import storages
+except ImportError:  # pragma: no cover (Django < 4.2)
+    storages = None
+
+
+def get_storage(storage) -> Storage:
+    """
+    Returns the storage for the "storage" key of a media entry, which is
+    either a storage instance, an alias from STORAGES settings variable
+    (only "default" before Django 4.2) or a dotted path of a storage class.
+    Raises ValueError if there is no such storage.
+    """
+    if isinstance(storage, Storage):
+        return storage
+    if storages is not None and storage in storages.backends:
+        return storages[storage]
+    if storage == 'default':  # pragma: no cover (Django < 4.2)
+        return default_storage
+
+    try:
+        storage_class = import_string(storage)
+    except ImportError as error:
+        raise ValueError(f'Unknown storage "{storage}"') from error
+    if not isinstance(storage_class, type) or not issubclass(
+        storage_class, Storage
+    ):
+        raise ValueError(f'"{storage}" is not a storage class')
+    return storage_class()
+
+
+def get_storage_path(storage: Storage, name: str) -> str | None:
+    """
+    Returns the absolute local path of the file `name` in `storage`, or
+    None if the name points outside of the storage location.
+    """
+    try:
+        path = storage.path(name)
+    except SuspiciousFileOperation:
+        return None
+    except NotImplementedError:
+        # Storages without a local filesystem are assumed to mirror MEDIA_ROOT
+        path = os.path.join(settings.MEDIA_ROOT, name)
+    return os.path.normpath(os.path.abspath(path))
+
+
+class StorageUploader:
+    """
+    Uploads files into a Django storage under the `prefix` directory,
+    skipping files that are already present with the same size.
+
+    The existence of files is checked in batches, by listing each storage
+    directory once, which saves a request per file on remote storages.
+    Storages that can't list directories are asked about each file. The
+    uploader can be used from multiple threads.
+    """
+
+    def __init__(self, storage: Storage, prefix: str = ''):
+        self.storage = storage
+        self.prefix = str(prefix).strip('/')
+        self._listed_dirs = {}
+        self._lock = threading.Lock()
+
+    def get_name(self, name: str) -> str:
+        return posixpath.join(self.prefix, name) if self.prefix else name
+
+    def is_unchanged(self, name: str, size: int) -> bool:
+        return self.exists(name) and self.storage.size(name) == size
+
+    def exists(self, name: str) -> bool:
+        directory, file_name = posixpath.split(name)
+        with self._lock:
+            file_names = self._listed_dirs.get(directory)
+            if file_names is None:
+                file_names = self._listed_dirs[directory] = self._list(directory)
+        if file_names is NotImplemented:
+            return self.storage.exists(name)
+        return file_name in file_names
+
+    def upload(self, name: str, content) -> str:
+        """
+        Saves `content` (a file object) as `name`, replacing the existing
+        file, and returns the name.
+        """
+        if self.exists(name):
+            self.storage.delete(name)
+        saved_name = self.storage.save(name, File(content, name=name))
+        if saved_name != name:
+            raise OSError(f'Storage saved "{name}" as "{saved_name}"')
+        directory, file_name = posixpath.split(name)
+        with self._lock:
+            file_names = self._listed_dirs.get(directory)
+            if isinstance(file_names, set):
+                file_names.add(file_name)
+        return saved_name
+
+    def _list(self, directory: str):
+        try:
+            _, file_names = self.storage.listdir(directory)
+        except NotImplementedError:
+            return NotImplemented
+        except FileNotFoundError:
+            return set()
+        return set(file_names)
@@ -0,0 +1,181 @@
+"""
+Test case mixin and test runner that load the labels and media files from
+FIXTURES settings variable once per test database, instead of once per test
+case (e.g. with `TestCase.fixtures` or "loaddata --all" in `setUpTestData`).
+
+The fixtures are committed into the test database, and the changes made by
+each test are rolled back by `TestCase` as usual. Media files are copied into
+a temporary MEDIA_ROOT, which is shared by all tests of the run and removed
+when the run ends.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_migrate
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from smart_fixtures.api import load_fixtures
+
+# Environment variables inherited by parallel test worker processes
+TEST_MEDIA_ROOT_ENV = 'SMART_FIXTURES_TEST_MEDIA_ROOT'
+TEST_DATABASES_ENV = 'SMART_FIXTURES_TEST_DATABASES'
+
+_test_settings = None
+_loaded_databases = set()
+
+
+def setup_test_fixtures(using: str = DEFAULT_DB_ALIAS, verbosity: int = 0):
+    """
+    Loads the labels and media files from FIXTURES settings variable into
+    the test database `using`, unless they were already loaded into it by
+    this process or by `SmartFixturesTestRunner` (whose parallel workers
+    get clones of the loaded database).
+
+    MEDIA_ROOT is overridden with a temporary directory for the rest of
+    the process, and media destinations inside MEDIA_ROOT are moved into
+    it (see `get_test_fixtures_settings`).
+    """
+    _enable_test_settings(_get_test_media_root())
+    runner_databases = os.environ.get(TEST_DATABASES_ENV, '').split(',')
+    if using in _loaded_databases or using in runner_databases:
+        return
+    load_fixtures(database=using, verbosity=verbosity)
+    _loaded_databases.add(using)
+
+
+def get_test_fixtures_settings(media_root: str) -> dict:
+    """
+    Returns FIXTURES settings variable for loading fixtures into test
+    databases. Destinations of media entries inside MEDIA_ROOT are moved
+    into `media_root`. Media sync and fixtures cache are disabled, because
+    test databases and media directories start empty.
+    """
+    fixtures_settings = dict(getattr(settings, 'FIXTURES', None) or {})
+    media = fixtures_settings.get('media')
+    if isinstance(media, (list, tuple)):
+        fixtures_settings['media'] = [
+            _get_test_media_dir(media_dir, media_root) for media_dir in media
+        ]
+    fixtures_settings['media_sync'] = None
+    fixtures_settings['fixtures_cache'] = False
+    return fixtures_settings
+
+
+class SmartFixturesTestCase:
+    """
+    Mixin of test cases that use the fixtures from FIXTURES settings
+    variable, which are loaded into the test database before the first
+    of these test cases runs (see `setup_test_fixtures`):
+
+        class MyTests(SmartFixturesTestCase, TestCase):
+            ...
+
+    Fixtures are loaded before `TestCase` opens its transactions, so they
+    are committed once and kept for all test cases. `TransactionTestCase`
+    flushes the database after each test, so test cases based on it need
+    `SmartFixturesTestRunner` and `serialized_rollback = True` to have
+    the fixtures restored.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        if cls.databases == '__all__' or DEFAULT_DB_ALIAS in cls.databases:
+            setup_test_fixtures(DEFAULT_DB_ALIAS)
+        super().setUpClass()
+
+
+class SmartFixturesTestRunner(DiscoverRunner):
+    """
+    Test runner that loads the fixtures from FIXTURES settings variable
+    when the default test database is created (or reused with "--keepdb"),
+    right after it's migrated. The fixtures are therefore in the clones of
+    the database used by parallel workers, and in the serialized contents
+    restored by `TransactionTestCase` with `serialized_rollback = True`:
+
+        TEST_RUNNER = 'smart_fixtures.testing.SmartFixturesTestRunner'
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        _enable_test_settings(_get_test_media_root())
+
+    def setup_databases(self, **kwargs):
+        aliases = kwargs.get('aliases')
+        if aliases is not None and DEFAULT_DB_ALIAS not in aliases:
+            return super().setup_databases(**kwargs)
+
+        # "post_migrate" signal is sent for each app, the fixtures are
+        # loaded after the last one
+        last_app_config = [
+            app_config for app_config in apps.get_app_configs()
+            if app_config.models_module is not None
+        ][-1]
+
+        def load_migrated_fixtures(sender, using, **kwargs):
+            if sender is last_app_config and using == DEFAULT_DB_ALIAS:
+                setup_test_fixtures(using, max(self.verbosity - 1, 0))
+
+        post_migrate.connect(load_migrated_fixtures)
+        try:
+            old_config = super().setup_databases(**kwargs)
+        finally:
+            post_migrate.disconnect(load_migrated_fixtures)
+        os.environ[TEST_DATABASES_ENV] = ','.join(sorted(_loaded_databases))
+        return old_config
+
+    def teardown_test_environment(self, **kwargs):
+        _disable_test_settings()
+        _loaded_databases.clear()
+        os.environ.pop(TEST_DATABASES_ENV, None)
+        media_root = os.environ.pop(TEST_MEDIA_ROOT_ENV, None)
+        if media_root:
+            shutil.rmtree(media_root, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
+
+
+def _get_test_media_root() -> str:
+    media_root = os.environ.get(TEST_MEDIA_ROOT_ENV)
+    if media_root is None:
+        media_root = tempfile.mkdtemp(prefix='smart_fixtures_media_')
+        atexit.register(shutil.rmtree, media_root, ignore_errors=True)
+        os.environ[TEST_MEDIA_ROOT_ENV] = media_root
+    return media_root
+
+
+def _enable_test_settings(media_root: str):
+    global _test_settings
+    if _test_settings is not None:
+        return
+    _test_settings = override_settings(
+        MEDIA_ROOT=media_root,
+        FIXTURES=get_test_fixtures_settings(media_root),
+    )
+    _test_settings.enable()
+
+
+def _disable_test_settings():
+    global _test_settings
+    if _test_settings is not None:
+        _test_settings.disable()
+        _test_settings = None
+
+
+def _get_test_media_dir(media_dir, media_root: str):
+    if (
+        not isinstance(media_dir, dict)
+        or 'dest' not in media_dir
+        or media_dir.get('storage') is not None
+    ):
+        return media_dir
+    try:
+        relative_dest = Path(media_dir['dest']).relative_to(settings.MEDIA_ROOT)
+    except ValueError:
+        return media_dir
+    return {**media_dir, 'dest': Path(media_root) / relative_dest}
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError
+from django.test import TestCase, override_settings
+
+from dummy.models import FirstDummy, SecondDummy
+from smart_fixtures.api import install_media_files, load_fixtures
+
+
+class TestLoadFixtures(TestCase):
+
+    def test_load_fixtures(self):
+        stdout = StringIO()
+        loaded_object_count = load_fixtures(
+            'first_dummies', stdout=stdout, chunk_size=1
+        )
+
+        self.assertEqual(loaded_object_count, 3)
+        self.assertIn('Installed 3 object(s) from 1 fixture(s)', stdout.getvalue())
+        self.assertEqual(FirstDummy.objects.count(), 3)
+
+    @override_settings(FIXTURES={'labels': ['second_dummies'], 'media': []})
+    def test_load_fixtures_from_settings(self):
+        self.assertEqual(load_fixtures(verbosity=0), 1)
+        self.assertEqual(SecondDummy.objects.count(), 1)
+
+    def test_load_fixtures_with_invalid_arguments(self):
+        with self.assertRaisesMessage(TypeError, 'Unknown option(s)'):
+            load_fixtures('first_dummies', chunks=1)
+
+        with override_settings(FIXTURES=None):
+            with self.assertRaisesMessage(CommandError, 'Pass fixture labels'):
+                load_fixtures()
+
+
+class TestInstallMediaFiles(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.tmp_dir, 'src')
+        self.dest_dir = os.path.join(self.tmp_dir, 'dest')
+        os.makedirs(self.src_dir)
+        for name in ['image1.jpg', 'image2.png']:
+            with open(os.path.join(self.src_dir, name), 'wb') as file:
+                file.write(name.encode())
+
+    def test_install_media_files(self):
+        copied_files = []
+        with override_settings(FIXTURES={
+            'labels': [],
+            'media': [{'src': self.src_dir, 'dest': self.dest_dir}],
+            'media_workers': 2,
+            'cache_dir': self.tmp_dir,
+        }):
+            result = asyncio.run(install_media_files(on_copied=copied_files.append))
+            self.assertEqual(len(result.copied_files), 2)
+            self.assertEqual(
+                [media_file.name for media_file in copied_files],
+                [os.path.basename(src) for src, _ in result.copied_files],
+            )
+
+            other_dest_dir = os.path.join(self.tmp_dir, 'other')
+            result = asyncio.run(install_media_files(
+                [{'src': self.src_dir, 'dest': other_dest_dir}],
+                sync_mode='mtime',
+                workers=1,
+            ))
+            self.assertEqual(len(result.copied_files), 2)
+            self.assertEqual(len(os.listdir(other_dest_dir)), 2)
+
+    def test_install_media_files_with_invalid_workers(self):
+        for workers in [0, -1, 'all']:
+            with self.subTest(workers=workers):
+                with self.assertRaisesMessage(
+                    ValueError, f'Invalid number of media workers "{workers}"'
+                ):
+                    asyncio.run(install_media_files([], workers=workers))
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
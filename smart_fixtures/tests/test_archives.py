@@ -0,0 +1,110 @@
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import zipfile
+
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from smart_fixtures.archives import (
+    is_archive,
+    is_safe_member_name,
+    iter_archive_members,
+)
+
+
+class TestArchives(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def _create_tar(self, name: str, mode: str = 'w') -> str:
+        path = os.path.join(self.tmp_dir, name)
+        with tarfile.open(path, mode) as archive:
+            directory = tarfile.TarInfo('./images')
+            directory.type = tarfile.DIRTYPE
+            archive.addfile(directory)
+            for member_name, content in [
+                ('./images/a.png', b'a'),
+                ('b.txt', b'bb'),
+            ]:
+                info = tarfile.TarInfo(member_name)
+                info.size = len(content)
+                info.mtime = 1_600_000_000
+                info.mode = 0o640
+                archive.addfile(info, io.BytesIO(content))
+        return path
+
+    def _read_members(self, path: str) -> list[tuple]:
+        return [
+            (member.name, member.size, member.mtime_ns, member.mode,
+             member.file.read())
+            for member in iter_archive_members(path)
+        ]
+
+    def test_iter_tar_members(self):
+        expected_members = [
+            ('images/a.png', 1, 1_600_000_000_000_000_000, 0o640, b'a'),
+            ('b.txt', 2, 1_600_000_000_000_000_000, 0o640, b'bb'),
+        ]
+        for name, mode in [('media.tar', 'w'), ('media.tar.gz', 'w:gz')]:
+            with self.subTest(name=name):
+                path = self._create_tar(name, mode)
+                self.assertEqual(self._read_members(path), expected_members)
+
+    def test_iter_zip_members(self):
+        path = os.path.join(self.tmp_dir, 'media.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            archive.writestr('images/', b'')
+            archive.writestr(
+                zipfile.ZipInfo('images/a.png', (2020, 9, 13, 12, 26, 40)), b'a'
+            )
+
+        members = list(iter_archive_members(path))
+
+        self.assertEqual(len(members), 1)
+        self.assertEqual(members[0].name, 'images/a.png')
+        self.assertEqual(members[0].size, 1)
+        self.assertEqual(members[0].mode, 0o600)
+        self.assertEqual(members[0].mtime_ns % 1_000_000_000, 0)
+
+    @patch('smart_fixtures.archives.zstandard')
+    def test_iter_tar_zstd_members(self, mock_zstandard):
+        # The "decompressor" passes the plain tar archive through
+        mock_zstandard.ZstdDecompressor.return_value.stream_reader.side_effect = (
+            lambda compressed: compressed
+        )
+        path = self._create_tar('media.tar.zst')
+
+        self.assertEqual(
+            [member[0] for member in self._read_members(path)],
+            ['images/a.png', 'b.txt'],
+        )
+
+    @patch('smart_fixtures.archives.zstandard', None)
+    def test_iter_tar_zstd_members_without_zstandard(self):
+        path = self._create_tar('media.tar.zst')
+        with self.assertRaisesMessage(
+            OSError, 'Install "zstandard" package (e.g. "django-smart-fixtures[zstd]")'
+        ):
+            list(iter_archive_members(path))
+
+    def test_is_archive(self):
+        path = self._create_tar('media.tar.gz', 'w:gz')
+        self.assertTrue(is_archive(path))
+        self.assertFalse(is_archive(self.tmp_dir))
+        self.assertFalse(is_archive(os.path.join(self.tmp_dir, 'missing.zip')))
+
+    def test_is_safe_member_name(self):
+        self.assertTrue(is_safe_member_name('images/a.png'))
+        self.assertFalse(is_safe_member_name(''))
+        self.assertFalse(is_safe_member_name('/etc/passwd'))
+        self.assertFalse(is_safe_member_name('images/../../a.png'))
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
@@ -0,0 +1,199 @@
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import Group
+from django.core.management import CommandError
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from dummy.models import FirstDummy, SecondDummy
+from smart_fixtures.bulk import BulkObjectWriter
+from smart_fixtures.tests.utils import FixtureFilesMixin
+
+
+class TestBulkLoading(FixtureFilesMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self._write_fixture('bulk_dummies.json', [
+            *[
+                {
+                    'model': 'dummy.firstdummy',
+                    'pk': pk,
+                    'fields': {
+                        'name': f'First Dummy {pk}',
+                        'description': 'Lorem ipsum',
+                        'image': f'dummy/images/{pk}.png',
+                    },
+                }
+                for pk in range(1, 6)
+            ],
+            {
+                'model': 'dummy.seconddummy',
+                'pk': 1,
+                'fields': {
+                    'name': 'Second Dummy',
+                    'description': 'Lorem ipsum',
+                    'file': 'dummy/files/sample.pdf',
+                },
+            },
+            {
+                'model': 'auth.group',
+                'pk': 1,
+                'fields': {
+                    'name': 'Editors',
+                    'permissions': [
+                        ['add_firstdummy', 'dummy', 'firstdummy'],
+                        ['change_firstdummy', 'dummy', 'firstdummy'],
+                    ],
+                },
+            },
+            {
+                'model': 'dummy.firstdummy',
+                'pk': 1,
+                'fields': {
+                    'name': 'First Dummy 1 (updated)',
+                    'description': 'Lorem ipsum',
+                    'image': 'dummy/images/1.png',
+                },
+            },
+        ])
+
+    def _assert_loaded(self):
+        self.assertEqual(FirstDummy.objects.count(), 5)
+        self.assertEqual(SecondDummy.objects.count(), 1)
+        self.assertEqual(
+            FirstDummy.objects.get(pk=1).name, 'First Dummy 1 (updated)'
+        )
+        self.assertEqual(
+            sorted(Group.objects.get(pk=1).permissions.values_list(
+                'codename', flat=True
+            )),
+            ['add_firstdummy', 'change_firstdummy'],
+        )
+
+    def test_bulk_loading(self):
+        FirstDummy.objects.create(pk=2, name='Old', description='', image='')
+
+        with patch.object(
+            BulkObjectWriter, '_write', autospec=True,
+            side_effect=BulkObjectWriter._write,
+        ) as mock_write:
+            self._call_command('bulk_dummies', '--bulk', '--bulk-batch-size', '3')
+
+        self._assert_loaded()
+        self.assertEqual(FirstDummy.objects.get(pk=2).name, 'First Dummy 2')
+        # 5 first dummies in batches of 3, 1 second dummy and 1 group:
+        self.assertEqual(mock_write.call_count, 4)
+
+    @patch.object(
+        connection.features, 'supports_update_conflicts_with_target', False
+    )
+    def test_bulk_loading_without_upsert_support(self):
+        FirstDummy.objects.create(pk=2, name='Old', description='', image='')
+
+        self._call_command('bulk_dummies', '--bulk')
+
+        self._assert_loaded()
+        self.assertEqual(FirstDummy.objects.get(pk=2).name, 'First Dummy 2')
+
+    def test_bulk_loading_with_forward_references(self):
+        self._write_fixture('forward_reference.json', [{
+            'model': 'auth.user',
+            'pk': 1,
+            'fields': {
+                'username': 'editor',
+                'password': '',
+                'groups': [['Writers']],
+            },
+        }])
+        self._write_fixture('writers.json', [{
+            'model': 'auth.group',
+            'fields': {'name': 'Writers'},
+        }])
+
+        self._call_command('forward_reference', 'writers', '--bulk')
+
+        self.assertEqual(
+            list(Group.objects.filter(user__pk=1).values_list('name', flat=True)),
+            ['Writers'],
+        )
+
+    def test_bulk_loading_from_settings(self):
+        self.fixtures_settings.update(labels=['bulk_dummies'], bulk=True)
+        with patch.object(BulkObjectWriter, 'flush') as mock_flush:
+            self._call_command('--all', exclude=['auth'])
+
+        mock_flush.assert_called_once()
+        self.assertEqual(Group.objects.count(), 0)
+
+    def test_upsert_changed(self):
+        FirstDummy.objects.create(
+            pk=2, name='Old', description='Lorem ipsum', image='dummy/images/2.png'
+        )
+        FirstDummy.objects.create(
+            pk=3,
+            name='First Dummy 3',
+            description='Lorem ipsum',
+            image='dummy/images/3.png',
+        )
+
+        with patch.object(
+            QuerySet, 'bulk_update', autospec=True,
+            side_effect=QuerySet.bulk_update,
+        ) as mock_bulk_update:
+            output = self._call_command('bulk_dummies', '--upsert-changed')
+
+        self._assert_loaded()
+        self.assertEqual(FirstDummy.objects.get(pk=2).name, 'First Dummy 2')
+        instances, fields = mock_bulk_update.call_args.args[1:]
+        self.assertEqual([instance.pk for instance in instances], [2])
+        self.assertEqual(fields, ['name'])
+        # The unchanged object is not written, so it's not counted as installed
+        self.assertIn('Installed 7 object(s) (of 8) from 1 fixture(s)', output)
+        self.assertIn('dummy.FirstDummy: 3 inserted, 1 updated, 1 unchanged', output)
+        self.assertIn('dummy.SecondDummy: 1 inserted, 0 updated, 0 unchanged', output)
+
+    def test_upsert_changed_from_settings(self):
+        self.fixtures_settings.update(labels=['bulk_dummies'], upsert_changed=True)
+        self._call_command('--all')
+        self._call_command('--all')
+
+        self._assert_loaded()
+
+    def test_bulk_loading_with_invalid_batch_size(self):
+        with self.assertRaisesMessage(CommandError, 'bulk batch size "0"'):
+            self._call_command('bulk_dummies', '--bulk', '--bulk-batch-size', '0')
+
+        self.fixtures_settings.update(bulk=True, bulk_batch_size='all')
+        with self.assertRaisesMessage(CommandError, 'bulk batch size "all"'):
+            self._call_command('bulk_dummies')
+
+    @patch('smart_fixtures.bulk.models.QuerySet.bulk_create')
+    def test_bulk_loading_with_database_error(self, mock_bulk_create):
+        mock_bulk_create.side_effect = ValueError(
+            'A string literal cannot contain NUL (0x00) characters.'
+        )
+        with self.assertRaisesMessage(
+            ValueError, 'Could not load dummy.FirstDummy objects: A string'
+        ):
+            self._call_command('bulk_dummies', '--bulk')
+
+    def test_can_write(self):
+        def create_obj(pk=1, parents=None, fields=()):
+            return Mock(object=Mock(pk=pk, _meta=Mock(
+                parents=parents or {},
+                concrete_fields=[Mock(spec=[], **field) for field in fields],
+            )))
+
+        self.assertTrue(BulkObjectWriter.can_write(create_obj()))
+        self.assertFalse(BulkObjectWriter.can_write(create_obj(pk=None)))
+        self.assertFalse(BulkObjectWriter.can_write(
+            create_obj(parents={'Parent': 'parent_ptr'})
+        ))
+        self.assertFalse(BulkObjectWriter.can_write(
+            create_obj(fields=[{'auto_now': True}])
+        ))
+        self.assertFalse(BulkObjectWriter.can_write(
+            create_obj(fields=[{'auto_now_add': True}])
+        ))
@@ -0,0 +1,268 @@
+import json
+import os
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group, User
+from django.core.management import CommandError
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from dummy.models import FirstDummy, SecondDummy
+from smart_fixtures.checkpoints import (
+    LoadCheckpoints,
+    get_checkpoints_path,
+    iter_chunks,
+)
+from smart_fixtures.management.commands.loaddata import Command
+from smart_fixtures.tests.utils import FixtureFilesMixin, first_dummy
+
+
+class TestLoadCheckpoints(FixtureFilesMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp_dir, 'checkpoints', 'load.json')
+        self.fixture_file = os.path.join(self.tmp_dir, 'dummies.jsonl')
+        with open(self.fixture_file, 'w') as file:
+            file.write('{}\n')
+
+    def test_record_and_load(self):
+        checkpoints = LoadCheckpoints.load(self.path)
+        self.assertEqual(checkpoints.get_committed(self.fixture_file), (0, []))
+
+        checkpoints.record(self.fixture_file, 4, [1])
+        checkpoints = LoadCheckpoints.load(self.path)
+        self.assertEqual(checkpoints.get_committed(self.fixture_file), (4, [1]))
+
+        with open(self.fixture_file, 'a') as file:
+            file.write('{}\n')
+        self.assertEqual(checkpoints.get_committed(self.fixture_file), (0, []))
+
+        checkpoints.record(self.fixture_file, 4, [1])
+        os.remove(self.fixture_file)
+        self.assertEqual(checkpoints.get_committed(self.fixture_file), (0, []))
+
+        checkpoints.delete()
+        self.assertFalse(os.path.exists(self.path))
+        checkpoints.delete()
+
+    def test_load_invalid_file(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w') as file:
+            json.dump({'version': 0, 'files': {self.fixture_file: {}}}, file)
+        self.assertEqual(LoadCheckpoints.load(self.path).files, {})
+
+        with open(self.path, 'w') as file:
+            file.write('{')
+        self.assertEqual(LoadCheckpoints.load(self.path).files, {})
+
+    def test_without_path(self):
+        checkpoints = LoadCheckpoints()
+        checkpoints.record(self.fixture_file, 2, [])
+        self.assertEqual(checkpoints.get_committed(self.fixture_file), (2, []))
+        checkpoints.delete()
+        self.assertEqual(checkpoints.files, {})
+
+    def test_get_checkpoints_path(self):
+        with override_settings(FIXTURES={'cache_dir': self.tmp_dir}):
+            path = get_checkpoints_path('default', ['first', 'second'])
+            self.assertEqual(os.path.dirname(path), os.path.join(
+                self.tmp_dir, 'checkpoints'
+            ))
+            self.assertNotEqual(path, get_checkpoints_path('other', ['first']))
+            self.assertNotEqual(path, get_checkpoints_path('default', ['first']))
+
+    def test_iter_chunks(self):
+        self.assertEqual(list(iter_chunks(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(iter_chunks(range(4), 2)), [[0, 1], [2, 3]])
+        self.assertEqual(list(iter_chunks([], 2)), [])
+
+
+class TestChunkedLoading(FixtureFilesMixin, TestCase):
+
+    def test_load_in_chunks(self):
+        fixture_file = self._write_fixture(
+            'dummies.jsonl', [first_dummy(pk) for pk in range(1, 6)]
+        )
+
+        with patch.object(
+            Command, '_save_chunk', autospec=True, side_effect=Command._save_chunk
+        ) as save_chunk:
+            output = self._call_command(
+                fixture_file, 'second_dummies', chunk_size=2, verbosity=2
+            )
+
+        self.assertEqual(save_chunk.call_count, 4)
+        self.assertIn("Installing jsonl fixture 'dummies' from", output)
+        self.assertIn('Installed 6 object(s) from 2 fixture(s)', output)
+        self.assertEqual(FirstDummy.objects.count(), 5)
+        self.assertEqual(SecondDummy.objects.count(), 1)
+
+    def test_load_in_chunks_with_config_and_excluded_models(self):
+        self.fixtures_settings['chunk_size'] = 1
+        output = self._call_command(
+            'first_dummies', 'second_dummies', exclude=['dummy.seconddummy']
+        )
+
+        self.assertIn('Installed 3 object(s) (of 4) from 2 fixture(s)', output)
+        self.assertEqual(SecondDummy.objects.count(), 0)
+
+    def test_load_in_chunks_with_bulk_writer_and_profile(self):
+        fixture_file = self._write_fixture(
+            'dummies.jsonl', [first_dummy(pk) for pk in range(1, 4)]
+        )
+
+        output = self._call_command(
+            fixture_file, chunk_size=2, bulk=True, profile=True
+        )
+
+        self.assertIn('Installed 3 object(s) from 1 fixture(s)', output)
+        self.assertIn('constraint_checks', output)
+        self.assertEqual(FirstDummy.objects.count(), 3)
+
+    def test_load_in_chunks_with_forward_references(self):
+        fixture_file = self._write_fixture('users.jsonl', [
+            {
+                'model': 'auth.user',
+                'pk': 1,
+                'fields': {
+                    'username': 'editor',
+                    'password': '',
+                    'groups': [['Editors']],
+                },
+            },
+            {'model': 'auth.group', 'pk': 1, 'fields': {'name': 'Editors'}},
+        ])
+
+        self._call_command(fixture_file, chunk_size=1)
+
+        self.assertEqual(
+            list(User.objects.get(pk=1).groups.values_list('name', flat=True)),
+            ['Editors'],
+        )
+
+    def test_load_in_chunks_with_invalid_fixture(self):
+        fixture_file = self._write_fixture(
+            'dummies.jsonl', [first_dummy(1), {'model': 'dummy.unknown', 'pk': 1}]
+        )
+
+        with self.assertRaisesMessage(Exception, 'Problem installing fixture'):
+            self._call_command(fixture_file, chunk_size=1)
+
+    def test_load_in_chunks_with_invalid_constraints(self):
+        fixture_file = self._write_fixture('dummies.jsonl', [first_dummy(1)])
+
+        with patch(
+            'django.db.backends.sqlite3.base.DatabaseWrapper.check_constraints',
+            side_effect=IntegrityError('invalid foreign key'),
+        ):
+            with self.assertRaisesMessage(
+                IntegrityError, 'Problem installing fixtures: invalid foreign key'
+            ):
+                self._call_command(fixture_file, chunk_size=1)
+
+    def test_load_in_chunks_with_empty_fixture(self):
+        fixture_file = self._write_fixture('dummies.jsonl', [])
+
+        with self.assertWarnsMessage(RuntimeWarning, 'No fixture data found'):
+            output = self._call_command(fixture_file, chunk_size=1)
+        self.assertIn('Installed 0 object(s) from 1 fixture(s)', output)
+
+    def test_load_in_chunks_from_stdin(self):
+        with patch('sys.stdin', StringIO(json.dumps([first_dummy(1)]))):
+            output = self._call_command('-', chunk_size=1, format='json')
+
+        self.assertIn('Installed 1 object(s) from 1 fixture(s)', output)
+
+    def test_invalid_chunk_size(self):
+        with self.assertRaisesMessage(CommandError, 'Invalid chunk size "0"'):
+            self._call_command('first_dummies', chunk_size=0)
+
+
+class TestChunkedLoadingCheckpoints(FixtureFilesMixin, TransactionTestCase):
+
+    def test_resume_interrupted_load(self):
+        fixture_file = self._write_fixture('dummies.jsonl', [
+            {
+                'model': 'auth.user',
+                'pk': 1,
+                'fields': {
+                    'username': 'editor',
+                    'password': '',
+                    'groups': [['Editors']],
+                },
+            },
+            {'model': 'auth.group', 'pk': 1, 'fields': {'name': 'Editors'}},
+            *[first_dummy(pk) for pk in range(1, 4)],
+        ])
+        self.fixtures_settings['labels'] = [fixture_file]
+        self.fixtures_settings['chunk_size'] = 2
+        with override_settings(FIXTURES=self.fixtures_settings):
+            checkpoints_path = get_checkpoints_path('default', [fixture_file])
+
+        save_chunk = Command._save_chunk
+
+        def interrupted_save_chunk(command, chunk):
+            if FirstDummy.objects.count() == 2:
+                raise KeyboardInterrupt
+            save_chunk(command, chunk)
+
+        with patch.object(Command, '_save_chunk', interrupted_save_chunk):
+            with self.assertRaises(KeyboardInterrupt):
+                self._call_command('--all')
+        self.assertEqual(FirstDummy.objects.count(), 2)
+        self.assertTrue(os.path.exists(checkpoints_path))
+
+        output = self._call_command('--all')
+
+        self.assertIn('Resumed an interrupted load, skipped 4 committed', output)
+        self.assertIn('Installed 1 object(s) from 1 fixture(s)', output)
+        self.assertEqual(FirstDummy.objects.count(), 3)
+        self.assertEqual(
+            list(User.objects.get(pk=1).groups.values_list('name', flat=True)),
+            ['Editors'],
+        )
+        self.assertFalse(os.path.exists(checkpoints_path))
+
+    def test_resume_with_unresolved_forward_references_and_force(self):
+        fixture_file = self._write_fixture('users.jsonl', [
+            {
+                'model': 'auth.user',
+                'pk': 1,
+                'fields': {
+                    'username': 'editor',
+                    'password': '',
+                    'groups': [['Editors']],
+                },
+            },
+            first_dummy(1),
+            {'model': 'auth.group', 'pk': 1, 'fields': {'name': 'Editors'}},
+        ])
+        with override_settings(FIXTURES=self.fixtures_settings):
+            LoadCheckpoints.load(
+                get_checkpoints_path('default', [fixture_file])
+            ).record(fixture_file, 2, [0])
+
+        output = self._call_command(
+            fixture_file, chunk_size=1, exclude=['dummy']
+        )
+
+        self.assertIn('Resumed an interrupted load, skipped 2 committed', output)
+        self.assertIn('Installed 1 object(s) from 1 fixture(s)', output)
+        self.assertEqual(
+            list(User.objects.get(pk=1).groups.values_list('name', flat=True)),
+            ['Editors'],
+        )
+        self.assertEqual(FirstDummy.objects.count(), 0)
+
+        with override_settings(FIXTURES=self.fixtures_settings):
+            LoadCheckpoints.load(
+                get_checkpoints_path('default', [fixture_file])
+            ).record(fixture_file, 1, [0])
+        output = self._call_command(fixture_file, chunk_size=1, force=True)
+
+        self.assertNotIn('Resumed', output)
+        self.assertIn('Installed 3 object(s) from 1 fixture(s)', output)
+        self.assertEqual(FirstDummy.objects.count(), 1)
+        self.assertEqual(Group.objects.count(), 1)
@@ -0,0 +1,134 @@
+import io
+import os
+import pickle
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core import serializers
+from django.core.management import CommandError, call_command
+from django.core.serializers.base import DeserializationError
+from django.test import TestCase, override_settings
+
+from dummy.models import FirstDummy
+from smart_fixtures.compiled import (
+    compile_fixture,
+    get_compiled_fixture,
+    get_compiled_path,
+)
+
+
+class TestCompiledSerializer(TestCase):
+
+    def test_serialize_and_deserialize(self):
+        FirstDummy.objects.create(name='A', description='B', image='a.png')
+        data = serializers.serialize('compiled', FirstDummy.objects.all())
+
+        objects = list(serializers.deserialize('compiled', data))
+        self.assertEqual(len(objects), 1)
+        self.assertEqual(objects[0].object.name, 'A')
+
+    def test_deserialize_other_version(self):
+        stream = io.BytesIO()
+        pickle.dump({'version': 0}, stream)
+        pickle.dump([], stream)
+
+        with self.assertRaises(DeserializationError):
+            list(serializers.deserialize('compiled', stream.getvalue()))
+
+    def test_deserialize_unknown_model(self):
+        stream = io.BytesIO()
+        pickle.dump({'version': 1}, stream)
+        pickle.dump([{'model': 'dummy.unknown', 'pk': 1, 'fields': {}}], stream)
+
+        with self.assertRaises(DeserializationError):
+            list(serializers.deserialize('compiled', stream.getvalue()))
+
+
+class TestCompileFixture(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fixture_file = os.path.join(self.tmp_dir, 'dummies.jsonl')
+        with open(self.fixture_file, 'w') as file:
+            file.write('{"model": "dummy.firstdummy", "pk": 1, "fields": {}}\n\n')
+
+    def test_compile_fixture(self):
+        with override_settings(FIXTURES={'labels': [], 'cache_dir': self.tmp_dir}):
+            self.assertIsNone(get_compiled_fixture(self.fixture_file))
+            with open(self.fixture_file, 'rb') as fixture:
+                compiled_path = compile_fixture(self.fixture_file, fixture, 'jsonl')
+
+            self.assertEqual(compiled_path, get_compiled_path(self.fixture_file))
+            self.assertEqual(get_compiled_fixture(self.fixture_file), compiled_path)
+            with open(compiled_path, 'rb') as compiled:
+                objects = list(serializers.deserialize('compiled', compiled))
+            self.assertEqual(objects[0].object.pk, 1)
+
+            with open(self.fixture_file, 'a') as file:
+                file.write('{"model": "dummy.firstdummy", "pk": 2, "fields": {}}\n')
+            self.assertIsNone(get_compiled_fixture(self.fixture_file))
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestCompileFixturesCommand(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fixtures_settings = {
+            'labels': ['first_dummies', 'second_dummies'],
+            'cache_dir': self.tmp_dir,
+        }
+
+    def _call_command(self, name, *args) -> str:
+        stdout = StringIO()
+        with override_settings(FIXTURES=self.fixtures_settings):
+            call_command(name, *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_handle(self):
+        output = self._call_command('compilefixtures')
+        self.assertIn('Compiled 2 fixture file(s), 0 up to date', output)
+
+        output = self._call_command('compilefixtures')
+        self.assertIn('Compiled 0 fixture file(s), 2 up to date', output)
+
+        output = self._call_command('compilefixtures', 'first_dummies', '--force')
+        self.assertIn('Compiled 1 fixture file(s), 0 up to date', output)
+
+        output = self._call_command('loaddata', '--all', '--verbosity', '2')
+        self.assertIn("Installing compiled fixture 'first_dummies'", output)
+        self.assertIn('Installed 4 object(s) from 2 fixture(s)', output)
+        self.assertEqual(FirstDummy.objects.count(), 3)
+
+    def test_handle_with_fixture_paths(self):
+        json_file = os.path.join(self.tmp_dir, 'dummies.json')
+        with open(json_file, 'w') as file:
+            file.write('[{"model": "dummy.firstdummy", "pk": 1, "fields": {}}]')
+        xml_file = os.path.join(self.tmp_dir, 'dummies.xml')
+        with open(xml_file, 'w') as file:
+            file.write('<django-objects version="1.0"></django-objects>')
+
+        output = self._call_command('compilefixtures', json_file, xml_file)
+        self.assertIn('xml fixtures cannot be compiled', output)
+        self.assertIn('Compiled 1 fixture file(s), 0 up to date', output)
+        with override_settings(FIXTURES=self.fixtures_settings):
+            self.assertIsNotNone(get_compiled_fixture(json_file))
+
+    def test_handle_with_stdin(self):
+        with self.assertRaisesMessage(CommandError, 'cannot be compiled from stdin'):
+            self._call_command('compilefixtures', '-')
+
+    def test_handle_without_labels(self):
+        self.fixtures_settings = {}
+        with self.assertRaisesMessage(CommandError, 'Pass fixture labels'):
+            self._call_command('compilefixtures')
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
@@ -0,0 +1,188 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from dummy.models import FirstDummy
+from smart_fixtures.config import (
+    FixturesConfig,
+    get_fixtures_config,
+    get_fixtures_setting,
+)
+
+
+class TestFixturesConfig(TestCase):
+
+    def test_from_settings(self):
+        config = FixturesConfig.from_settings({
+            'labels': ['first_dummies'],
+            'media': [{'src': 'src', 'dest': 'dest', 'strategy': 'symlink'}],
+            'media_sync': 'mtime',
+            'bulk': 1,
+            'chunk_size': 100,
+            'parallel': 2,
+        })
+
+        self.assertEqual(config.labels, ('first_dummies',))
+        self.assertEqual(config.media_sync, 'mtime')
+        self.assertIs(config.bulk, True)
+        self.assertEqual(config.chunk_size, 100)
+        self.assertEqual(config.parallel, 2)
+        self.assertEqual(config.media_workers, 1)
+
+    def test_from_settings_with_invalid_values(self):
+        with self.assertRaises(CommandError) as context:
+            FixturesConfig.from_settings({
+                'labels': ['first_dummies', 1],
+                'media': [
+                    'src',
+                    {'src': 'src'},
+                    {'src': 'src', 'dest': 'dest', 'recursve': True},
+                ],
+                'media_workers': True,
+                'parallel': 0,
+                'chunk_size': '100',
+                'cache_dir': 1,
+                'lables': ['first_dummies'],
+            })
+
+        self.assertEqual(str(context.exception), (
+            'Invalid FIXTURES settings variable:\n'
+            '- Unknown key "lables" in FIXTURES settings variable, expected '
+            'one of: labels, media, media_sync, media_workers, media_report, '
+            'background_media, async_media, fixtures_cache, fixtures_index, '
+            'bulk, bulk_batch_size, upsert_changed, chunk_size, parallel, '
+            'snapshot, fast_load, deduplicate, cache_dir\n'
+            '- Invalid "cache_dir" value 1, expected a path\n'
+            '- Invalid fixture label "1", expected a string\n'
+            "- Invalid media entry 'src', expected a dictionary\n"
+            "- Media entry {'src': 'src'} is missing 'dest'\n"
+            '- Unknown key "recursve" in media entry for "src", expected one '
+            'of: src, dest, recursive, include, exclude, strategy, '
+            'referenced_only, storage\n'
+            '- Invalid number of media workers "True", expected a positive '
+            'integer\n'
+            '- Invalid number of parallel workers "0", expected a positive '
+            'integer\n'
+            '- Invalid chunk size "100", expected a positive integer'
+        ))
+
+    def test_from_settings_with_invalid_media_and_labels(self):
+        with self.assertRaisesMessage(CommandError, 'Invalid "media" value'):
+            FixturesConfig.from_settings({'media': {'src': 'src'}})
+
+        self.assertEqual(FixturesConfig.from_settings({'labels': 'x'}).labels, ())
+
+    def test_get_fixtures_config(self):
+        with override_settings(FIXTURES={'labels': ['first_dummies']}):
+            config = get_fixtures_config()
+            self.assertIs(get_fixtures_config(), config)
+            self.assertEqual(config.labels, ('first_dummies',))
+
+        with override_settings(FIXTURES={'labels': ['second_dummies']}):
+            self.assertEqual(get_fixtures_config().labels, ('second_dummies',))
+
+        with override_settings(FIXTURES=None):
+            self.assertEqual(get_fixtures_config(), FixturesConfig())
+
+    def test_get_fixtures_setting(self):
+        with override_settings(FIXTURES={'chunk_size': 10, 'media': 'invalid'}):
+            self.assertEqual(get_fixtures_setting('chunk_size'), 10)
+            self.assertEqual(get_fixtures_setting('bulk_batch_size'), 1000)
+            with self.assertRaisesMessage(CommandError, 'Invalid "media" value'):
+                get_fixtures_setting('media')
+
+        with override_settings(FIXTURES={'chunk_size': 0}):
+            with self.assertRaisesMessage(CommandError, 'Invalid chunk size "0"'):
+                get_fixtures_setting('chunk_size')
+
+        with override_settings(FIXTURES=None):
+            self.assertIsNone(get_fixtures_setting('chunk_size'))
+
+    def test_load_labels_with_invalid_media_settings(self):
+        with override_settings(FIXTURES={'labels': [], 'media': ['invalid']}):
+            call_command('loaddata', 'first_dummies', stdout=StringIO())
+
+        self.assertEqual(FirstDummy.objects.count(), 3)
+
+
+class TestLoadDataCommandCheck(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fixtures_settings = {
+            'labels': ['first_dummies', 'second_dummies'],
+            'media': [{'src': self.tmp_dir, 'dest': 'dest'}],
+        }
+
+    def _call_command(self, *args) -> str:
+        stdout = StringIO()
+        with override_settings(FIXTURES=self.fixtures_settings):
+            call_command('loaddata', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    @patch('django.db.backends.base.base.BaseDatabaseWrapper.cursor')
+    @patch('smart_fixtures.management.commands.loaddata.MediaInstaller')
+    def test_handle_with_check(self, mock_installer, mock_cursor):
+        output = self._call_command('--check')
+
+        self.assertIn(
+            'FIXTURES settings variable is valid: 2 label(s) with 2 fixture '
+            'file(s), 1 media source(s)',
+            output,
+        )
+        mock_installer.assert_not_called()
+        mock_cursor.assert_not_called()
+        self.assertFalse(os.path.exists('dest'))
+
+    def test_handle_with_check_and_missing_fixtures(self):
+        self.fixtures_settings['labels'] = ['first_dummies', 'missing', 'other']
+        with self.assertRaises(CommandError) as context:
+            self._call_command('--check')
+
+        self.assertEqual(str(context.exception), (
+            'Fixtures of some labels were not found:\n'
+            "- No fixture named 'missing' found.\n"
+            "- No fixture named 'other' found."
+        ))
+
+    def test_handle_with_check_and_missing_media_source(self):
+        missing_dir = os.path.join(self.tmp_dir, 'missing')
+        self.fixtures_settings['media'].append({'src': missing_dir, 'dest': 'x'})
+        with self.assertRaisesMessage(
+            CommandError,
+            f'Media sources in FIXTURES settings variable do not exist: '
+            f'"{missing_dir}"',
+        ):
+            self._call_command('--check')
+
+        # The same error is raised before media files are copied
+        with self.assertRaisesMessage(CommandError, missing_dir):
+            self._call_command('--all')
+
+    @patch('smart_fixtures.management.commands.loaddata.MediaInstaller')
+    def test_handle_with_missing_fixtures(self, mock_installer):
+        self.fixtures_settings['labels'] = ['first_dummies', 'missing']
+        with self.assertRaisesMessage(
+            CommandError, "No fixture named 'missing' found."
+        ):
+            self._call_command('--all')
+
+        mock_installer.assert_not_called()
+        self.assertFalse(FirstDummy.objects.exists())
+
+    def test_handle_with_check_and_invalid_settings(self):
+        self.fixtures_settings = {'media': []}
+        with self.assertRaisesMessage(
+            CommandError, 'must be a valid dictionary with "labels"'
+        ):
+            self._call_command('--check')
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
@@ -1,47 +1,158 @@
+import os
+import shutil
+import tempfile
+
 from django.test import TestCase, override_settings
 
-from smart_fixtures.utils import create_copied_files_message
+from smart_fixtures.utils import (
+    create_copied_file_line,
+    create_copied_files_summary,
+    create_failed_files_message,
+    create_media_sync_message,
+    create_missing_files_message,
+    create_profile_message,
+    get_cache_dir,
+    load_json_state,
+    save_json_state,
+)
 
 
 @override_settings(BASE_DIR='/home/app')
-class TestCreateCopiedFilesMessage(TestCase):
+class TestCreateCopiedFileLine(TestCase):
 
-    def test_create_copied_files_message_empty(self):
-        file_path_pairs = []
-        result = create_copied_files_message(file_path_pairs)
-        self.assertEqual(result, 'No media files were copied')
+    def test_create_copied_file_line(self):
+        result = create_copied_file_line(
+            3, '/home/app/src/file1.txt', 'dest/file1.txt'
+        )
+        self.assertEqual(result, '3. src/file1.txt -> dest/file1.txt')
 
-    def test_create_copied_files_message_single_pair(self):
-        file_path_pairs = [
-            ('/home/app/src/file1.txt', '/home/app/dest/file1.txt')
-        ]
-        result = create_copied_files_message(file_path_pairs)
+    def test_create_copied_files_summary(self):
+        self.assertEqual(
+            create_copied_files_summary(0, 0), 'No media files were copied'
+        )
+        self.assertEqual(
+            create_copied_files_summary(2, 2048),
+            'Copied 2 media file(s), 2048 bytes',
+        )
+
+
+@override_settings(BASE_DIR='/home/app')
+class TestCreateMissingFilesMessage(TestCase):
+
+    def test_create_missing_files_message(self):
+        result = create_missing_files_message([
+            '/home/app/media/a.png',
+            '/home/project/media/b.png',
+        ])
+        self.assertEqual(result, (
+            'Referenced media files not found in media sources:\n'
+            '1. media/a.png\n'
+            '2. /home/project/media/b.png\n'
+        ))
+
+
+@override_settings(BASE_DIR='/home/app')
+class TestCreateMediaSyncMessage(TestCase):
+
+    def test_create_media_sync_message(self):
+        result = create_media_sync_message(2, 3, [])
+        self.assertEqual(result, 'Media sync: 2 copied, 3 skipped, 0 removed\n')
+
+    def test_create_media_sync_message_with_removed_files(self):
+        result = create_media_sync_message(
+            0, 1, ['/home/app/dest/file1.txt', '/home/app/dest/file2.txt']
+        )
         expected_message = (
-            'Copied files:\n'
-            '1. src/file1.txt -> dest/file1.txt\n'
+            'Media sync: 0 copied, 1 skipped, 2 removed\n'
+            '1. dest/file1.txt (removed)\n'
+            '2. dest/file2.txt (removed)\n'
         )
         self.assertEqual(result, expected_message)
 
-    def test_create_copied_files_message_multiple_pairs(self):
-        file_path_pairs = [
-            ('/home/app/src/file1.txt', '/home/app/dest/file1.txt'),
-            ('/home/app/src/file2.txt', '/home/app/dest/file2.txt')
+
+@override_settings(BASE_DIR='/home/app')
+class TestCreateFailedFilesMessage(TestCase):
+
+    def test_create_failed_files_message(self):
+        failed_files = [
+            ('/home/app/src/file1.txt', 'Permission denied'),
+            ('/home/project/src/file2.txt', 'No space left on device'),
         ]
-        result = create_copied_files_message(file_path_pairs)
+        result = create_failed_files_message(failed_files)
         expected_message = (
-            'Copied files:\n'
-            '1. src/file1.txt -> dest/file1.txt\n'
-            '2. src/file2.txt -> dest/file2.txt\n'
+            'Failed to copy files:\n'
+            '1. src/file1.txt: Permission denied\n'
+            '2. /home/project/src/file2.txt: No space left on device\n'
         )
         self.assertEqual(result, expected_message)
 
-    def test_create_copied_files_message_base_dir_missmatch(self):
-        file_path_pairs = [
-            ('/home/project/src/file1.txt', '/home/project/dest/file1.txt')
-        ]
-        result = create_copied_files_message(file_path_pairs)
+
+class TestCreateProfileMessage(TestCase):
+
+    def test_create_profile_message(self):
+        result = create_profile_message({
+            'total_time': 1.5,
+            'phases': {
+                'media': {
+                    'time': 0.25, 'objects': 2, 'bytes': 2048,
+                    'objects_per_second': 8.0,
+                },
+            },
+            'labels': {},
+            'models': {
+                'dummy.FirstDummy': {
+                    'time': 0.0, 'objects': 0, 'objects_per_second': None,
+                },
+            },
+        })
         expected_message = (
-            'Copied files:\n'
-            '1. /home/project/src/file1.txt -> /home/project/dest/file1.txt\n'
+            'Profile (total time: 1.500 s)\n'
+            f'{"Phase":<40}   Time (s)    Objects    Objects/s        Bytes\n'
+            f'{"media":<40}      0.250          2          8.0         2048\n'
+            f'{"Model":<40}   Time (s)    Objects    Objects/s        Bytes\n'
+            f'{"dummy.FirstDummy":<40}      0.000          0'
+            f'            -            -\n'
         )
         self.assertEqual(result, expected_message)
+
+
+@override_settings(BASE_DIR='/home/app')
+class TestGetCacheDir(TestCase):
+
+    @override_settings(FIXTURES={'labels': []})
+    def test_get_cache_dir_default(self):
+        self.assertEqual(get_cache_dir(), '/home/app/.smart_fixtures')
+
+    @override_settings(FIXTURES={'labels': [], 'cache_dir': '/tmp/cache'})
+    def test_get_cache_dir_from_settings(self):
+        self.assertEqual(get_cache_dir(), '/tmp/cache')
+
+
+class TestJsonState(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'state', 'state.json')
+
+    def test_save_and_load_json_state(self):
+        self.assertEqual(load_json_state(self.path, 1), {})
+
+        save_json_state(self.path, 1, {'entries': {'a': 1}})
+
+        self.assertEqual(
+            load_json_state(self.path, 1), {'version': 1, 'entries': {'a': 1}}
+        )
+        self.assertEqual(load_json_state(self.path, 2), {})
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['state.json'])
+
+    def test_load_invalid_json_state(self):
+        os.makedirs(os.path.dirname(self.path))
+        for content in ['{', '[]']:
+            with open(self.path, 'w') as state_file:
+                state_file.write(content)
+            self.assertEqual(load_json_state(self.path, 1), {})
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
@@ -0,0 +1,282 @@
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group
+from django.contrib.sessions.models import Session
+from django.core.serializers.base import DeserializedObject
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from dummy.models import FirstDummy, SecondDummy
+from smart_fixtures.checkpoints import LoadCheckpoints, get_checkpoints_path
+from smart_fixtures.deduplication import ObjectDeduplicator, PrimaryKeyIndex
+from smart_fixtures.tests.utils import FixtureFilesMixin, first_dummy
+
+
+def _session(session_key: str, data: str) -> dict:
+    return {
+        'model': 'sessions.session',
+        'pk': session_key,
+        'fields': {'session_data': data, 'expire_date': '2030-01-01T00:00:00Z'},
+    }
+
+
+def _group(pk: int, name: str, permissions: list | None = None) -> dict:
+    fields = {'name': name}
+    if permissions is not None:
+        fields['permissions'] = [
+            [codename, 'dummy', 'firstdummy'] for codename in permissions
+        ]
+    return {'model': 'auth.group', 'pk': pk, 'fields': fields}
+
+
+class TestObjectDeduplicator(TestCase):
+
+    def test_deduplicate(self):
+        deduplicator = ObjectDeduplicator()
+        deduplicator.add_objects([
+            first_dummy(1, 'Base 1'),
+            first_dummy(2, 'Base 2'),
+            first_dummy('1', 'Override 1'),
+            first_dummy(1, 'Final 1'),
+            {'model': 'dummy.unknown', 'pk': 1},
+            {'model': 'invalid', 'pk': 1},
+            {'pk': 1},
+        ])
+        deduplicator.finish()
+
+        self.assertEqual(deduplicator.redundant_count, 2)
+        superseded = [
+            deduplicator.is_superseded(FirstDummy(pk=pk))
+            for pk in [1, 2, 1, 1]
+        ]
+        self.assertEqual(superseded, [True, False, True, False])
+        self.assertEqual(deduplicator.skipped_count, 2)
+
+    def test_deduplicate_many_to_many_fields(self):
+        deduplicator = ObjectDeduplicator()
+        deduplicator.add_objects([
+            _group(1, 'Editors', ['add_firstdummy']),
+            _group(1, 'Editors', ['change_firstdummy']),
+            _group(1, 'Editors (staging)'),
+            _group(2, 'Viewers', ['view_firstdummy']),
+            _group(2, 'Viewers', []),
+        ])
+        deduplicator.finish()
+
+        self.assertEqual(deduplicator.redundant_count, 2)
+        superseded = [
+            deduplicator.is_superseded(Group(pk=pk)) for pk in [1, 1, 1, 2, 2]
+        ]
+        self.assertEqual(superseded, [True, False, False, True, False])
+
+    def test_deduplicate_non_integer_pks(self):
+        deduplicator = ObjectDeduplicator()
+        deduplicator.add_objects([
+            _session('a', 'Base a'),
+            _session('b', 'Base b'),
+            _session('a', 'Override a'),
+            first_dummy(2 ** 63, 'Big'),
+            first_dummy(2 ** 63, 'Big override'),
+            _session('a', 'Final a'),
+        ])
+        deduplicator.finish()
+
+        self.assertEqual(deduplicator.redundant_count, 3)
+        self.assertEqual(
+            [
+                deduplicator.is_superseded(Session(pk=pk))
+                for pk in ['a', 'b', 'a', 'a']
+            ],
+            [True, False, True, False],
+        )
+        self.assertEqual(
+            [deduplicator.is_superseded(FirstDummy(pk=2 ** 63)) for _ in range(2)],
+            [True, False],
+        )
+
+    def test_index_many_to_many_fields_of_non_integer_pks(self):
+        index = PrimaryKeyIndex({'tags'})
+        index.add('a', {'name': 'Base', 'tags': [1]})
+        index.add('b', {'name': 'Base', 'tags': [1]})
+        index.add('a', {'name': 'Override'})
+        index.add('a', {'name': 'Final', 'tags': []})
+
+        self.assertEqual(index.get_duplicate_counts(), {'a': 3})
+        self.assertEqual(
+            index.get_m2m_definitions(), {'a': {'tags': 2}, 'b': {'tags': 0}}
+        )
+
+    def test_keep_only_duplicate_pks(self):
+        deduplicator = ObjectDeduplicator()
+        deduplicator.add_objects([
+            *(
+                _group(pk, f'Group {pk}', ['add_firstdummy'] if pk % 2 else None)
+                for pk in range(1000)
+            ),
+            _group(3, 'Group 3 (staging)'),
+            _group(4, 'Group 4 (staging)'),
+        ])
+        deduplicator.finish()
+
+        self.assertEqual(deduplicator.redundant_count, 1)
+        self.assertEqual(
+            set(deduplicator._saved_definitions),
+            {(Group, 3), (Group, 4)},
+        )
+        # The definition of group 3 that sets permissions is saved as well
+        self.assertEqual(deduplicator._saved_definitions[Group, 3], 0b11)
+        self.assertEqual(deduplicator._saved_definitions[Group, 4], 0b10)
+
+    def test_models_with_objects_without_pk_are_not_deduplicated(self):
+        deduplicator = ObjectDeduplicator()
+        deduplicator.add_objects([
+            first_dummy(1, 'Base 1'),
+            first_dummy(None, 'Natural'),
+            first_dummy(1, 'Override 1'),
+            first_dummy('invalid', 'Invalid'),
+            {'model': 'dummy.seconddummy', 'pk': 'invalid', 'fields': {}},
+            {'model': 'dummy.seconddummy', 'pk': 1, 'fields': {}},
+            {'model': 'dummy.seconddummy', 'pk': 1, 'fields': {}},
+        ])
+        deduplicator.finish()
+
+        self.assertEqual(deduplicator.redundant_count, 0)
+        self.assertFalse(deduplicator.is_superseded(FirstDummy(pk=1)))
+        self.assertFalse(deduplicator.is_superseded(SecondDummy(pk=1)))
+
+
+class DeduplicationMixin(FixtureFilesMixin):
+
+    def setUp(self):
+        super().setUp()
+        self.base_file = self._write_fixture('base.json', [
+            first_dummy(1, 'Base 1'),
+            first_dummy(2, 'Base 2'),
+            _group(1, 'Editors', ['add_firstdummy']),
+            _group(2, 'Viewers', ['view_firstdummy']),
+        ])
+        self.overrides_file = self._write_fixture('overrides.jsonl', [
+            first_dummy(1, 'Override 1'),
+            _group(1, 'Editors (staging)'),
+            _group(2, 'Viewers', []),
+        ])
+        self.xml_file = self._write_fixture(
+            'xml_overrides.xml',
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<django-objects version="1.0">'
+            '<object model="dummy.firstdummy" pk="2">'
+            '<field name="name" type="CharField">Xml 2</field>'
+            '<field name="description" type="TextField"></field>'
+            '<field name="image" type="FileField"></field>'
+            '</object>'
+            '</django-objects>',
+        )
+
+    def _assert_loaded(self):
+        self.assertEqual(
+            dict(FirstDummy.objects.values_list('pk', 'name')),
+            {1: 'Override 1', 2: 'Xml 2'},
+        )
+        editors = Group.objects.get(pk=1)
+        self.assertEqual(editors.name, 'Editors (staging)')
+        self.assertEqual(
+            list(editors.permissions.values_list('codename', flat=True)),
+            ['add_firstdummy'],
+        )
+        self.assertFalse(Group.objects.get(pk=2).permissions.exists())
+
+
+class TestDeduplicatedLoading(DeduplicationMixin, TestCase):
+
+    def test_load_with_deduplicate(self):
+        labels = [self.base_file, self.overrides_file, self.xml_file]
+
+        with patch.object(
+            DeserializedObject,
+            'save',
+            autospec=True,
+            side_effect=DeserializedObject.save,
+        ) as save:
+            output = self._call_command(*labels, deduplicate=True)
+
+        self._assert_loaded()
+        self.assertEqual(save.call_count, 5)
+        self.assertIn('Installed 5 object(s) (of 8) from 3 fixture(s)', output)
+        self.assertIn(
+            'Skipped 3 redundant write(s) of objects redefined by later fixtures',
+            output,
+        )
+
+    def test_load_with_deduplicate_setting_and_chunks(self):
+        self.fixtures_settings['labels'] = [
+            self.base_file, self.overrides_file, self.xml_file
+        ]
+        self.fixtures_settings['deduplicate'] = True
+
+        output = self._call_command('--all', chunk_size=2, profile=True)
+
+        self._assert_loaded()
+        self.assertIn('Skipped 3 redundant write(s)', output)
+        self.assertIn('deduplication', output)
+
+    def test_load_with_deduplicate_and_bulk(self):
+        output = self._call_command(
+            self.base_file,
+            self.overrides_file,
+            self.xml_file,
+            deduplicate=True,
+            bulk=True,
+            verbosity=0,
+        )
+
+        self._assert_loaded()
+        self.assertEqual(output, '')
+
+    def test_load_without_deduplicate(self):
+        output = self._call_command(
+            self.base_file, self.overrides_file, self.xml_file
+        )
+
+        self._assert_loaded()
+        self.assertNotIn('redundant', output)
+
+    def test_load_with_deduplicate_from_stdin(self):
+        with patch('sys.stdin', StringIO(json.dumps([first_dummy(2, 'Xml 2')]))):
+            output = self._call_command(
+                self.base_file, self.overrides_file, '-',
+                deduplicate=True,
+                format='json',
+            )
+
+        self.assertIn('Objects are not deduplicated, because objects of "-"', output)
+        self.assertNotIn('redundant', output)
+        self._assert_loaded()
+
+    def test_load_with_deduplicate_and_unreadable_format(self):
+        with patch(
+            'smart_fixtures.management.commands.loaddata.read_fixture_objects',
+            return_value=None,
+        ):
+            output = self._call_command(self.base_file, deduplicate=True)
+
+        self.assertIn('Objects are not deduplicated, because objects of', output)
+        self.assertIn('Installed 4 object(s) from 1 fixture(s)', output)
+
+
+class TestDeduplicatedChunkedLoading(DeduplicationMixin, TransactionTestCase):
+
+    def test_resume_interrupted_load(self):
+        labels = [self.base_file, self.overrides_file, self.xml_file]
+        with override_settings(FIXTURES=self.fixtures_settings):
+            checkpoints = LoadCheckpoints.load(
+                get_checkpoints_path('default', labels)
+            )
+        # Both objects of the committed chunk were superseded
+        checkpoints.record(self.base_file, 2, [0])
+
+        output = self._call_command(*labels, chunk_size=2, deduplicate=True)
+
+        self._assert_loaded()
+        self.assertIn('Resumed an interrupted load, skipped 2 committed', output)
+        self.assertIn('Skipped 3 redundant write(s)', output)
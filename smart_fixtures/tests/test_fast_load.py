@@ -0,0 +1,195 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from dummy.models import FirstDummy
+from smart_fixtures.fast_load import (
+    _get_postgresql_indexes,
+    _get_sqlite_indexes,
+    fast_load,
+    restore_dropped_indexes,
+)
+from smart_fixtures.profiling import LoadProfile
+
+
+def get_indexes(table: str) -> dict[str, str]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT name, sql FROM sqlite_master '
+            'WHERE type = %s AND tbl_name = %s',
+            ['index', table],
+        )
+        return dict(cursor.fetchall())
+
+
+class TestFastLoad(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE INDEX dummy_name_idx ON dummy_firstdummy (name)'
+            )
+            cursor.execute(
+                'CREATE UNIQUE INDEX dummy_image_uniq ON dummy_firstdummy (image)'
+            )
+        self.indexes = get_indexes('dummy_firstdummy')
+        self.tmp_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.tmp_dir, 'dropped_indexes.json')
+
+    def test_fast_load(self):
+        profile = LoadProfile()
+        with fast_load(connection, ['dummy_firstdummy'], profile) as index_count:
+            self.assertEqual(index_count, 1)
+            self.assertEqual(
+                list(get_indexes('dummy_firstdummy')), ['dummy_image_uniq']
+            )
+            FirstDummy.objects.create(name='A', description='', image='a.png')
+
+        self.assertEqual(get_indexes('dummy_firstdummy'), self.indexes)
+        self.assertEqual(profile.phases['index_rebuild']['objects'], 1)
+
+    def test_fast_load_failure(self):
+        with self.assertRaises(ValueError):
+            with fast_load(connection, ['dummy_firstdummy']):
+                raise ValueError('Broken fixture')
+        self.assertEqual(get_indexes('dummy_firstdummy'), self.indexes)
+
+    def test_fast_load_killed_during_load(self):
+        # The process dies before the dropped indexes are created again
+        with patch(
+            'smart_fixtures.fast_load._create_indexes',
+            side_effect=KeyboardInterrupt,
+        ):
+            with self.assertRaises(KeyboardInterrupt):
+                with fast_load(
+                    connection, ['dummy_firstdummy'], state_path=self.state_path
+                ):
+                    self.assertTrue(os.path.exists(self.state_path))
+
+        self.assertEqual(list(get_indexes('dummy_firstdummy')), ['dummy_image_uniq'])
+        stdout = StringIO()
+        with override_settings(FIXTURES={
+            'labels': ['first_dummies'],
+            'cache_dir': self.tmp_dir,
+        }):
+            call_command('loaddata', '--all', stdout=stdout)
+
+        self.assertIn(
+            'Recreated 1 secondary index(es) dropped by an interrupted load',
+            stdout.getvalue(),
+        )
+        self.assertEqual(get_indexes('dummy_firstdummy'), self.indexes)
+        self.assertFalse(os.path.exists(self.state_path))
+        self.assertEqual(restore_dropped_indexes(connection, self.state_path), 0)
+
+    def test_restore_dropped_indexes_that_exist(self):
+        with open(self.state_path, 'w') as state_file:
+            json.dump({'version': 1, 'databases': {
+                'default': [['dummy_firstdummy', 'dummy_name_idx', 'CREATE']],
+                'other': [['dummy_firstdummy', 'dummy_name_idx', 'CREATE']],
+            }}, state_file)
+
+        self.assertEqual(restore_dropped_indexes(connection, self.state_path), 0)
+        other_connection = MagicMock(alias='other', vendor='oracle')
+        self.assertEqual(
+            restore_dropped_indexes(other_connection, self.state_path), 0
+        )
+        self.assertFalse(os.path.exists(self.state_path))
+
+    @patch.dict(
+        'smart_fixtures.fast_load._INDEX_READERS',
+        {'postgresql': _get_sqlite_indexes},
+    )
+    @patch.object(type(connections['default']), 'vendor', 'postgresql')
+    def test_fast_load_in_transaction_on_postgresql(self):
+        with patch(
+            'smart_fixtures.fast_load.transaction.atomic',
+            wraps=transaction.atomic,
+        ) as atomic:
+            with fast_load(
+                connection, ['dummy_firstdummy'], state_path=self.state_path
+            ) as index_count:
+                self.assertEqual(index_count, 1)
+                self.assertFalse(os.path.exists(self.state_path))
+
+        atomic.assert_called_once_with(using='default')
+        self.assertEqual(get_indexes('dummy_firstdummy'), self.indexes)
+
+    def test_fast_load_without_tables(self):
+        with fast_load(connection, None) as index_count:
+            self.assertEqual(index_count, 0)
+            self.assertEqual(get_indexes('dummy_firstdummy'), self.indexes)
+
+    @patch.object(type(connections['default']), 'vendor', 'oracle')
+    def test_fast_load_on_unsupported_database(self):
+        with fast_load(connection, ['dummy_firstdummy']) as index_count:
+            self.assertEqual(index_count, 0)
+
+    def test_get_postgresql_indexes(self):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [('name_idx', 'CREATE INDEX name_idx')]
+
+        self.assertEqual(
+            _get_postgresql_indexes(cursor, 'dummy_firstdummy'),
+            [('name_idx', 'CREATE INDEX name_idx')],
+        )
+        sql, params = cursor.execute.call_args.args
+        self.assertIn('NOT pg_index.indisunique', sql)
+        self.assertEqual(params, ['dummy_firstdummy'])
+
+    @override_settings(FIXTURES={
+        'labels': ['first_dummies'],
+        'fast_load': True,
+    })
+    def test_handle_with_fast_load(self):
+        stdout = StringIO()
+        call_command('loaddata', '--all', stdout=stdout)
+
+        self.assertIn(
+            'Rebuilt 1 secondary index(es) dropped for the load',
+            stdout.getvalue(),
+        )
+        self.assertEqual(get_indexes('dummy_firstdummy'), self.indexes)
+        self.assertEqual(FirstDummy.objects.count(), 3)
+
+    @override_settings(FIXTURES={'labels': ['first_dummies']})
+    def test_handle_with_fast_load_and_unknown_models(self):
+        for label_models in [None, {'dummy.unknown'}]:
+            with patch(
+                'smart_fixtures.management.commands.loaddata.Command'
+                '._get_labels_models',
+                return_value=label_models,
+            ):
+                stdout = StringIO()
+                call_command('loaddata', '--all', '--fast-load', stdout=stdout)
+            self.assertNotIn('Rebuilt', stdout.getvalue())
+        self.assertEqual(FirstDummy.objects.count(), 3)
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestFastLoadSQLitePragmas(TransactionTestCase):
+
+    def _get_pragmas(self) -> list:
+        with connection.cursor() as cursor:
+            values = []
+            for pragma in ['synchronous', 'temp_store']:
+                cursor.execute(f'PRAGMA {pragma}')
+                values.append(cursor.fetchone()[0])
+            return values
+
+    def test_fast_load_pragmas(self):
+        pragmas = self._get_pragmas()
+        with fast_load(connection, []):
+            self.assertEqual(self._get_pragmas(), [0, 2])
+        self.assertEqual(self._get_pragmas(), pragmas)
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from smart_fixtures.fixture_index import FixtureIndex
+
+
+class TestFixtureIndex(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.tmp_dir, 'index', 'fixtures_index.json')
+        self.fixtures_dir = os.path.join(self.tmp_dir, 'fixtures')
+        os.makedirs(os.path.join(self.fixtures_dir, 'nested.json'))
+        self.mtime_ns = 10 ** 18
+        self._add_fixture('dummies.json')
+
+    def _add_fixture(self, name: str):
+        with open(os.path.join(self.fixtures_dir, name), 'w') as file:
+            file.write('[]')
+        # Listings of recently modified directories are not stored
+        self.mtime_ns += 1
+        os.utime(self.fixtures_dir, ns=(self.mtime_ns, self.mtime_ns))
+
+    def test_get_file_names(self):
+        index = FixtureIndex()
+        self.assertEqual(
+            index.get_file_names(self.fixtures_dir), frozenset({'dummies.json'})
+        )
+        with patch('os.scandir') as mock_scandir:
+            index.get_file_names(self.fixtures_dir)
+        mock_scandir.assert_not_called()
+        self.assertEqual(
+            index.get_file_names(os.path.join(self.tmp_dir, 'missing')),
+            frozenset(),
+        )
+
+    def test_save_and_load(self):
+        index = FixtureIndex(self.index_path)
+        index.get_file_names(self.fixtures_dir)
+        index.save()
+        self.assertFalse(index.changed)
+
+        with patch('os.scandir') as mock_scandir:
+            names = FixtureIndex.load(self.index_path).get_file_names(
+                self.fixtures_dir
+            )
+        mock_scandir.assert_not_called()
+        self.assertEqual(names, frozenset({'dummies.json'}))
+
+        self._add_fixture('dummies.yaml')
+        index = FixtureIndex.load(self.index_path)
+        self.assertEqual(
+            index.get_file_names(self.fixtures_dir),
+            frozenset({'dummies.json', 'dummies.yaml'}),
+        )
+        self.assertTrue(index.changed)
+
+    def test_recently_modified_directory(self):
+        os.utime(self.fixtures_dir)
+        index = FixtureIndex(self.index_path)
+        index.get_file_names(self.fixtures_dir)
+        index.save()
+
+        self.assertEqual(index.entries, {})
+        self.assertFalse(os.path.exists(self.index_path))
+
+    def test_unreadable_directory(self):
+        with patch('os.scandir', side_effect=PermissionError):
+            names = FixtureIndex().get_file_names(self.fixtures_dir)
+        self.assertEqual(names, frozenset())
+
+    def test_load_missing_or_invalid_index(self):
+        self.assertEqual(FixtureIndex.load(self.index_path).entries, {})
+
+        os.makedirs(os.path.dirname(self.index_path))
+        with open(self.index_path, 'w') as file:
+            file.write('{"version": 0}')
+        self.assertEqual(FixtureIndex.load(self.index_path).entries, {})
+
+        with open(self.index_path, 'w') as file:
+            file.write('not json')
+        self.assertEqual(FixtureIndex.load(self.index_path).entries, {})
+
+    @patch('django.core.management.commands.loaddata.glob.iglob')
+    def test_handle_with_fixtures_index(self, mock_iglob):
+        fixtures_settings = {
+            'labels': ['first_dummies', 'second_dummies'],
+            'cache_dir': self.tmp_dir,
+            'fixtures_index': True,
+        }
+        stdout = StringIO()
+        with override_settings(FIXTURES=fixtures_settings):
+            call_command('loaddata', '--all', stdout=stdout)
+
+        mock_iglob.assert_not_called()
+        self.assertIn('Installed 4 object(s) from 2 fixture(s)', stdout.getvalue())
+        self.assertTrue(
+            os.path.exists(os.path.join(self.tmp_dir, 'fixtures_index.json'))
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
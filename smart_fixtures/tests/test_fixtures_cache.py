@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+
+from django.db import connection
+from django.test import TestCase
+
+from smart_fixtures.fixtures_cache import FixturesCache, get_database_state
+
+
+class TestFixturesCache(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_path = os.path.join(self.tmp_dir, 'fixtures_cache.json')
+        self.fixture_file = os.path.join(self.tmp_dir, 'dummies.json')
+        self._write_fixture(b'[]')
+
+    def _write_fixture(self, content: bytes):
+        with open(self.fixture_file, 'wb') as file:
+            file.write(content)
+
+    def _get_fingerprint(
+        self,
+        cache: FixturesCache,
+        state: str = 'state',
+        load_options: dict | None = None,
+    ) -> dict:
+        return cache.get_fingerprint(
+            'default',
+            'dummies',
+            [self.fixture_file],
+            state,
+            load_options or {'exclude': []},
+        )
+
+    def test_load_missing_or_invalid_cache(self):
+        self.assertEqual(FixturesCache.load(self.cache_path).entries, {})
+
+        with open(self.cache_path, 'w') as file:
+            file.write('{"version": 0}')
+        self.assertEqual(FixturesCache.load(self.cache_path).entries, {})
+
+        with open(self.cache_path, 'w') as file:
+            file.write('not json')
+        self.assertEqual(FixturesCache.load(self.cache_path).entries, {})
+
+    def test_save_and_load(self):
+        cache = FixturesCache(self.cache_path)
+        cache.record('default', 'dummies', self._get_fingerprint(cache))
+        cache.save()
+
+        self.assertEqual(FixturesCache.load(self.cache_path).entries, cache.entries)
+        self.assertFalse(os.path.exists(f'{self.cache_path}.tmp'))
+
+    def test_is_unchanged(self):
+        cache = FixturesCache(self.cache_path)
+        self.assertFalse(cache.is_unchanged(
+            'default', 'dummies', self._get_fingerprint(cache)
+        ))
+
+        cache.record('default', 'dummies', self._get_fingerprint(cache))
+        self.assertTrue(cache.is_unchanged(
+            'default', 'dummies', self._get_fingerprint(cache)
+        ))
+        self.assertFalse(cache.is_unchanged(
+            'other', 'dummies', self._get_fingerprint(cache)
+        ))
+        self.assertFalse(cache.is_unchanged(
+            'default', 'dummies', self._get_fingerprint(cache, 'other state')
+        ))
+        self.assertFalse(cache.is_unchanged(
+            'default',
+            'dummies',
+            self._get_fingerprint(cache, load_options={'exclude': ['dummy']}),
+        ))
+
+        # Touching the file without changing its content keeps it unchanged:
+        os.utime(self.fixture_file, ns=(0, 0))
+        self.assertTrue(cache.is_unchanged(
+            'default', 'dummies', self._get_fingerprint(cache)
+        ))
+
+        self._write_fixture(b'[ ]')
+        self.assertFalse(cache.is_unchanged(
+            'default', 'dummies', self._get_fingerprint(cache)
+        ))
+
+    def test_get_database_state(self):
+        state = get_database_state(connection)
+        self.assertEqual(state, get_database_state(connection))
+
+        name = connection.settings_dict['NAME']
+        connection.settings_dict['NAME'] = 'other'
+        try:
+            self.assertNotEqual(get_database_state(connection), state)
+        finally:
+            connection.settings_dict['NAME'] = name
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
@@ -0,0 +1,132 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.core import serializers
+from django.core.management import call_command
+from django.core.serializers.base import DeserializationError
+from django.test import TestCase, override_settings
+
+from dummy.models import FirstDummy
+from smart_fixtures import json_stream
+from smart_fixtures.json_stream import iter_json_array
+
+
+class TestIterJsonArray(TestCase):
+
+    def _iter(self, content: str, chunk_size: int = 4) -> list:
+        return list(iter_json_array(
+            io.BytesIO(content.encode()), chunk_size=chunk_size
+        ))
+
+    def test_iter_json_array(self):
+        elements = [
+            {'model': 'dummy.firstdummy', 'pk': 1, 'fields': {'name': 'Ž [,]'}},
+            {'model': 'dummy.firstdummy', 'pk': 2, 'fields': {}},
+            12345,
+        ]
+        content = json.dumps(elements, indent=2, ensure_ascii=False)
+        for chunk_size in [1, 3, 7, 1024]:
+            self.assertEqual(self._iter(content, chunk_size), elements)
+
+    def test_iter_json_array_of_numbers_split_between_chunks(self):
+        content = '[1.5,2,-3e2,4E+1,0.25,true,12345678]'
+        elements = [1.5, 2, -300.0, 40.0, 0.25, True, 12345678]
+        for chunk_size in range(1, len(content) + 1):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(self._iter(content, chunk_size), elements)
+
+    def test_iter_json_array_from_text_stream(self):
+        self.assertEqual(
+            list(iter_json_array(io.StringIO('\ufeff [{"pk": 1}] \n'))),
+            [{'pk': 1}],
+        )
+
+    def test_iter_empty_json_array(self):
+        self.assertEqual(self._iter(' [ ] '), [])
+
+    def test_iter_invalid_json_array(self):
+        for content, message in [
+            ('', 'Expected a JSON array'),
+            ('{"pk": 1}', 'Expected a JSON array'),
+            ('[{"pk": 1} {"pk": 2}]', 'Expected "," or "]"'),
+            ('[{"pk": 1}] []', 'Extra data after the JSON array'),
+            ('[{"pk": 1}', 'Expected "," or "]"'),
+            ('[{"pk": ', 'Expecting value'),
+        ]:
+            with self.subTest(content=content):
+                with self.assertRaisesMessage(ValueError, message):
+                    self._iter(content)
+
+
+class TestJsonStreamDeserializer(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.objects = [
+            {
+                'model': 'dummy.firstdummy',
+                'pk': pk,
+                'fields': {
+                    'name': f'First Dummy {pk}',
+                    'description': 'Lorem ipsum',
+                    'image': f'dummy/images/{pk}.png',
+                },
+            }
+            for pk in range(1, 4)
+        ]
+
+    def test_json_serializer_is_registered(self):
+        self.assertIs(
+            serializers.get_deserializer('json'), json_stream.Deserializer
+        )
+
+    def test_deserialize_string(self):
+        objects = list(serializers.deserialize('json', json.dumps(self.objects)))
+        self.assertEqual([obj.object.pk for obj in objects], [1, 2, 3])
+
+    def test_deserialize_invalid_stream(self):
+        for content in [b'[{"pk": 1', b'[{"model": "dummy.unknown"}]']:
+            with self.subTest(content=content):
+                with self.assertRaises(DeserializationError):
+                    list(serializers.deserialize('json', io.BytesIO(content)))
+
+    def test_loaddata_json_and_jsonl(self):
+        with open(os.path.join(self.tmp_dir, 'dummies.json'), 'w') as file:
+            json.dump(self.objects[:2], file)
+        with open(os.path.join(self.tmp_dir, 'more_dummies.jsonl'), 'w') as file:
+            file.write(json.dumps(self.objects[2]))
+
+        with override_settings(FIXTURE_DIRS=[self.tmp_dir]):
+            call_command('loaddata', 'dummies', 'more_dummies', verbosity=0)
+
+        self.assertEqual(
+            list(FirstDummy.objects.order_by('pk').values_list('name', flat=True)),
+            ['First Dummy 1', 'First Dummy 2', 'First Dummy 3'],
+        )
+
+    def test_loaddata_zipped_json(self):
+        zip_path = os.path.join(self.tmp_dir, 'dummies.json.zip')
+        with zipfile.ZipFile(zip_path, 'w') as zip_file:
+            zip_file.writestr('dummies.json', json.dumps(self.objects))
+
+        for options in [{}, {'deduplicate': True}, {'fast_load': True}]:
+            with self.subTest(options=options):
+                FirstDummy.objects.all().delete()
+                stdout = io.StringIO()
+                with override_settings(
+                    FIXTURE_DIRS=[self.tmp_dir],
+                    FIXTURES={'labels': [], 'cache_dir': self.tmp_dir},
+                ):
+                    call_command('loaddata', 'dummies', stdout=stdout, **options)
+
+                self.assertIn('Installed 3 object(s)', stdout.getvalue())
+                self.assertEqual(FirstDummy.objects.count(), 3)
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
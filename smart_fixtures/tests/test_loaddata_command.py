@@ -1,8 +1,47 @@
+import asyncio
+import json
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from io import StringIO
+from shutil import copy as shutil_copy
 from unittest.mock import patch, call
 
-from django.core.management import call_command
-from django.test import TestCase, override_settings
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from dummy.models import FirstDummy
+from smart_fixtures.media import MediaInstaller
+
+
+class FakeDirEntry:
+
+    def __init__(self, name: str, is_file: bool = True, is_dir: bool = False):
+        self.name = name
+        self._is_file = is_file
+        self._is_dir = is_dir
+
+    def is_file(self) -> bool:
+        return self._is_file
+
+    def is_dir(self) -> bool:
+        return self._is_dir
+
+
+class FakeScandir:
+
+    def __init__(self, *entries: FakeDirEntry):
+        self.entries = entries
+
+    def __enter__(self):
+        return iter(self.entries)
+
+    def __exit__(self, *args):
+        pass
 
 
 class TestLoadDataCommand(TestCase):
@@ -11,25 +50,20 @@ class TestLoadDataCommand(TestCase):
         super().setUp()
 
         self.copy_patcher = patch(
-            'smart_fixtures.management.commands.loaddata.shutil.copy'
+            'smart_fixtures.media.copy_file'
         )
         self.mock_copy = self.copy_patcher.start()
 
-        self.listdir_patcher = patch(
-            'smart_fixtures.management.commands.loaddata.os.listdir'
+        self.scandir_patcher = patch(
+            'smart_fixtures.media.os.scandir'
         )
-        self.mock_listdir = self.listdir_patcher.start()
+        self.mock_scandir = self.scandir_patcher.start()
 
         self.makedirs_patcher = patch(
-            'smart_fixtures.management.commands.loaddata.os.makedirs'
+            'smart_fixtures.media.os.makedirs'
         )
         self.mock_makedirs = self.makedirs_patcher.start()
 
-        self.isfile_patcher = patch(
-            'smart_fixtures.management.commands.loaddata.os.path.isfile',
-        )
-        self.mock_isfile = self.isfile_patcher.start()
-
         self.base_handle_patcher = patch(
             'django.core.management.commands.loaddata.Command.handle'
         )
@@ -40,15 +74,26 @@ class TestLoadDataCommand(TestCase):
         )
         self.mock_write = self.write_patcher.start()
 
-        self.mocked_copied_files_message = 'Copied files message'
-        self.create_copied_files_message_patcher = patch(
-            'smart_fixtures.management.commands.loaddata'
-            '.create_copied_files_message',
-            return_value=self.mocked_copied_files_message
+        # Media sources of these tests don't exist
+        self.media_sources_patcher = patch(
+            'smart_fixtures.config.FixturesConfig.get_missing_media_sources',
+            return_value=[],
+        )
+        self.media_sources_patcher.start()
+
+        # Fixtures of these tests don't exist
+        self.fixture_files_patcher = patch(
+            'smart_fixtures.management.commands.loaddata.Command.'
+            '_find_labels_fixture_files',
+            return_value=[],
         )
-        self.mock_create_copied_files_message = (
-            self.create_copied_files_message_patcher.start()
+        self.fixture_files_patcher.start()
+
+        self.getsize_patcher = patch(
+            'smart_fixtures.media_report.os.path.getsize',
+            return_value=10,
         )
+        self.mock_getsize = self.getsize_patcher.start()
 
     @override_settings(FIXTURES={
         'labels': ['portfolio', 'link', 'skill'],
@@ -58,12 +103,15 @@ class TestLoadDataCommand(TestCase):
         ]
     })
     def test_handle(self):
-        self.mock_listdir.side_effect = [
-            ['image1.jpg', 'image2.png'],  # Files for src1
-            ['image3.jpg', 'image4.png']  # Files for src2
+        self.mock_scandir.side_effect = [
+            # Files for src1:
+            FakeScandir(FakeDirEntry('image1.jpg'), FakeDirEntry('image2.png')),
+            # Files for src2 (the first file does not exist):
+            FakeScandir(
+                FakeDirEntry('image3.jpg', is_file=False),
+                FakeDirEntry('image4.png'),
+            ),
         ]
-        # Simulate that the first file in src2 does not exist:
-        self.mock_isfile.side_effect = [True, True, False, True]
 
         call_command('loaddata', '--all')
 
@@ -95,7 +143,7 @@ class TestLoadDataCommand(TestCase):
             )
         ])
         self.mock_write.assert_called_once_with(
-            self.mocked_copied_files_message
+            'Copied 3 media file(s), 30 bytes'
         )
 
     @override_settings(FIXTURES={
@@ -105,7 +153,7 @@ class TestLoadDataCommand(TestCase):
         ]
     })
     def test_handle_with_no_files(self):
-        self.mock_listdir.return_value = []
+        self.mock_scandir.return_value = FakeScandir()
 
         call_command('loaddata', '--all')
 
@@ -118,9 +166,7 @@ class TestLoadDataCommand(TestCase):
             exist_ok=True
         )
         self.mock_copy.assert_not_called()
-        self.mock_write.assert_called_once_with(
-            self.mocked_copied_files_message
-        )
+        self.mock_write.assert_called_once_with('No media files were copied')
 
     @override_settings(FIXTURES={
         'labels': ['portfolio', 'link', 'skill'],
@@ -132,9 +178,7 @@ class TestLoadDataCommand(TestCase):
         self.assertEqual(call_args, ('portfolio', 'link', 'skill'))
         self.mock_makedirs.assert_not_called()
         self.mock_copy.assert_not_called()
-        self.mock_write.assert_called_once_with(
-            self.mocked_copied_files_message
-        )
+        self.mock_write.assert_called_once_with('No media files were copied')
 
     @override_settings(FIXTURES=None)
     def test_handle_with_invalid_fixtures_setting_variable(self):
@@ -174,9 +218,630 @@ class TestLoadDataCommand(TestCase):
     def tearDown(self):
         super().tearDown()
         self.copy_patcher.stop()
-        self.listdir_patcher.stop()
+        self.scandir_patcher.stop()
         self.makedirs_patcher.stop()
-        self.isfile_patcher.stop()
         self.base_handle_patcher.stop()
         self.write_patcher.stop()
-        self.create_copied_files_message_patcher.stop()
+        self.getsize_patcher.stop()
+        self.media_sources_patcher.stop()
+        self.fixture_files_patcher.stop()
+
+
+class TestLoadDataCommandMediaSync(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.tmp_dir, 'src')
+        self.dest_dir = os.path.join(self.tmp_dir, 'dest')
+        os.makedirs(self.src_dir)
+        for name in ['image1.jpg', 'image2.png']:
+            with open(os.path.join(self.src_dir, name), 'wb') as file:
+                file.write(name.encode())
+
+        self.fixtures_settings = {
+            'labels': ['portfolio'],
+            'media': [{'src': self.src_dir, 'dest': self.dest_dir}],
+            'cache_dir': os.path.join(self.tmp_dir, 'cache'),
+        }
+
+        self.base_handle_patcher = patch(
+            'django.core.management.commands.loaddata.Command.handle'
+        )
+        self.mock_base_handle = self.base_handle_patcher.start()
+
+        # Fixtures of these tests don't exist
+        self.fixture_files_patcher = patch(
+            'smart_fixtures.management.commands.loaddata.Command.'
+            '_find_labels_fixture_files',
+            return_value=[],
+        )
+        self.fixture_files_patcher.start()
+
+    def _call_command(self, *args) -> str:
+        stdout = StringIO()
+        with override_settings(FIXTURES=self.fixtures_settings):
+            call_command('loaddata', '--all', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_handle_with_media_sync_option(self):
+        output = self._call_command('--media-sync', 'mtime')
+        self.assertIn('Media sync: 2 copied, 0 skipped, 0 removed', output)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.tmp_dir, 'cache', 'media_manifest.json')
+        ))
+
+        output = self._call_command('--media-sync', 'mtime')
+        self.assertIn('No media files were copied', output)
+        self.assertIn('Media sync: 0 copied, 2 skipped, 0 removed', output)
+
+        os.remove(os.path.join(self.src_dir, 'image2.png'))
+        output = self._call_command('--media-sync', 'mtime')
+        self.assertIn('Media sync: 0 copied, 1 skipped, 1 removed', output)
+        self.assertIn('dest/image2.png (removed)', output)
+        self.assertEqual(os.listdir(self.dest_dir), ['image1.jpg'])
+
+    def test_handle_with_async_media(self):
+        output = self._call_command('--async-media', '--media-workers', '2')
+        self.assertIn('Copied 2 media file(s), 20 bytes', output)
+        self.assertEqual(
+            sorted(os.listdir(self.dest_dir)), ['image1.jpg', 'image2.png']
+        )
+
+        self.fixtures_settings['async_media'] = True
+        self.fixtures_settings['media_sync'] = 'mtime'
+        self._call_command()
+        output = self._call_command()
+        self.assertIn('Media sync: 0 copied, 2 skipped, 0 removed', output)
+
+    def test_handle_with_async_media_in_event_loop(self):
+        async def call_command_in_event_loop():
+            with patch.object(MediaInstaller, 'install_async') as install_async:
+                output = self._call_command('--async-media')
+            install_async.assert_not_called()
+            return output
+
+        output = asyncio.run(call_command_in_event_loop())
+
+        self.assertIn('Copied 2 media file(s), 20 bytes', output)
+
+    def test_handle_with_media_sync_setting(self):
+        self.fixtures_settings['media_sync'] = 'hash'
+        self._call_command()
+        with open(os.path.join(self.dest_dir, 'image1.jpg'), 'wb') as file:
+            file.write(b'changed.jpg')
+
+        output = self._call_command()
+        self.assertIn('Media sync: 1 copied, 1 skipped, 0 removed', output)
+        with open(os.path.join(self.dest_dir, 'image1.jpg'), 'rb') as file:
+            self.assertEqual(file.read(), b'image1.jpg')
+
+    def test_handle_without_media_sync(self):
+        self._call_command()
+        output = self._call_command()
+        self.assertIn('Copied 2 media file(s)', output)
+        self.assertNotIn('Media sync', output)
+
+    def test_handle_with_invalid_media_sync_setting(self):
+        self.fixtures_settings['media_sync'] = 'size'
+        with self.assertRaisesMessage(CommandError, '"media_sync" value "size"'):
+            self._call_command()
+        self.mock_base_handle.assert_not_called()
+
+    def test_handle_with_media_workers(self):
+        output = self._call_command('--media-workers', '4', '--verbosity', '2')
+        self.assertIn('Copied files:\n1. ', output)
+        self.assertIn('\n2. ', output)
+        self.assertIn('Copied 2 media file(s), 20 bytes', output)
+        self.assertEqual(
+            sorted(os.listdir(self.dest_dir)),
+            ['image1.jpg', 'image2.png'],
+        )
+
+    def test_handle_with_media_report(self):
+        report_path = os.path.join(self.tmp_dir, 'media_report.jsonl')
+        output = self._call_command('--media-report', report_path)
+
+        self.assertNotIn('Copied files:', output)
+        self.assertIn('Copied 2 media file(s), 20 bytes', output)
+        with open(report_path) as report_file:
+            records = [json.loads(line) for line in report_file]
+        self.assertEqual(sorted(records, key=lambda record: record['src']), [
+            {
+                'src': os.path.join(self.src_dir, name),
+                'dest': os.path.join(self.dest_dir, name),
+                'size': 10,
+            }
+            for name in ['image1.jpg', 'image2.png']
+        ])
+
+        self.fixtures_settings['media_report'] = report_path
+        self._call_command('--media-sync', 'mtime')
+        self._call_command('--media-sync', 'mtime')
+        with open(report_path) as report_file:
+            self.assertEqual(report_file.read(), '')
+
+    def test_handle_with_media_verbosity(self):
+        output = self._call_command('--verbosity', '0')
+        self.assertNotIn('Copied', output)
+
+    def test_handle_with_invalid_media_workers(self):
+        with self.assertRaisesMessage(CommandError, 'media workers "0"'):
+            self._call_command('--media-workers', '0')
+
+        self.fixtures_settings['media_workers'] = 'many'
+        with self.assertRaisesMessage(CommandError, 'media workers "many"'):
+            self._call_command()
+        self.mock_base_handle.assert_not_called()
+
+    def test_handle_with_media_strategy(self):
+        self.fixtures_settings['media'][0]['strategy'] = 'symlink'
+        output = self._call_command()
+
+        self.assertNotIn('were copied because', output)
+        dest_file = os.path.join(self.dest_dir, 'image1.jpg')
+        self.assertTrue(os.path.islink(dest_file))
+
+    @patch('smart_fixtures.media.os.symlink')
+    def test_handle_with_unsupported_media_strategy(self, mock_symlink):
+        mock_symlink.side_effect = OSError('Operation not permitted')
+        self.fixtures_settings['media'][0]['strategy'] = 'symlink'
+        output = self._call_command()
+
+        self.assertIn(
+            '2 media file(s) were copied because the configured strategy '
+            'is not supported',
+            output,
+        )
+        dest_file = os.path.join(self.dest_dir, 'image1.jpg')
+        self.assertFalse(os.path.islink(dest_file))
+
+    def test_handle_with_invalid_media_strategy(self):
+        self.fixtures_settings['media'][0]['strategy'] = 'move'
+        with self.assertRaisesMessage(
+            CommandError, 'Invalid media strategy "move"'
+        ):
+            self._call_command()
+        self.assertFalse(os.path.exists(self.dest_dir))
+
+    def test_handle_with_media_storage(self):
+        self.fixtures_settings['media'][0].update(
+            dest='images',
+            storage='django.core.files.storage.FileSystemStorage',
+        )
+        with override_settings(MEDIA_ROOT=self.dest_dir):
+            output = self._call_command()
+            self.assertIn('Copied 2 media file(s)', output)
+            self.assertEqual(
+                sorted(os.listdir(os.path.join(self.dest_dir, 'images'))),
+                ['image1.jpg', 'image2.png'],
+            )
+
+            output = self._call_command('--profile')
+            self.assertIn('No media files were copied', output)
+
+    def test_handle_with_invalid_media_storage(self):
+        self.fixtures_settings['media'][0]['storage'] = 'remote'
+        with self.assertRaisesMessage(
+            CommandError, 'Invalid media storage for "'
+        ):
+            self._call_command()
+        self.mock_base_handle.assert_not_called()
+
+    def test_handle_with_background_media(self):
+        def handle(*args, **kwargs):
+            # The fixtures are loaded while media files are being copied:
+            self.assertFalse(media_copied.is_set())
+            release_copy.set()
+
+        media_copied = threading.Event()
+        release_copy = threading.Event()
+
+        def copy(src_file, dest_file):
+            release_copy.wait(timeout=5)
+            shutil_copy(src_file, dest_file)
+            media_copied.set()
+
+        self.mock_base_handle.side_effect = handle
+        with patch('smart_fixtures.media.copy_file', side_effect=copy):
+            output = self._call_command('--background-media')
+
+        self.assertTrue(media_copied.is_set())
+        self.assertIn('Copied 2 media file(s)', output)
+        self.mock_base_handle.assert_called_once()
+        call_args, _ = self.mock_base_handle.call_args
+        self.assertEqual(call_args, ('portfolio',))
+
+    @patch('smart_fixtures.media.copy_file')
+    def test_handle_with_background_media_failure(self, mock_copy):
+        mock_copy.side_effect = OSError('No space left on device')
+        self.fixtures_settings['background_media'] = True
+
+        with self.assertRaisesMessage(
+            CommandError, 'Failed to copy 2 media file(s)'
+        ):
+            self._call_command()
+        self.mock_base_handle.assert_called_once()
+
+    @patch('smart_fixtures.media.copy_file')
+    def test_handle_with_background_media_and_fixtures_failure(
+        self, mock_copy
+    ):
+        mock_copy.side_effect = OSError('No space left on device')
+        self.mock_base_handle.side_effect = CommandError('Broken fixture')
+        self.fixtures_settings['background_media'] = True
+        stderr = StringIO()
+
+        with override_settings(FIXTURES=self.fixtures_settings):
+            with self.assertRaisesMessage(CommandError, 'Broken fixture'):
+                call_command('loaddata', '--all', stderr=stderr)
+        self.assertIn(
+            'Media files installation failed: '
+            'Failed to copy 2 media file(s)',
+            stderr.getvalue(),
+        )
+
+        mock_copy.side_effect = None
+        stderr = StringIO()
+        with override_settings(FIXTURES=self.fixtures_settings):
+            with self.assertRaisesMessage(CommandError, 'Broken fixture'):
+                call_command('loaddata', '--all', stderr=stderr)
+        self.assertEqual(stderr.getvalue(), '')
+
+    def _call_command_with_references(self, *args) -> str:
+        self._add_references()
+        with override_settings(
+            MEDIA_ROOT=self.tmp_dir, FIXTURE_DIRS=[self.tmp_dir]
+        ):
+            return self._call_command(*args)
+
+    def _call_command_with_labels(self, *args, **options) -> str:
+        stdout = StringIO()
+        with override_settings(
+            FIXTURES=self.fixtures_settings,
+            MEDIA_ROOT=self.tmp_dir,
+            FIXTURE_DIRS=[self.tmp_dir],
+        ):
+            call_command('loaddata', 'portfolio', *args, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def _add_references(self):
+        with open(os.path.join(self.tmp_dir, 'portfolio.json'), 'w') as file:
+            json.dump([
+                {
+                    'model': 'dummy.firstdummy',
+                    'pk': 1,
+                    'fields': {'image': 'dest/image1.jpg'},
+                },
+                {
+                    'model': 'dummy.firstdummy',
+                    'pk': 2,
+                    'fields': {'image': 'dest/missing.jpg'},
+                },
+                {
+                    'model': 'dummy.seconddummy',
+                    'pk': 1,
+                    'fields': {'file': 'dest/image2.png'},
+                },
+            ], file)
+        self.fixtures_settings['media'][0]['referenced_only'] = True
+
+    def test_handle_with_referenced_only_media(self):
+        output = self._call_command_with_references()
+
+        self.assertEqual(
+            sorted(os.listdir(self.dest_dir)), ['image1.jpg', 'image2.png']
+        )
+        self.assertIn(
+            'Referenced media files not found in media sources:\n'
+            f'1. {os.path.join(self.dest_dir, "missing.jpg")}',
+            output,
+        )
+
+    def test_handle_labels_with_referenced_media(self):
+        self._add_references()
+        other_dest_dir = os.path.join(self.tmp_dir, 'other')
+        self.fixtures_settings['media'].append(
+            {'src': self.src_dir, 'dest': other_dest_dir}
+        )
+
+        output = self._call_command_with_labels('--referenced-media')
+
+        self.assertEqual(
+            sorted(os.listdir(self.dest_dir)), ['image1.jpg', 'image2.png']
+        )
+        self.assertIn('Referenced media files not found in media sources', output)
+        # Other media entries are installed only with "--all" flag
+        self.assertFalse(os.path.exists(other_dest_dir))
+        self.assertEqual(
+            self.mock_base_handle.call_args.args, ('portfolio',)
+        )
+
+    def test_handle_labels_without_referenced_media(self):
+        self._add_references()
+
+        output = self._call_command_with_labels()
+
+        self.assertIn(
+            'Media files referenced by the fixtures are not installed, use '
+            '"--referenced-media" flag',
+            output,
+        )
+        self.assertFalse(os.path.exists(self.dest_dir))
+        self.mock_base_handle.assert_called_once()
+
+        # Parallel workers don't repeat the warning of the command
+        self.assertNotIn(
+            '--referenced-media',
+            self._call_command_with_labels(parallel_worker=True),
+        )
+
+        self.fixtures_settings['media'] = 'invalid'
+        self.assertNotIn('--referenced-media', self._call_command_with_labels())
+        self.assertEqual(self.mock_base_handle.call_count, 3)
+
+    def test_handle_labels_without_media_references(self):
+        self._add_references()
+        with open(os.path.join(self.tmp_dir, 'portfolio.json'), 'w') as file:
+            json.dump([{
+                'model': 'dummy.firstdummy', 'pk': 1, 'fields': {'image': ''}
+            }], file)
+
+        self.assertNotIn('--referenced-media', self._call_command_with_labels())
+
+        with patch(
+            'smart_fixtures.management.commands.loaddata.read_fixture_objects',
+            return_value=None,
+        ):
+            output = self._call_command_with_labels()
+        self.assertNotIn('--referenced-media', output)
+        self.assertNotIn('cannot be detected', output)
+
+    def test_handle_labels_with_referenced_media_without_entries(self):
+        with self.assertRaisesMessage(
+            CommandError,
+            '"--referenced-media" flag requires media entries with '
+            '"referenced_only" set to True',
+        ):
+            self._call_command_with_labels('--referenced-media')
+
+        self.assertFalse(os.path.exists(self.dest_dir))
+        self.mock_base_handle.assert_not_called()
+
+    def test_handle_with_referenced_only_media_and_exclude(self):
+        self._call_command_with_references('--exclude', 'dummy.SecondDummy')
+        self.assertEqual(os.listdir(self.dest_dir), ['image1.jpg'])
+
+    @patch(
+        'smart_fixtures.management.commands.loaddata.read_fixture_objects',
+        return_value=None,
+    )
+    def test_handle_with_referenced_only_media_of_unknown_format(self, _):
+        output = self._call_command_with_references()
+
+        self.assertIn(
+            f'Media files referenced by '
+            f'"{os.path.join(self.tmp_dir, "portfolio.json")}" cannot be detected',
+            output,
+        )
+        self.assertEqual(os.listdir(self.dest_dir), [])
+
+    @patch('smart_fixtures.media.copy_file')
+    def test_handle_with_failed_media_files(self, mock_copy):
+        mock_copy.side_effect = OSError('No space left on device')
+        stderr = StringIO()
+        with override_settings(FIXTURES=self.fixtures_settings):
+            with self.assertRaisesMessage(
+                CommandError, 'Failed to copy 2 media file(s)'
+            ):
+                call_command('loaddata', '--all', stderr=stderr)
+
+        self.assertIn('Failed to copy files:', stderr.getvalue())
+        self.assertIn('No space left on device', stderr.getvalue())
+        self.mock_base_handle.assert_not_called()
+
+    def tearDown(self):
+        super().tearDown()
+        self.base_handle_patcher.stop()
+        self.fixture_files_patcher.stop()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestLoadDataCommandFixturesCache(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fixture_file = os.path.join(self.tmp_dir, 'other_dummies.json')
+        with open(self.fixture_file, 'w') as file:
+            file.write('[]')
+
+        self.fixtures_settings = {
+            'labels': ['first_dummies', 'other_dummies'],
+            'cache_dir': os.path.join(self.tmp_dir, 'cache'),
+            'fixtures_cache': True,
+        }
+
+        self.base_handle_patcher = patch(
+            'django.core.management.commands.loaddata.Command.handle'
+        )
+        self.mock_base_handle = self.base_handle_patcher.start()
+
+    def _call_command(self, *args) -> str:
+        stdout = StringIO()
+        self.mock_base_handle.reset_mock()
+        with override_settings(
+            FIXTURES=self.fixtures_settings,
+            FIXTURE_DIRS=[self.tmp_dir],
+        ):
+            call_command('loaddata', '--all', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def _get_loaded_labels(self) -> tuple[str, ...] | None:
+        if not self.mock_base_handle.called:
+            return None
+        call_args, _ = self.mock_base_handle.call_args
+        return call_args
+
+    def test_handle_with_fixtures_cache(self):
+        self._call_command()
+        self.assertEqual(
+            self._get_loaded_labels(), ('first_dummies', 'other_dummies')
+        )
+
+        output = self._call_command()
+        self.assertIsNone(self._get_loaded_labels())
+        self.assertIn('Skipped 2 unchanged fixture label(s)', output)
+
+        with open(self.fixture_file, 'w') as file:
+            file.write('[ ]')
+        output = self._call_command()
+        self.assertEqual(self._get_loaded_labels(), ('other_dummies',))
+        self.assertIn('Skipped 1 unchanged fixture label(s)', output)
+
+        self._call_command('--force')
+        self.assertEqual(
+            self._get_loaded_labels(), ('first_dummies', 'other_dummies')
+        )
+
+    def test_handle_with_fixtures_cache_and_changed_earlier_label(self):
+        self.fixtures_settings['labels'] = ['other_dummies', 'first_dummies']
+        self._call_command()
+
+        with open(self.fixture_file, 'w') as file:
+            file.write('[ ]')
+        output = self._call_command()
+
+        self.assertEqual(
+            self._get_loaded_labels(), ('other_dummies', 'first_dummies')
+        )
+        self.assertNotIn('Skipped', output)
+
+    def test_handle_with_fixtures_cache_and_changed_load_options(self):
+        self._call_command('--exclude', 'dummy.FirstDummy')
+        self.assertIsNotNone(self._get_loaded_labels())
+
+        self._call_command()
+        self.assertEqual(
+            self._get_loaded_labels(), ('first_dummies', 'other_dummies')
+        )
+        output = self._call_command()
+        self.assertIn('Skipped 2 unchanged fixture label(s)', output)
+
+    def test_handle_with_fixtures_cache_and_failed_loading(self):
+        self.mock_base_handle.side_effect = CommandError('Broken fixture')
+        with self.assertRaisesMessage(CommandError, 'Broken fixture'):
+            self._call_command()
+
+        self.mock_base_handle.side_effect = None
+        self._call_command()
+        self.assertEqual(
+            self._get_loaded_labels(), ('first_dummies', 'other_dummies')
+        )
+
+    def test_handle_with_missing_fixture(self):
+        self.fixtures_settings['labels'] = ['missing_dummies']
+        with self.assertRaisesMessage(
+            CommandError, "No fixture named 'missing_dummies' found."
+        ):
+            self._call_command()
+        self.mock_base_handle.assert_not_called()
+
+    def tearDown(self):
+        super().tearDown()
+        self.base_handle_patcher.stop()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestLoadDataCommandFixturesCacheReload(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fixtures_settings = {
+            'labels': ['base', 'overrides'],
+            'cache_dir': os.path.join(self.tmp_dir, 'cache'),
+            'fixtures_cache': True,
+        }
+        self._write_fixture('base', {1: 'Base 1'})
+        self._write_fixture('overrides', {1: 'Override 1'})
+
+    def _write_fixture(self, name: str, names: dict[int, str]):
+        with open(os.path.join(self.tmp_dir, f'{name}.json'), 'w') as file:
+            json.dump([
+                {
+                    'model': 'dummy.firstdummy',
+                    'pk': pk,
+                    'fields': {'name': name, 'description': '', 'image': ''},
+                }
+                for pk, name in names.items()
+            ], file)
+
+    def _call_command(self, *args) -> str:
+        stdout = StringIO()
+        with override_settings(
+            FIXTURES=self.fixtures_settings,
+            FIXTURE_DIRS=[self.tmp_dir],
+        ):
+            call_command('loaddata', '--all', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_changed_base_label_keeps_overrides(self):
+        self._call_command()
+        self._write_fixture('base', {1: 'Base 1 (changed)', 2: 'Base 2'})
+
+        self._call_command()
+
+        self.assertEqual(
+            dict(FirstDummy.objects.values_list('pk', 'name')),
+            {1: 'Override 1', 2: 'Base 2'},
+        )
+
+    def test_excluded_models_are_loaded_by_later_run(self):
+        self._call_command('--exclude', 'dummy.FirstDummy')
+        self.assertFalse(FirstDummy.objects.exists())
+
+        output = self._call_command()
+
+        self.assertNotIn('Skipped', output)
+        self.assertEqual(
+            dict(FirstDummy.objects.values_list('pk', 'name')),
+            {1: 'Override 1'},
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestLoadDataCommandImport(SimpleTestCase):
+    # Modules of features that are only imported when they are used
+    LAZY_MODULES = (
+        'concurrent.futures.process',
+        'smart_fixtures.archives',
+        'smart_fixtures.deduplication',
+        'smart_fixtures.fast_load',
+        'smart_fixtures.parallel',
+        'smart_fixtures.profiling',
+        'smart_fixtures.snapshots',
+        'tarfile',
+        'xml.etree.ElementTree',
+    )
+
+    def test_import_does_not_load_optional_features(self):
+        # A fresh interpreter, because the tests import every module
+        code = (
+            'import sys, django; django.setup(); '
+            'import smart_fixtures.management.commands.loaddata; '
+            f'print(sorted(set({self.LAZY_MODULES!r}) & set(sys.modules)))'
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+        self.assertEqual(output, '[]\n')
@@ -0,0 +1,758 @@
+import asyncio
+import errno
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+
+from unittest.mock import patch
+
+from django.core.files.storage import InMemoryStorage
+from django.test import TestCase, override_settings
+
+from smart_fixtures.media import (
+    MediaInstaller,
+    MediaInstallResult,
+    MediaManifest,
+    copy_file,
+    get_file_hash,
+    install_file,
+    iter_media_files,
+)
+from smart_fixtures.media_report import CopiedFilesReport
+
+
+class TestMediaManifest(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.tmp_dir, 'src')
+        self.dest_dir = os.path.join(self.tmp_dir, 'dest')
+        os.makedirs(self.src_dir)
+        os.makedirs(self.dest_dir)
+        self.manifest_path = os.path.join(self.tmp_dir, 'manifest.json')
+        self.src_file = self._write(self.src_dir, 'file.txt', b'content')
+        self.dest_file = os.path.join(self.dest_dir, 'file.txt')
+
+    def _write(self, directory: str, name: str, content: bytes) -> str:
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as file:
+            file.write(content)
+        return path
+
+    def _is_unchanged(self, manifest: MediaManifest, mode: str) -> bool:
+        return manifest.is_unchanged(
+            self.dest_dir, 'file.txt', self.src_file, self.dest_file, mode
+        )
+
+    def test_load_missing_or_invalid_manifest(self):
+        manifest = MediaManifest.load(self.manifest_path)
+        self.assertEqual(manifest.entries, {})
+
+        self._write(self.tmp_dir, 'manifest.json', b'not json')
+        self.assertEqual(MediaManifest.load(self.manifest_path).entries, {})
+
+        self._write(self.tmp_dir, 'manifest.json', b'{"version": 0}')
+        self.assertEqual(MediaManifest.load(self.manifest_path).entries, {})
+
+    def test_save_and_load(self):
+        shutil.copy(self.src_file, self.dest_file)
+        manifest = MediaManifest(self.manifest_path)
+        manifest.record(self.dest_dir, 'file.txt', self.src_file, self.dest_file)
+        manifest.save()
+
+        loaded_manifest = MediaManifest.load(self.manifest_path)
+        self.assertEqual(loaded_manifest.entries, manifest.entries)
+        self.assertFalse(os.path.exists(f'{self.manifest_path}.tmp'))
+
+    def test_is_unchanged_without_destination_file(self):
+        manifest = MediaManifest(self.manifest_path)
+        self.assertFalse(self._is_unchanged(manifest, 'mtime'))
+
+    def test_is_unchanged_with_different_size(self):
+        self._write(self.dest_dir, 'file.txt', b'other content')
+        manifest = MediaManifest(self.manifest_path)
+        self.assertFalse(self._is_unchanged(manifest, 'hash'))
+
+    def test_is_unchanged_mtime_mode(self):
+        shutil.copy(self.src_file, self.dest_file)
+        manifest = MediaManifest(self.manifest_path)
+        self.assertFalse(self._is_unchanged(manifest, 'mtime'))
+
+        manifest.record(self.dest_dir, 'file.txt', self.src_file, self.dest_file)
+        self.assertTrue(self._is_unchanged(manifest, 'mtime'))
+
+        os.utime(self.src_file, ns=(0, 0))
+        self.assertFalse(self._is_unchanged(manifest, 'mtime'))
+
+    def test_is_unchanged_hash_mode(self):
+        shutil.copy(self.src_file, self.dest_file)
+        manifest = MediaManifest(self.manifest_path)
+        # Without a record, the content of both files is compared:
+        self.assertTrue(self._is_unchanged(manifest, 'hash'))
+        record = manifest.entries[self.dest_dir]['file.txt']
+        self.assertEqual(record['sha256'], get_file_hash(self.src_file))
+
+        # Touching the source file does not change its content:
+        os.utime(self.src_file, ns=(0, 0))
+        self.assertTrue(self._is_unchanged(manifest, 'hash'))
+        record = manifest.entries[self.dest_dir]['file.txt']
+        self.assertEqual(record['mtime_ns'], 0)
+
+        # Same size, but different content:
+        self._write(self.src_dir, 'file.txt', b'CONTENT')
+        self.assertFalse(self._is_unchanged(manifest, 'hash'))
+
+    def test_prune(self):
+        shutil.copy(self.src_file, self.dest_file)
+        manifest = MediaManifest(self.manifest_path)
+        manifest.record(self.dest_dir, 'file.txt', self.src_file, self.dest_file)
+        manifest.entries[self.dest_dir]['deleted.txt'] = {}
+
+        self.assertEqual(manifest.prune(self.dest_dir, {'file.txt'}), [])
+        self.assertEqual(manifest.prune(self.dest_dir, set()), [self.dest_file])
+        self.assertFalse(os.path.exists(self.dest_file))
+        self.assertEqual(manifest.entries[self.dest_dir], {})
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestMediaInstaller(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.media_dirs = []
+        for index in range(2):
+            src_dir = os.path.join(self.tmp_dir, f'src{index}')
+            os.makedirs(os.path.join(src_dir, 'subdir'))
+            for name in ['a.txt', 'b.txt', 'c.txt']:
+                with open(os.path.join(src_dir, name), 'w') as file:
+                    file.write(f'{index}{name}')
+            self.media_dirs.append({
+                'src': src_dir,
+                'dest': os.path.join(self.tmp_dir, f'dest{index}'),
+            })
+
+    def _get_expected_copied_files(self) -> list[tuple[str, str]]:
+        return [
+            (
+                os.path.join(media_dir['src'], name),
+                os.path.join(media_dir['dest'], name),
+            )
+            for media_dir in self.media_dirs
+            for name in os.listdir(media_dir['src'])
+            if name != 'subdir'
+        ]
+
+    def test_install_async(self):
+        copied_files = []
+        for workers in [1, 4]:
+            shutil.rmtree(self.media_dirs[0]['dest'], ignore_errors=True)
+            shutil.rmtree(self.media_dirs[1]['dest'], ignore_errors=True)
+            copied_files.clear()
+            installer = MediaInstaller(
+                self.media_dirs,
+                sync_mode='mtime',
+                manifest_path=os.path.join(self.tmp_dir, 'manifest.json'),
+                workers=workers,
+                on_copied=lambda media_file: copied_files.append(
+                    (media_file.src_file, media_file.dest_file)
+                ),
+            )
+
+            result = asyncio.run(installer.install_async())
+
+            self.assertEqual(
+                result.copied_files, self._get_expected_copied_files()
+            )
+            self.assertEqual(copied_files, result.copied_files)
+            for src_file, dest_file in result.copied_files:
+                with open(src_file) as src, open(dest_file) as dest:
+                    self.assertEqual(src.read(), dest.read())
+
+        result = asyncio.run(installer.install_async())
+        self.assertEqual(result.copied_files, [])
+        self.assertEqual(result.skipped_count, 6)
+
+    def test_install_async_shuts_down_workers_after_error(self):
+        def on_copied(media_file):
+            raise RuntimeError('Report failed')
+
+        installer = MediaInstaller(self.media_dirs, workers=2, on_copied=on_copied)
+        thread_count = threading.active_count()
+
+        with patch('asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+            with self.assertRaisesMessage(RuntimeError, 'Report failed'):
+                asyncio.run(installer.install_async())
+
+        self.assertEqual(to_thread.call_args.kwargs, {'cancel_futures': True})
+        self.assertEqual(threading.active_count(), thread_count)
+
+    def test_install_with_workers(self):
+        result = MediaInstaller(self.media_dirs, workers=4).install()
+
+        self.assertEqual(result.copied_files, self._get_expected_copied_files())
+        self.assertEqual(result.failed_files, [])
+        for src_file, dest_file in result.copied_files:
+            with open(src_file) as src, open(dest_file) as dest:
+                self.assertEqual(src.read(), dest.read())
+
+    @patch('smart_fixtures.media.copy_file')
+    def test_install_collects_failed_files(self, mock_copy):
+        def copy(src_file, dest_file):
+            if src_file.endswith('b.txt'):
+                raise PermissionError(f'Permission denied: {dest_file}')
+
+        mock_copy.side_effect = copy
+        result = MediaInstaller(self.media_dirs, workers=2).install()
+
+        self.assertEqual(len(result.copied_files), 4)
+        self.assertEqual(
+            [src_file for src_file, _ in result.failed_files],
+            [
+                os.path.join(media_dir['src'], 'b.txt')
+                for media_dir in self.media_dirs
+            ],
+        )
+        self.assertIn('Permission denied', result.failed_files[0][1])
+
+    @patch('smart_fixtures.media.os.link')
+    def test_install_with_unsupported_strategy(self, mock_link):
+        mock_link.side_effect = OSError('Invalid cross-device link')
+        for media_dir in self.media_dirs:
+            media_dir['strategy'] = 'hardlink'
+
+        result = MediaInstaller(self.media_dirs).install()
+
+        self.assertEqual(result.copied_files, self._get_expected_copied_files())
+        self.assertEqual(result.fallback_count, 6)
+        # Hard links are attempted only once per destination directory:
+        self.assertEqual(mock_link.call_count, 2)
+
+    def test_install_with_hardlink_strategy(self):
+        self.media_dirs[0]['strategy'] = 'hardlink'
+        result = MediaInstaller(self.media_dirs).install()
+
+        self.assertEqual(result.fallback_count, 0)
+        for src_file, dest_file in result.copied_files:
+            self.assertEqual(
+                os.path.samefile(src_file, dest_file),
+                src_file.startswith(self.media_dirs[0]['src'])
+            )
+
+    def test_install_recursive_with_filters(self):
+        src_dir = self.media_dirs[0]['src']
+        dest_dir = self.media_dirs[0]['dest']
+        for name in ['d.txt', 'raw.txt', '.DS_Store']:
+            with open(os.path.join(src_dir, 'subdir', name), 'w') as file:
+                file.write(name)
+        media_dir = {
+            'src': src_dir,
+            'dest': dest_dir,
+            'recursive': True,
+            'include': ['*.txt'],
+            'exclude': ['subdir/raw*'],
+        }
+
+        result = MediaInstaller([media_dir], sync_mode='mtime', manifest_path=(
+            os.path.join(self.tmp_dir, 'manifest.json')
+        )).install()
+
+        self.assertEqual(
+            sorted(os.path.relpath(dest, dest_dir) for _, dest in result.copied_files),
+            ['a.txt', 'b.txt', 'c.txt', os.path.join('subdir', 'd.txt')],
+        )
+        self.assertEqual(os.listdir(os.path.join(dest_dir, 'subdir')), ['d.txt'])
+
+    def test_install_referenced_files(self):
+        src_dir = self.media_dirs[0]['src']
+        dest_dir = self.media_dirs[0]['dest']
+        with open(os.path.join(src_dir, 'subdir', 'd.txt'), 'w') as file:
+            file.write('d')
+        manifest_path = os.path.join(self.tmp_dir, 'manifest.json')
+        MediaInstaller(
+            self.media_dirs, sync_mode='mtime', manifest_path=manifest_path
+        ).install()
+        self.media_dirs[0].update(referenced_only=True, exclude=['c.txt'])
+        referenced_files = {
+            os.path.join(dest_dir, name)
+            for name in ['a.txt', 'c.txt', 'subdir/d.txt', 'missing.txt']
+        }
+
+        result = MediaInstaller(
+            self.media_dirs,
+            sync_mode='mtime',
+            manifest_path=manifest_path,
+            referenced_files=referenced_files,
+        ).install()
+
+        # Files of the first directory are not listed, and not removed:
+        self.assertEqual(result.skipped_count, 4)
+        self.assertEqual(result.removed_files, [])
+        self.assertTrue(os.path.exists(os.path.join(dest_dir, 'b.txt')))
+        self.assertEqual(
+            result.missing_files,
+            [os.path.join(dest_dir, 'missing.txt')],
+        )
+
+        self.media_dirs[0]['recursive'] = True
+        result = MediaInstaller(
+            self.media_dirs, referenced_files=referenced_files
+        ).install()
+
+        self.assertEqual(
+            [dest for _, dest in result.copied_files][:2],
+            [os.path.join(dest_dir, 'a.txt'), os.path.join(dest_dir, 'subdir/d.txt')],
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestMediaInstallerArchives(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.archive_path = os.path.join(self.tmp_dir, 'media.tar.gz')
+        self.dest_dir = os.path.join(self.tmp_dir, 'dest')
+        self.manifest_path = os.path.join(self.tmp_dir, 'manifest.json')
+        self._create_archive({
+            'a.txt': b'a',
+            'images/b.png': b'b',
+            'images/originals/c.png': b'c',
+        })
+
+    def _create_archive(self, members: dict[str, bytes], mtime: int = 1000):
+        with tarfile.open(self.archive_path, 'w:gz') as archive:
+            for name, content in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(content)
+                info.mtime = mtime
+                archive.addfile(info, io.BytesIO(content))
+
+    def _install(self, **media_dir) -> MediaInstallResult:
+        return MediaInstaller(
+            [{'src': self.archive_path, 'dest': self.dest_dir, **media_dir}],
+            sync_mode='mtime',
+            manifest_path=self.manifest_path,
+            workers=2,
+        ).install()
+
+    def test_install_archive(self):
+        result = self._install(recursive=True, strategy='hardlink')
+
+        self.assertEqual(result.copied_files, [
+            (
+                os.path.join(self.archive_path, name),
+                os.path.join(self.dest_dir, name),
+            )
+            for name in ['a.txt', 'images/b.png', 'images/originals/c.png']
+        ])
+        with open(os.path.join(self.dest_dir, 'images', 'b.png')) as file:
+            self.assertEqual(file.read(), 'b')
+        self.assertEqual(
+            os.stat(os.path.join(self.dest_dir, 'a.txt')).st_mtime_ns,
+            1000 * 1_000_000_000,
+        )
+
+        # Members whose destination files did not change are skipped:
+        self._create_archive({'a.txt': b'aa', 'images/b.png': b'b'})
+        result = self._install(recursive=True)
+
+        self.assertEqual(
+            result.copied_files,
+            [(
+                os.path.join(self.archive_path, 'a.txt'),
+                os.path.join(self.dest_dir, 'a.txt'),
+            )],
+        )
+        self.assertEqual(result.skipped_count, 1)
+        self.assertEqual(
+            result.removed_files,
+            [os.path.join(self.dest_dir, 'images/originals/c.png')],
+        )
+
+    def test_install_archive_with_filters(self):
+        result = self._install()
+        self.assertEqual(
+            [dest_file for _, dest_file in result.copied_files],
+            [os.path.join(self.dest_dir, 'a.txt')],
+        )
+
+        result = self._install(
+            recursive=True, include=['*.png'], exclude=['originals']
+        )
+        self.assertEqual(
+            [dest_file for _, dest_file in result.copied_files],
+            [os.path.join(self.dest_dir, 'images/b.png')],
+        )
+
+    def test_install_archive_with_unsafe_member(self):
+        self._create_archive({'../outside.txt': b'outside', 'a.txt': b'a'})
+
+        result = self._install(recursive=True)
+
+        self.assertEqual(len(result.copied_files), 1)
+        self.assertEqual(
+            result.failed_files,
+            [(
+                os.path.join(self.archive_path, '../outside.txt'),
+                'Archive member is outside of the destination directory',
+            )],
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.tmp_dir, 'outside.txt')))
+
+    @patch('smart_fixtures.media.os.chmod')
+    def test_install_archive_collects_failed_members(self, mock_chmod):
+        mock_chmod.side_effect = PermissionError('Permission denied')
+
+        result = self._install()
+
+        self.assertEqual(result.copied_files, [])
+        self.assertEqual(
+            result.failed_files,
+            [(os.path.join(self.archive_path, 'a.txt'), 'Permission denied')],
+        )
+        self.assertEqual(os.listdir(self.dest_dir), [])
+
+    def test_install_referenced_archive_members(self):
+        referenced_files = {
+            os.path.join(self.dest_dir, 'images', name)
+            for name in ['b.png', 'missing.png']
+        }
+        referenced_files.add(os.path.join(self.tmp_dir, 'other', 'a.txt'))
+
+        result = MediaInstaller(
+            [{
+                'src': self.archive_path,
+                'dest': self.dest_dir,
+                'recursive': True,
+                'referenced_only': True,
+            }],
+            referenced_files=referenced_files,
+        ).install()
+
+        self.assertEqual(
+            result.copied_files,
+            [(
+                os.path.join(self.archive_path, 'images/b.png'),
+                os.path.join(self.dest_dir, 'images/b.png'),
+            )],
+        )
+        self.assertEqual(
+            result.missing_files,
+            [os.path.join(self.dest_dir, 'images/missing.png')],
+        )
+
+    def test_install_corrupted_archive(self):
+        self._install(recursive=True)
+        with open(self.archive_path, 'r+b') as archive:
+            archive.truncate(os.path.getsize(self.archive_path) // 2)
+
+        result = self._install(recursive=True)
+
+        self.assertEqual(len(result.failed_files), 1)
+        self.assertEqual(result.failed_files[0][0], self.archive_path)
+        # Files installed by the previous run are not removed:
+        self.assertEqual(result.removed_files, [])
+        self.assertTrue(os.path.exists(os.path.join(self.dest_dir, 'a.txt')))
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestMediaInstallerStorage(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.tmp_dir, 'src')
+        os.makedirs(os.path.join(self.src_dir, 'images'))
+        for name in ['a.txt', 'images/b.png']:
+            with open(os.path.join(self.src_dir, name), 'w') as file:
+                file.write(name)
+        self.archive_path = os.path.join(self.tmp_dir, 'media.tar')
+        with tarfile.open(self.archive_path, 'w') as archive:
+            for name in ['c.txt', '../d.txt']:
+                info = tarfile.TarInfo(name)
+                info.size = len(name)
+                archive.addfile(info, io.BytesIO(name.encode()))
+        self.storage = InMemoryStorage()
+
+    def _install(self, referenced_only=False, **kwargs) -> MediaInstallResult:
+        return MediaInstaller([
+            {
+                'src': src,
+                'dest': dest,
+                'recursive': True,
+                'storage': self.storage,
+                'referenced_only': referenced_only,
+            }
+            for src, dest in [
+                (self.src_dir, 'media'),
+                (self.archive_path, 'archive'),
+            ]
+        ], **kwargs).install()
+
+    def test_install_into_storage(self):
+        report = CopiedFilesReport()
+        result = self._install(workers=4, on_copied=report.add)
+
+        self.assertEqual(result.copied_files, [
+            (os.path.join(self.src_dir, 'a.txt'), 'media/a.txt'),
+            (os.path.join(self.src_dir, 'images/b.png'), 'media/images/b.png'),
+            (os.path.join(self.archive_path, 'c.txt'), 'archive/c.txt'),
+        ])
+        self.assertEqual(report.copied_bytes, 22)
+        self.assertEqual(result.failed_files, [(
+            os.path.join(self.archive_path, '../d.txt'),
+            'Archive member is outside of the destination directory',
+        )])
+        with self.storage.open('media/images/b.png') as file:
+            self.assertEqual(file.read(), b'images/b.png')
+        self.assertFalse(os.path.exists('media/a.txt'))
+
+        # Files that exist in the storage with the same size are skipped:
+        with open(os.path.join(self.src_dir, 'a.txt'), 'w') as file:
+            file.write('changed')
+        result = self._install()
+
+        self.assertEqual(
+            [dest for _, dest in result.copied_files], ['media/a.txt']
+        )
+        self.assertEqual(result.skipped_count, 2)
+        with self.storage.open('media/a.txt') as file:
+            self.assertEqual(file.read(), b'changed')
+
+    def test_install_referenced_files_into_storage(self):
+        with override_settings(MEDIA_ROOT=self.tmp_dir):
+            result = self._install(referenced_only=True, referenced_files={
+                os.path.join(self.tmp_dir, 'media', 'images', 'b.png'),
+                os.path.join(self.tmp_dir, 'archive', 'c.txt'),
+                os.path.join(self.tmp_dir, 'archive', 'e.txt'),
+            })
+
+        self.assertEqual(
+            [dest for _, dest in result.copied_files],
+            ['media/images/b.png', 'archive/c.txt'],
+        )
+        self.assertEqual(result.missing_files, ['archive/e.txt'])
+
+    @patch.object(InMemoryStorage, 'save')
+    def test_install_into_storage_collects_failed_files(self, mock_save):
+        mock_save.side_effect = RuntimeError('Access denied')
+
+        result = self._install()
+
+        self.assertEqual(result.copied_files, [])
+        self.assertEqual(
+            [error for _, error in result.failed_files],
+            ['Access denied'] * 3 + [
+                'Archive member is outside of the destination directory'
+            ],
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestIterMediaFiles(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.src_dir = tempfile.mkdtemp()
+        for path in [
+            'a.jpg',
+            '.DS_Store',
+            'images/b.jpg',
+            'images/originals/c.jpg',
+            'raw/d.jpg',
+        ]:
+            os.makedirs(
+                os.path.join(self.src_dir, os.path.dirname(path)), exist_ok=True
+            )
+            with open(os.path.join(self.src_dir, path), 'w') as file:
+                file.write(path)
+
+    def _iter_media_files(self, **kwargs) -> list[str]:
+        return sorted(iter_media_files(self.src_dir, **kwargs))
+
+    def test_iter_media_files(self):
+        self.assertEqual(self._iter_media_files(), ['.DS_Store', 'a.jpg'])
+
+    def test_iter_media_files_recursive(self):
+        self.assertEqual(self._iter_media_files(recursive=True), [
+            '.DS_Store',
+            'a.jpg',
+            'images/b.jpg',
+            'images/originals/c.jpg',
+            'raw/d.jpg',
+        ])
+
+    def test_iter_media_files_with_filters(self):
+        self.assertEqual(
+            self._iter_media_files(
+                recursive=True,
+                include=['*.jpg'],
+                exclude=['raw', 'images/originals'],
+            ),
+            ['a.jpg', 'images/b.jpg'],
+        )
+        self.assertEqual(
+            self._iter_media_files(recursive=True, include=['images/*']),
+            ['images/b.jpg', 'images/originals/c.jpg'],
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.src_dir)
+
+
+class TestInstallFile(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.src_file = os.path.join(self.tmp_dir, 'src.txt')
+        self.dest_file = os.path.join(self.tmp_dir, 'dest.txt')
+        with open(self.src_file, 'w') as file:
+            file.write('content')
+        os.chmod(self.src_file, 0o640)
+
+    def _read_dest_file(self) -> str:
+        with open(self.dest_file) as file:
+            return file.read()
+
+    def test_install_file_copy(self):
+        self.assertEqual(install_file(self.src_file, self.dest_file), 'copy')
+        self.assertEqual(self._read_dest_file(), 'content')
+        self.assertFalse(os.path.samefile(self.src_file, self.dest_file))
+        self.assertEqual(os.stat(self.dest_file).st_mode & 0o777, 0o640)
+
+    def test_install_file_hardlink(self):
+        with open(self.dest_file, 'w') as file:
+            file.write('old content')
+
+        strategy = install_file(self.src_file, self.dest_file, 'hardlink')
+
+        self.assertEqual(strategy, 'hardlink')
+        self.assertTrue(os.path.samefile(self.src_file, self.dest_file))
+
+    def test_install_file_symlink(self):
+        strategy = install_file(self.src_file, self.dest_file, 'symlink')
+
+        self.assertEqual(strategy, 'symlink')
+        self.assertEqual(os.readlink(self.dest_file), self.src_file)
+        self.assertFalse(os.path.exists(f'{self.dest_file}.smart_fixtures.tmp'))
+
+    @patch('smart_fixtures.media.fcntl.ioctl')
+    def test_install_file_reflink(self, mock_ioctl):
+        strategy = install_file(self.src_file, self.dest_file, 'reflink')
+
+        self.assertEqual(strategy, 'reflink')
+        mock_ioctl.assert_called_once()
+        self.assertEqual(mock_ioctl.call_args.args[1], 0x40049409)
+        self.assertEqual(os.stat(self.dest_file).st_mode & 0o777, 0o640)
+
+    @patch('smart_fixtures.media.fcntl.ioctl')
+    def test_install_file_reflink_not_supported(self, mock_ioctl):
+        mock_ioctl.side_effect = OSError('Operation not supported')
+        tmp_file = f'{self.dest_file}.smart_fixtures.tmp'
+        # Leftover from an interrupted run:
+        with open(tmp_file, 'w'):
+            pass
+
+        strategy = install_file(self.src_file, self.dest_file, 'reflink')
+
+        self.assertEqual(strategy, 'copy')
+        self.assertEqual(self._read_dest_file(), 'content')
+        self.assertFalse(os.path.exists(tmp_file))
+
+    @patch('smart_fixtures.media.fcntl', None)
+    def test_install_file_reflink_without_fcntl(self):
+        strategy = install_file(self.src_file, self.dest_file, 'reflink')
+        self.assertEqual(strategy, 'copy')
+
+    def test_install_file_copy_replaces_links(self):
+        install_file(self.src_file, self.dest_file, 'symlink')
+        install_file(self.src_file, self.dest_file)
+        self.assertFalse(os.path.islink(self.dest_file))
+
+        install_file(self.src_file, self.dest_file, 'hardlink')
+        install_file(self.src_file, self.dest_file)
+        self.assertFalse(os.path.samefile(self.src_file, self.dest_file))
+
+        with open(self.dest_file, 'w') as file:
+            file.write('changed')
+        with open(self.src_file) as file:
+            self.assertEqual(file.read(), 'content')
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestCopyFile(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.src_file = os.path.join(self.tmp_dir, 'src.txt')
+        self.dest_file = os.path.join(self.tmp_dir, 'dest.txt')
+        with open(self.src_file, 'wb') as file:
+            file.write(b'content' * 1000)
+        os.chmod(self.src_file, 0o640)
+
+    def _assert_copied(self):
+        with open(self.dest_file, 'rb') as file:
+            self.assertEqual(file.read(), b'content' * 1000)
+        self.assertEqual(os.stat(self.dest_file).st_mode & 0o777, 0o640)
+
+    def test_copy_file(self):
+        copy_file(self.src_file, self.dest_file)
+        self._assert_copied()
+
+    def test_copy_file_with_unsupported_kernel_copies(self):
+        unsupported = OSError(errno.EXDEV, 'Invalid cross-device link')
+        with patch('os.copy_file_range', side_effect=unsupported):
+            copy_file(self.src_file, self.dest_file)
+        self._assert_copied()
+
+        with patch('os.copy_file_range', side_effect=unsupported), patch(
+            'os.sendfile', side_effect=OSError(errno.ENOTSOCK, 'Not a socket')
+        ):
+            copy_file(self.src_file, self.dest_file)
+        self._assert_copied()
+
+    def test_copy_file_with_kernel_copy_error(self):
+        with patch('os.copy_file_range', side_effect=OSError(errno.ENOSPC, 'Full')):
+            with self.assertRaises(OSError):
+                copy_file(self.src_file, self.dest_file)
+
+        def copy_file_range(src_fd, dest_fd, count, offset_src, offset_dst):
+            if offset_src:
+                raise OSError(errno.EXDEV, 'Invalid cross-device link')
+            return os.pwrite(dest_fd, os.pread(src_fd, 10, 0), 0)
+
+        with patch('os.copy_file_range', side_effect=copy_file_range):
+            with self.assertRaises(OSError):
+                copy_file(self.src_file, self.dest_file)
+
+    def test_copy_truncated_file(self):
+        with patch('os.copy_file_range', return_value=0):
+            copy_file(self.src_file, self.dest_file)
+        self.assertEqual(os.path.getsize(self.dest_file), 0)
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
@@ -0,0 +1,254 @@
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from unittest.mock import call, patch
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+import yaml
+
+from dummy.models import FirstDummy, SecondDummy
+from smart_fixtures.checkpoints import LoadCheckpoints, get_checkpoints_path
+from smart_fixtures.fixture_readers import read_fixture_objects
+from smart_fixtures.management.commands.loaddata import Command
+from smart_fixtures.parallel import (
+    get_fixture_models,
+    group_labels,
+    load_groups_in_parallel,
+)
+from smart_fixtures.tests.utils import FixtureFilesMixin
+
+
+class TestGetFixtureModels(TestCase):
+
+    def test_get_fixture_models(self):
+        for ser_fmt, content in [
+            ('json', '[{"model": "dummy.FirstDummy"}, {"model": "auth.user"}]'),
+            ('jsonl', '{"model": "dummy.FirstDummy"}\n\n{"model": "auth.user"}\n'),
+            ('yaml', '- model: dummy.FirstDummy\n- model: auth.user\n'),
+            (
+                'xml',
+                '<?xml version="1.0" encoding="utf-8"?>'
+                '<django-objects version="1.0">'
+                '<object model="dummy.firstdummy" pk="1">'
+                '<field name="name" type="CharField">A</field></object>'
+                '<object model="auth.user" pk="1"></object>'
+                '</django-objects>',
+            ),
+        ]:
+            with self.subTest(ser_fmt=ser_fmt):
+                self.assertEqual(
+                    get_fixture_models(io.BytesIO(content.encode()), ser_fmt),
+                    {'dummy.firstdummy', 'auth.user'},
+                )
+
+    def test_get_fixture_models_from_empty_yaml(self):
+        self.assertEqual(get_fixture_models(io.BytesIO(b''), 'yaml'), set())
+        self.assertEqual(get_fixture_models(io.BytesIO(b'---\n'), 'yaml'), set())
+
+    def test_read_yaml_objects_one_at_a_time(self):
+        objects = read_fixture_objects(
+            io.BytesIO(b'- &first {model: dummy.FirstDummy}\n- *first\n- [\n'),
+            'yaml',
+        )
+
+        self.assertEqual(next(objects), {'model': 'dummy.FirstDummy'})
+        self.assertEqual(next(objects), {'model': 'dummy.FirstDummy'})
+        with self.assertRaises(yaml.YAMLError):
+            next(objects)
+
+    def test_get_fixture_models_of_unknown_format(self):
+        self.assertIsNone(get_fixture_models(io.BytesIO(b''), 'csv'))
+
+
+class TestGroupLabels(TestCase):
+
+    def test_group_labels(self):
+        self.assertEqual(
+            group_labels({
+                'first': {'dummy.firstdummy'},
+                'second': {'dummy.seconddummy'},
+                'users': {'auth.user'},
+                'groups': {'auth.group'},
+                'more_first': {'dummy.firstdummy'},
+                'unknown': {'dummy.unknown'},
+            }),
+            [['first', 'more_first'], ['second'], ['users', 'groups'], ['unknown']],
+        )
+
+    def test_group_labels_with_unknown_models(self):
+        self.assertEqual(
+            group_labels({'first': {'dummy.firstdummy'}, 'stdin': None}),
+            [['first', 'stdin']],
+        )
+
+
+@patch('smart_fixtures.parallel.connections')
+@patch('smart_fixtures.parallel.ProcessPoolExecutor', ThreadPoolExecutor)
+class TestLoadGroupsInParallel(TestCase):
+
+    @patch('smart_fixtures.parallel.call_command')
+    def test_load_groups_in_parallel(self, mock_call_command, mock_connections):
+        def load(name, *labels, **options):
+            if 'broken' in labels:
+                raise CommandError('Broken fixture')
+
+        mock_call_command.side_effect = load
+        with self.assertRaisesMessage(CommandError, 'Broken fixture'):
+            load_groups_in_parallel(
+                [['first', 'more_first'], ['broken'], ['second']],
+                2,
+                database='default',
+            )
+
+        mock_call_command.assert_has_calls([
+            call('loaddata', 'first', 'more_first', database='default'),
+            call('loaddata', 'broken', database='default'),
+            call('loaddata', 'second', database='default'),
+        ], any_order=True)
+        # Connections are closed before and after loading each group:
+        self.assertEqual(mock_connections.close_all.call_count, 4)
+
+    @patch('smart_fixtures.parallel.call_command')
+    def test_load_groups_in_parallel_times(self, mock_call_command, _):
+        group_times = load_groups_in_parallel([['first'], ['second']], 2)
+
+        self.assertEqual(len(group_times), 2)
+        self.assertTrue(all(seconds >= 0 for seconds in group_times))
+
+
+@patch.object(type(connections['default']), 'vendor', 'postgresql')
+class TestLoadDataCommandParallel(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.fixtures_settings = {
+            'labels': ['first_dummies', 'second_dummies'],
+            'parallel': 2,
+        }
+
+        self.base_handle_patcher = patch(
+            'django.core.management.commands.loaddata.Command.handle'
+        )
+        self.mock_base_handle = self.base_handle_patcher.start()
+
+        self.load_groups_patcher = patch(
+            'smart_fixtures.parallel.load_groups_in_parallel'
+        )
+        self.mock_load_groups = self.load_groups_patcher.start()
+
+    def _call_command(self, *args) -> str:
+        stdout = StringIO()
+        with override_settings(FIXTURES=self.fixtures_settings):
+            call_command('loaddata', '--all', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_handle_with_parallel_setting(self):
+        output = self._call_command()
+
+        self.assertIn('Loading 2 independent groups of fixture labels', output)
+        self.mock_base_handle.assert_not_called()
+        self.mock_load_groups.assert_called_once()
+        groups, workers = self.mock_load_groups.call_args.args
+        self.assertEqual(groups, [['first_dummies'], ['second_dummies']])
+        self.assertEqual(workers, 2)
+        self.assertEqual(
+            self.mock_load_groups.call_args.kwargs['database'], 'default'
+        )
+        self.assertIs(self.mock_load_groups.call_args.kwargs['parallel_worker'], True)
+
+    def test_handle_with_parallel_and_profile(self):
+        self.mock_load_groups.return_value = [0.5, 0.25]
+        output = self._call_command('--profile')
+
+        self.assertIn(f'{"first_dummies":<40}      0.500', output)
+        self.assertIn(f'{"second_dummies":<40}      0.250', output)
+
+    def test_handle_with_parallel_option_and_dependent_labels(self):
+        self.fixtures_settings = {'labels': ['first_dummies', '-']}
+        self._call_command('--parallel', '4', '--format', 'json')
+
+        self.mock_load_groups.assert_not_called()
+        self.mock_base_handle.assert_called_once()
+
+    @patch('smart_fixtures.parallel.get_fixture_models')
+    def test_handle_with_parallel_and_unknown_models(self, mock_get_models):
+        mock_get_models.return_value = None
+        self._call_command()
+
+        self.mock_load_groups.assert_not_called()
+        self.mock_base_handle.assert_called_once()
+
+    def test_handle_with_parallel_on_sqlite(self):
+        with patch.object(type(connections['default']), 'vendor', 'sqlite'):
+            output = self._call_command()
+
+        self.assertIn('Parallel loading is not supported on SQLite', output)
+        self.mock_load_groups.assert_not_called()
+        self.mock_base_handle.assert_called_once()
+
+    def test_handle_with_parallel_waits_for_background_media(self):
+        self.fixtures_settings['background_media'] = True
+        media_events = []
+
+        def upload_media_files(command):
+            time.sleep(0.1)
+            media_events.append('copied')
+
+        self.mock_load_groups.side_effect = (
+            lambda *args, **options: media_events.append('loaded')
+        )
+        with patch.object(Command, '_upload_media_files', upload_media_files):
+            self._call_command('--force')
+
+        self.assertEqual(media_events, ['copied', 'loaded'])
+        self.assertIs(self.mock_load_groups.call_args.kwargs['force'], True)
+
+    def test_handle_with_invalid_parallel_workers(self):
+        with self.assertRaisesMessage(CommandError, 'parallel workers "0"'):
+            self._call_command('--parallel', '0')
+
+        self.fixtures_settings['parallel'] = 'all'
+        with self.assertRaisesMessage(CommandError, 'parallel workers "all"'):
+            self._call_command()
+        self.mock_base_handle.assert_not_called()
+
+    def tearDown(self):
+        super().tearDown()
+        self.base_handle_patcher.stop()
+        self.load_groups_patcher.stop()
+
+
+@patch.object(type(connections['default']), 'vendor', 'postgresql')
+@patch(
+    'smart_fixtures.parallel.ProcessPoolExecutor',
+    # Groups are loaded one by one, because SQLite locks the whole database
+    lambda max_workers, initializer: ThreadPoolExecutor(1, initializer=initializer),
+)
+class TestLoadDataCommandParallelWorkers(FixtureFilesMixin, TransactionTestCase):
+
+    def test_workers_load_with_forwarded_options(self):
+        self.fixtures_settings.update(
+            labels=['first_dummies', 'second_dummies'], parallel=2, chunk_size=1
+        )
+        # A stale checkpoint of the group loaded by a worker
+        with override_settings(FIXTURES=self.fixtures_settings):
+            checkpoints = LoadCheckpoints.load(
+                get_checkpoints_path('default', ['first_dummies'])
+            )
+        checkpoints.record(
+            os.path.join(settings.BASE_DIR, 'dummy', 'fixtures', 'first_dummies.yaml'),
+            3,
+            [],
+        )
+
+        output = self._call_command('--all', '--force')
+
+        self.assertIn('Loading 2 independent groups of fixture labels', output)
+        self.assertEqual(FirstDummy.objects.count(), 3)
+        self.assertEqual(SecondDummy.objects.count(), 1)
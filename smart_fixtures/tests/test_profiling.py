@@ -0,0 +1,140 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from smart_fixtures.profiling import LoadProfile
+from smart_fixtures.signals import fixtures_profiled
+
+
+class TestLoadProfile(TestCase):
+
+    def test_to_dict(self):
+        profile = LoadProfile()
+        profile.total_time = 3.0
+        with patch('smart_fixtures.profiling.time.perf_counter') as mock_time:
+            mock_time.side_effect = [10.0, 10.5]
+            with profile.measure('discovery'):
+                pass
+        profile.add_phase('media', 0.5, objects=2, bytes=100)
+        profile.add_label('dummies', 2.0, objects=4, bytes=50)
+        profile.add_model('dummy.FirstDummy', 0.5, objects=3)
+        profile.add_model('dummy.FirstDummy', 0.5, objects=1)
+        profile.add_model('dummy.SecondDummy', 0.0, objects=0)
+
+        self.assertEqual(profile.to_dict(), {
+            'total_time': 3.0,
+            'phases': {
+                'discovery': {'time': 0.5},
+                'media': {
+                    'time': 0.5, 'objects': 2, 'bytes': 100,
+                    'objects_per_second': 4.0,
+                },
+                'saving': {'time': 1.0, 'objects': 4, 'objects_per_second': 4.0},
+                'parsing': {'time': 1.0},
+            },
+            'labels': {
+                'dummies': {
+                    'time': 2.0, 'objects': 4, 'bytes': 50,
+                    'objects_per_second': 2.0,
+                },
+            },
+            'models': {
+                'dummy.FirstDummy': {
+                    'time': 1.0, 'objects': 4, 'objects_per_second': 4.0,
+                },
+                'dummy.SecondDummy': {
+                    'time': 0.0, 'objects': 0, 'objects_per_second': None,
+                },
+            },
+        })
+
+    def test_to_dict_without_labels(self):
+        self.assertEqual(LoadProfile().to_dict(), {
+            'total_time': 0.0, 'phases': {}, 'labels': {}, 'models': {},
+        })
+
+
+class TestLoadDataCommandProfile(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.src_dir = os.path.join(self.tmp_dir, 'src')
+        os.makedirs(self.src_dir)
+        with open(os.path.join(self.src_dir, 'image.png'), 'wb') as file:
+            file.write(b'0123456789')
+
+        self.fixtures_settings = {
+            'labels': ['first_dummies', 'second_dummies'],
+            'media': [{
+                'src': self.src_dir,
+                'dest': os.path.join(self.tmp_dir, 'dest'),
+            }],
+        }
+        self.profiles = []
+        fixtures_profiled.connect(self._receive_profile)
+
+    def _receive_profile(self, sender, profile, database, **kwargs):
+        self.profiles.append((profile, database))
+
+    def _call_command(self, *args) -> str:
+        stdout = StringIO()
+        with override_settings(FIXTURES=self.fixtures_settings):
+            call_command('loaddata', '--all', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def _assert_profile(self, profile: dict):
+        self.assertGreater(profile['total_time'], 0)
+        self.assertEqual(
+            set(profile['phases']),
+            {'media', 'discovery', 'parsing', 'saving', 'constraint_checks'},
+        )
+        self.assertEqual(profile['phases']['media']['objects'], 1)
+        self.assertEqual(profile['phases']['media']['bytes'], 10)
+        self.assertEqual(profile['phases']['saving']['objects'], 4)
+        self.assertEqual(
+            {label: record['objects'] for label, record in profile['labels'].items()},
+            {'first_dummies': 3, 'second_dummies': 1},
+        )
+        self.assertEqual(
+            {model: record['objects'] for model, record in profile['models'].items()},
+            {'dummy.FirstDummy': 3, 'dummy.SecondDummy': 1},
+        )
+        self.assertGreater(profile['labels']['first_dummies']['bytes'], 0)
+
+    def test_handle_with_profile(self):
+        output = self._call_command('--profile')
+
+        self.assertIn('Profile (total time: ', output)
+        self.assertIn('first_dummies', output)
+        self.assertIn('dummy.SecondDummy', output)
+        self.assertEqual(len(self.profiles), 1)
+        profile, database = self.profiles[0]
+        self.assertEqual(database, 'default')
+        self._assert_profile(profile)
+
+    def test_handle_with_profile_output_and_bulk(self):
+        profile_output = os.path.join(self.tmp_dir, 'profile.json')
+        self._call_command('--profile-output', profile_output, '--bulk')
+
+        with open(profile_output) as profile_file:
+            profile = json.load(profile_file)
+        self._assert_profile(profile)
+        self.assertEqual(profile, self.profiles[0][0])
+
+    def test_handle_without_profile(self):
+        output = self._call_command()
+
+        self.assertNotIn('Profile', output)
+        self.assertEqual(self.profiles, [])
+
+    def tearDown(self):
+        super().tearDown()
+        fixtures_profiled.disconnect(self._receive_profile)
+        shutil.rmtree(self.tmp_dir)
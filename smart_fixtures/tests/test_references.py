@@ -0,0 +1,73 @@
+import io
+import os
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from smart_fixtures.fixture_readers import read_fixture_objects
+from smart_fixtures.references import get_file_references
+from dummy.models import FirstDummy, SecondDummy
+
+
+@override_settings(MEDIA_ROOT='/media')
+class TestGetFileReferences(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.objects = [
+            {'model': 'dummy.FirstDummy', 'fields': {'image': 'images/a.png'}},
+            {'model': 'dummy.firstdummy', 'fields': {'image': ''}},
+            {'model': 'dummy.seconddummy', 'fields': {'file': 'files/b.pdf'}},
+            {'model': 'dummy.unknown', 'fields': {'file': 'files/c.pdf'}},
+            {'model': 'dummy.seconddummy', 'fields': {'file': '../d.pdf'}},
+        ]
+
+    def test_get_file_references(self):
+        self.assertEqual(get_file_references(self.objects), {
+            os.path.normpath('/media/images/a.png'),
+            os.path.normpath('/media/files/b.pdf'),
+        })
+
+    def test_get_file_references_of_excluded_models(self):
+        self.assertEqual(
+            get_file_references(self.objects, excluded_models={SecondDummy}),
+            {os.path.normpath('/media/images/a.png')},
+        )
+        app_config = FirstDummy._meta.app_config
+        self.assertEqual(
+            get_file_references(self.objects, excluded_apps={app_config}),
+            set(),
+        )
+
+    @patch(
+        'django.core.files.storage.FileSystemStorage.path',
+        side_effect=NotImplementedError,
+    )
+    def test_get_file_references_without_storage_path(self, _):
+        self.assertEqual(
+            get_file_references(self.objects[:1]),
+            {os.path.normpath('/media/images/a.png')},
+        )
+
+    def test_get_file_references_from_xml(self):
+        fixture = io.StringIO(
+            '<?xml version="1.0" encoding="utf-8"?>'
+            '<django-objects version="1.0">'
+            '<object model="dummy.firstdummy" pk="1">'
+            '<field name="image" type="FileField">images/a.png</field>'
+            '<field name="tags" rel="ManyToManyRel" to="dummy.tag">'
+            '<object pk="1"></object>'
+            '</field>'
+            '</object>'
+            '<object model="dummy.seconddummy" pk="1">'
+            '<field name="file" type="FileField">files/b.pdf</field>'
+            '</object>'
+            '</django-objects>'
+        )
+        self.assertEqual(
+            get_file_references(read_fixture_objects(fixture, 'xml')),
+            {
+                os.path.normpath('/media/images/a.png'),
+                os.path.normpath('/media/files/b.pdf'),
+            },
+        )
@@ -0,0 +1,195 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from dummy.models import FirstDummy, SecondDummy
+from smart_fixtures.snapshots import DatabaseSnapshots, get_snapshot_key
+
+
+class TestGetSnapshotKey(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fixture_file = os.path.join(self.tmp_dir, 'dummies.json')
+        with open(self.fixture_file, 'w') as file:
+            file.write('[]')
+
+    def test_get_snapshot_key(self):
+        label_files = {'dummies': [self.fixture_file]}
+        key = get_snapshot_key(label_files, 'state', {})
+        self.assertEqual(key, get_snapshot_key(label_files, 'state', {}))
+        self.assertNotEqual(key, get_snapshot_key(label_files, 'other', {}))
+        self.assertNotEqual(
+            key, get_snapshot_key({'other': [self.fixture_file]}, 'state', {})
+        )
+        self.assertNotEqual(
+            key, get_snapshot_key(label_files, 'state', {'exclude': ['dummy']})
+        )
+
+        with open(self.fixture_file, 'w') as file:
+            file.write('[ ]')
+        self.assertNotEqual(key, get_snapshot_key(label_files, 'state', {}))
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestDatabaseSnapshots(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.snapshots = DatabaseSnapshots(
+            self.tmp_dir, connections['default']
+        )
+        FirstDummy.objects.create(pk=1, name='A', description='', image='a.png')
+        FirstDummy.objects.create(pk=2, name='B', description='', image='b.png')
+        self.group = Group.objects.create(pk=1, name='Editors')
+        self.group.permissions.set(Permission.objects.all()[:2])
+
+    def test_capture_and_restore_table_image(self):
+        self.assertFalse(self.snapshots.restore('key'))
+        self.assertTrue(self.snapshots.capture(
+            'key', {'dummy.firstdummy', 'auth.group'}
+        ))
+        self.assertEqual(os.listdir(self.snapshots.snapshot_dir), ['key.tables'])
+
+        FirstDummy.objects.filter(pk=1).update(name='Changed')
+        FirstDummy.objects.filter(pk=2).delete()
+        FirstDummy.objects.create(pk=3, name='C', description='', image='c.png')
+        self.group.permissions.clear()
+
+        with patch.object(
+            connection.ops, 'sequence_reset_sql', return_value=['SELECT 1']
+        ) as mock_sequence_reset_sql:
+            self.assertTrue(self.snapshots.restore('key'))
+        reset_models = mock_sequence_reset_sql.call_args.args[1]
+        self.assertEqual(set(reset_models), {FirstDummy, Group})
+        self.assertEqual(
+            list(FirstDummy.objects.order_by('pk').values_list('pk', 'name')),
+            [(1, 'A'), (2, 'B')],
+        )
+        self.assertEqual(self.group.permissions.count(), 2)
+
+    def test_capture_replaces_previous_snapshot(self):
+        self.snapshots.capture('old', {'dummy.firstdummy'})
+        self.snapshots.capture('new', {'dummy.firstdummy'})
+
+        self.assertEqual(os.listdir(self.snapshots.snapshot_dir), ['new.tables'])
+        self.assertFalse(self.snapshots.restore('old'))
+
+    def test_capture_keeps_snapshots_of_other_aliases(self):
+        with patch.object(connections['default'], 'alias', 'default-replica'):
+            replica_snapshots = DatabaseSnapshots(
+                self.tmp_dir, connections['default']
+            )
+            replica_snapshots.capture('replica', {'dummy.firstdummy'})
+
+        self.snapshots.capture('key', {'dummy.firstdummy'})
+
+        self.assertEqual(
+            sorted(os.listdir(self.tmp_dir)), ['default', 'default-replica']
+        )
+        self.assertEqual(
+            os.listdir(replica_snapshots.snapshot_dir), ['replica.tables']
+        )
+
+    def test_capture_without_models(self):
+        self.assertFalse(self.snapshots.capture('key', None))
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestDatabaseSnapshotsSQLiteBackup(TransactionTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.snapshots = DatabaseSnapshots(
+            self.tmp_dir, connections['default']
+        )
+
+    def test_capture_and_restore_sqlite_backup(self):
+        FirstDummy.objects.create(pk=1, name='A', description='', image='a.png')
+        self.assertTrue(self.snapshots.capture('key', None))
+        self.assertEqual(os.listdir(self.snapshots.snapshot_dir), ['key.sqlite3'])
+
+        FirstDummy.objects.all().delete()
+        SecondDummy.objects.create(pk=1, name='B', description='', file='b.pdf')
+
+        self.assertTrue(self.snapshots.restore('key'))
+        self.assertEqual(list(FirstDummy.objects.values_list('name', flat=True)), ['A'])
+        self.assertFalse(SecondDummy.objects.exists())
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
+
+
+class TestLoadDataCommandSnapshot(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fixtures_settings = {
+            'labels': ['first_dummies', 'second_dummies'],
+            'cache_dir': self.tmp_dir,
+        }
+
+    def _call_command(self, *args) -> str:
+        stdout = StringIO()
+        with override_settings(FIXTURES=self.fixtures_settings):
+            call_command('loaddata', '--all', *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_handle_with_snapshot(self):
+        output = self._call_command('--snapshot')
+        self.assertIn('Installed 4 object(s)', output)
+        self.assertIn('Captured a database snapshot', output)
+
+        FirstDummy.objects.all().delete()
+        output = self._call_command('--snapshot')
+        self.assertIn('Restored the database snapshot of 2 fixture label(s)', output)
+        self.assertNotIn('Installed', output)
+        self.assertEqual(FirstDummy.objects.count(), 3)
+
+        self.fixtures_settings['snapshot'] = True
+        output = self._call_command('--force')
+        self.assertIn('Installed 4 object(s)', output)
+        self.assertIn('Captured a database snapshot', output)
+
+    def test_handle_with_snapshot_after_load_with_exclude(self):
+        output = self._call_command('--snapshot', '--exclude', 'dummy.FirstDummy')
+        self.assertIn('Captured a database snapshot', output)
+        self.assertFalse(FirstDummy.objects.exists())
+
+        output = self._call_command('--snapshot')
+
+        self.assertNotIn('Restored', output)
+        self.assertIn('Installed 4 object(s)', output)
+        self.assertEqual(FirstDummy.objects.count(), 3)
+
+    @patch('smart_fixtures.parallel.get_fixture_models')
+    def test_handle_with_snapshot_and_unknown_models(self, mock_get_models):
+        mock_get_models.return_value = None
+        output = self._call_command('--snapshot')
+
+        self.assertIn('Installed 4 object(s)', output)
+        self.assertIn('Database snapshot was not captured', output)
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
@@ -0,0 +1,123 @@
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import (
+    FileSystemStorage,
+    InMemoryStorage,
+    default_storage,
+)
+from django.test import TestCase, override_settings
+
+from smart_fixtures.storage import (
+    StorageUploader,
+    get_storage,
+    get_storage_path,
+)
+
+
+class TestGetStorage(TestCase):
+
+    def test_get_storage(self):
+        storage = InMemoryStorage()
+        self.assertIs(get_storage(storage), storage)
+        self.assertIs(get_storage('default'), default_storage._wrapped)
+        self.assertIsInstance(
+            get_storage('django.core.files.storage.InMemoryStorage'),
+            InMemoryStorage,
+        )
+
+    def test_get_invalid_storage(self):
+        with self.assertRaisesMessage(ValueError, 'Unknown storage "remote"'):
+            get_storage('remote')
+        with self.assertRaisesMessage(ValueError, 'is not a storage class'):
+            get_storage('django.core.files.base.ContentFile')
+
+    @override_settings(MEDIA_ROOT='/media')
+    def test_get_storage_path(self):
+        storage = FileSystemStorage(location='/storage')
+        self.assertEqual(
+            get_storage_path(storage, 'images/a.png'),
+            os.path.normpath('/storage/images/a.png'),
+        )
+        self.assertIsNone(get_storage_path(storage, '../a.png'))
+        self.assertEqual(
+            get_storage_path(InMemoryStorage(), 'images/a.png'),
+            os.path.normpath('/media/images/a.png'),
+        )
+
+
+class TestStorageUploader(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.storage = InMemoryStorage()
+        self.storage.save('media/images/a.png', ContentFile(b'a'))
+        self.uploader = StorageUploader(self.storage, '/media/')
+
+    def test_get_name(self):
+        self.assertEqual(self.uploader.get_name('images/a.png'), 'media/images/a.png')
+        self.assertEqual(StorageUploader(self.storage).get_name('a.png'), 'a.png')
+
+    def test_exists_lists_each_directory_once(self):
+        with patch.object(
+            self.storage, 'listdir', wraps=self.storage.listdir
+        ) as mock_listdir:
+            self.assertTrue(self.uploader.exists('media/images/a.png'))
+            self.assertFalse(self.uploader.exists('media/images/b.png'))
+            self.assertFalse(self.uploader.exists('media/files/c.pdf'))
+
+        self.assertEqual(mock_listdir.call_count, 2)
+
+    @patch.object(InMemoryStorage, 'listdir', side_effect=NotImplementedError)
+    def test_exists_without_listing(self, _):
+        self.assertTrue(self.uploader.exists('media/images/a.png'))
+        self.assertFalse(self.uploader.exists('media/images/b.png'))
+
+    def test_is_unchanged(self):
+        self.assertTrue(self.uploader.is_unchanged('media/images/a.png', 1))
+        self.assertFalse(self.uploader.is_unchanged('media/images/a.png', 2))
+        self.assertFalse(self.uploader.is_unchanged('media/images/b.png', 1))
+
+    def test_upload(self):
+        self.assertFalse(self.uploader.exists('media/images/b.png'))
+
+        for name in ['media/images/a.png', 'media/images/b.png']:
+            self.assertEqual(
+                self.uploader.upload(name, io.BytesIO(b'new')), name
+            )
+            self.assertTrue(self.uploader.exists(name))
+            with self.storage.open(name) as file:
+                self.assertEqual(file.read(), b'new')
+
+    def test_upload_renamed_by_storage(self):
+        with patch.object(self.storage, 'save', return_value='a_1.png'):
+            with self.assertRaisesMessage(OSError, 'saved "a.png" as "a_1.png"'):
+                self.uploader.upload('a.png', io.BytesIO(b'new'))
+
+
+class TestFileSystemStorageUploader(TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.tmp_dir)
+
+    def test_upload(self):
+        uploader = StorageUploader(self.storage, 'images')
+        self.assertFalse(uploader.exists('images/a.png'))
+
+        uploader.upload('images/a.png', io.BytesIO(b'a'))
+
+        with open(os.path.join(self.tmp_dir, 'images', 'a.png'), 'rb') as file:
+            self.assertEqual(file.read(), b'a')
+        self.assertTrue(StorageUploader(self.storage).is_unchanged(
+            'images/a.png', 1
+        ))
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
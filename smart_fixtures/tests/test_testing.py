@@ -0,0 +1,153 @@
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import DEFAULT_DB_ALIAS
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from dummy.models import FirstDummy, SecondDummy
+from smart_fixtures import testing
+from smart_fixtures.testing import (
+    TEST_DATABASES_ENV,
+    TEST_MEDIA_ROOT_ENV,
+    SmartFixturesTestCase,
+    SmartFixturesTestRunner,
+    get_test_fixtures_settings,
+    setup_test_fixtures,
+)
+
+
+class TestingStateMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.environ = patch.dict(os.environ)
+        self.environ.start()
+        os.environ.pop(TEST_MEDIA_ROOT_ENV, None)
+        os.environ.pop(TEST_DATABASES_ENV, None)
+
+    def tearDown(self):
+        testing._disable_test_settings()
+        testing._loaded_databases.clear()
+        media_root = os.environ.get(TEST_MEDIA_ROOT_ENV)
+        if media_root:
+            shutil.rmtree(media_root)
+        self.environ.stop()
+        super().tearDown()
+
+
+class TestGetTestFixturesSettings(SimpleTestCase):
+
+    def test_get_test_fixtures_settings(self):
+        media_root = os.path.join(tempfile.gettempdir(), 'test_media')
+        fixtures_settings = {
+            'labels': ['first_dummies'],
+            'media': [
+                {'src': 'images', 'dest': settings.MEDIA_ROOT / 'images'},
+                {'src': 'files', 'dest': '/srv/files'},
+                {'src': 'files', 'dest': 'files', 'storage': 'default'},
+                'invalid',
+            ],
+            'media_sync': 'mtime',
+            'fixtures_cache': True,
+        }
+
+        with override_settings(FIXTURES=fixtures_settings):
+            test_settings = get_test_fixtures_settings(media_root)
+
+        self.assertEqual(test_settings['labels'], ['first_dummies'])
+        self.assertEqual(test_settings['media'], [
+            {'src': 'images', 'dest': testing.Path(media_root) / 'images'},
+            {'src': 'files', 'dest': '/srv/files'},
+            {'src': 'files', 'dest': 'files', 'storage': 'default'},
+            'invalid',
+        ])
+        self.assertIsNone(test_settings['media_sync'])
+        self.assertIs(test_settings['fixtures_cache'], False)
+
+        with override_settings(FIXTURES=None):
+            self.assertEqual(get_test_fixtures_settings(media_root), {
+                'media_sync': None,
+                'fixtures_cache': False,
+            })
+
+
+class TestSetupTestFixtures(TestingStateMixin, TestCase):
+
+    def test_setup_test_fixtures(self):
+        original_media_root = settings.MEDIA_ROOT
+
+        setup_test_fixtures()
+
+        media_root = os.environ[TEST_MEDIA_ROOT_ENV]
+        self.assertEqual(settings.MEDIA_ROOT, media_root)
+        self.assertNotEqual(media_root, original_media_root)
+        self.assertTrue(os.listdir(os.path.join(media_root, 'dummy')))
+        self.assertEqual(FirstDummy.objects.count(), 3)
+        self.assertEqual(SecondDummy.objects.count(), 1)
+
+        with patch('smart_fixtures.testing.load_fixtures') as load_fixtures:
+            setup_test_fixtures()
+            testing._loaded_databases.clear()
+            os.environ[TEST_DATABASES_ENV] = DEFAULT_DB_ALIAS
+            setup_test_fixtures()
+        load_fixtures.assert_not_called()
+
+
+class TestSmartFixturesTestCase(SimpleTestCase):
+
+    def test_set_up_class(self):
+        class DatabaseTests(SmartFixturesTestCase, SimpleTestCase):
+            databases = {DEFAULT_DB_ALIAS}
+
+        class AllDatabasesTests(SmartFixturesTestCase, SimpleTestCase):
+            databases = '__all__'
+
+        class NoDatabaseTests(SmartFixturesTestCase, SimpleTestCase):
+            pass
+
+        with patch(
+            'smart_fixtures.testing.setup_test_fixtures'
+        ) as setup_test_fixtures_mock:
+            for test_case in [DatabaseTests, AllDatabasesTests, NoDatabaseTests]:
+                test_case.setUpClass()
+                test_case.tearDownClass()
+
+        self.assertEqual(setup_test_fixtures_mock.call_count, 2)
+        setup_test_fixtures_mock.assert_called_with(DEFAULT_DB_ALIAS)
+
+
+@patch('django.test.runner.DiscoverRunner.teardown_test_environment')
+@patch('django.test.runner.DiscoverRunner.setup_test_environment')
+class TestSmartFixturesTestRunner(TestingStateMixin, TestCase):
+
+    def test_run(self, *mocks):
+        runner = SmartFixturesTestRunner(verbosity=0)
+        runner.setup_test_environment()
+        media_root = os.environ[TEST_MEDIA_ROOT_ENV]
+        self.assertEqual(settings.MEDIA_ROOT, media_root)
+
+        def setup_databases(**kwargs):
+            emit_post_migrate_signal(0, False, DEFAULT_DB_ALIAS)
+            return 'old_config'
+
+        with patch(
+            'django.test.runner.DiscoverRunner.setup_databases',
+            side_effect=setup_databases,
+        ):
+            old_config = runner.setup_databases(aliases={DEFAULT_DB_ALIAS: False})
+            self.assertEqual(old_config, 'old_config')
+            self.assertEqual(runner.setup_databases(aliases={}), 'old_config')
+
+        self.assertEqual(FirstDummy.objects.count(), 3)
+        self.assertEqual(os.environ[TEST_DATABASES_ENV], DEFAULT_DB_ALIAS)
+        self.assertTrue(os.listdir(os.path.join(media_root, 'dummy')))
+
+        runner.teardown_test_environment()
+        self.assertNotEqual(settings.MEDIA_ROOT, media_root)
+        self.assertFalse(os.path.exists(media_root))
+        self.assertNotIn(TEST_DATABASES_ENV, os.environ)
+        runner.teardown_test_environment()
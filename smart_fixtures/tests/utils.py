@@ -0,0 +1,60 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+
+
+def first_dummy(pk, name: str | None = None) -> dict:
+    return {
+        'model': 'dummy.firstdummy',
+        'pk': pk,
+        'fields': {
+            'name': f'Dummy {pk}' if name is None else name,
+            'description': '',
+            'image': '',
+        },
+    }
+
+
+class FixtureFilesMixin:
+    """
+    Creates a temporary directory for fixture files, which is also the
+    cache directory and a fixtures directory of the "loaddata" command
+    called with `_call_command`.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.fixtures_settings = {'labels': [], 'cache_dir': self.tmp_dir}
+
+    def _write_fixture(self, file_name: str, content: str | list[dict]) -> str:
+        """
+        Writes the fixture file and returns its path. A list of objects is
+        serialized as JSON Lines or JSON, depending on the file extension.
+        """
+        if not isinstance(content, str):
+            if file_name.endswith('.jsonl'):
+                content = ''.join(f'{json.dumps(obj)}\n' for obj in content)
+            else:
+                content = json.dumps(content)
+        fixture_file = os.path.join(self.tmp_dir, file_name)
+        with open(fixture_file, 'w') as file:
+            file.write(content)
+        return fixture_file
+
+    def _call_command(self, *args, **options) -> str:
+        stdout = StringIO()
+        with override_settings(
+            FIXTURES=self.fixtures_settings, FIXTURE_DIRS=[self.tmp_dir]
+        ):
+            call_command('loaddata', *args, stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def tearDown(self):
+        super().tearDown()
+        shutil.rmtree(self.tmp_dir)
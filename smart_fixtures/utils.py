@@ -1,28 +1,126 @@
+import json
+import os
+
 from django.conf import settings
 
+DEFAULT_CACHE_DIR_NAME = '.smart_fixtures'
+
+
+def create_copied_file_line(number: int, src: str, dest: str) -> str:
+    return f'{number}. {_get_relative_path(src)} -> {_get_relative_path(dest)}'
+
 
-def create_copied_files_message(file_path_pairs: list[tuple[str, str]]) -> str:
-    if not file_path_pairs:
+def create_copied_files_summary(copied_count: int, copied_bytes: int) -> str:
+    if not copied_count:
         return 'No media files were copied'
+    return f'Copied {copied_count} media file(s), {copied_bytes} bytes'
+
+
+def create_media_sync_message(
+    copied_count: int,
+    skipped_count: int,
+    removed_files: list[str],
+) -> str:
+    message = (
+        f'Media sync: {copied_count} copied, {skipped_count} skipped, '
+        f'{len(removed_files)} removed\n'
+    )
+    for index, removed_file in enumerate(removed_files):
+        message += f'{index + 1}. {_get_relative_path(removed_file)} (removed)\n'
+    return message
 
-    copied_files_display = [
-        f'{index + 1}. {relative_src} -> {relative_dest}\n'
-        for index, (relative_src, relative_dest)
-        in enumerate([
-            (_get_relative_path(src), _get_relative_path(dest))
-            for src, dest in file_path_pairs
-        ])
+
+def create_failed_files_message(failed_files: list[tuple[str, str]]) -> str:
+    failed_files_display = [
+        f'{index + 1}. {_get_relative_path(src)}: {error}\n'
+        for index, (src, error) in enumerate(failed_files)
+    ]
+    return f'Failed to copy files:\n{"".join(failed_files_display)}'
+
+
+def create_missing_files_message(missing_files: list[str]) -> str:
+    missing_files_display = [
+        f'{index + 1}. {_get_relative_path(dest)}\n'
+        for index, dest in enumerate(missing_files)
     ]
-    return f'Copied files:\n{"".join(copied_files_display)}'
+    return (
+        f'Referenced media files not found in media sources:\n'
+        f'{"".join(missing_files_display)}'
+    )
+
+
+def create_profile_message(profile: dict) -> str:
+    message = f'Profile (total time: {profile["total_time"]:.3f} s)\n'
+    for title, records in [
+        ('Phase', profile['phases']),
+        ('Label', profile['labels']),
+        ('Model', profile['models']),
+    ]:
+        if not records:
+            continue
+        message += (
+            f'{title:<40} {"Time (s)":>10} {"Objects":>10} '
+            f'{"Objects/s":>12} {"Bytes":>12}\n'
+        )
+        for name, record in records.items():
+            message += (
+                f'{name:<40} {record["time"]:>10.3f} '
+                f'{_format_number(record.get("objects")):>10} '
+                f'{_format_number(record.get("objects_per_second")):>12} '
+                f'{_format_number(record.get("bytes")):>12}\n'
+            )
+    return message
+
+
+def get_cache_dir() -> str:
+    """
+    Returns the directory where the state of previous runs is persisted.
+    It can be configured with "cache_dir" key in FIXTURES settings variable
+    and defaults to ".smart_fixtures" directory in BASE_DIR.
+    """
+    fixtures_settings = getattr(settings, 'FIXTURES', None) or {}
+    cache_dir = fixtures_settings.get('cache_dir')
+    if cache_dir is None:
+        cache_dir = os.path.join(settings.BASE_DIR, DEFAULT_CACHE_DIR_NAME)
+    return str(cache_dir)
+
+
+def load_json_state(path: str, version: int) -> dict:
+    """
+    Returns the state saved to `path` by `save_json_state`, or an empty
+    dictionary if the file is missing, invalid or of another `version`.
+    """
+    try:
+        with open(path) as state_file:
+            data = json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+
+    if not isinstance(data, dict) or data.get('version') != version:
+        return {}
+    return data
+
+
+def save_json_state(path: str, version: int, data: dict):
+    """
+    Saves `data` with its `version` as JSON to `path`. The file is replaced
+    atomically, so an interrupted save leaves the previous state intact.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as state_file:
+        json.dump({'version': version, **data}, state_file)
+    os.replace(tmp_path, path)
 
 
 def _get_relative_path(absolute_path: str) -> str:
-    if not absolute_path.startswith(str(settings.BASE_DIR)):
+    base_dir = os.path.join(str(settings.BASE_DIR), '')
+    if not absolute_path.startswith(base_dir):
         return absolute_path
+    return absolute_path[len(base_dir):]
 
-    relative_path = absolute_path.replace(str(settings.BASE_DIR), '')
-    return (
-        relative_path[1:]
-        if relative_path.startswith('/')
-        else relative_path
-    )
+
+def _format_number(number: int | float | None) -> str:
+    if number is None:
+        return '-'
+    return f'{number:.1f}' if isinstance(number, float) else str(number)